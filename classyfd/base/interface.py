@@ -64,6 +64,14 @@ class _BaseFileAndDirectoryInterface(metaclass=ABCMeta):
     def get_parent(self):
         pass         
     
+    @abstractclassmethod
+    def stat(self):
+        pass
+    
+    @abstractclassmethod
+    def refresh(self):
+        pass
+    
     @abstractclassmethod
     def create(self):
         pass         
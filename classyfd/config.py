@@ -5,4 +5,9 @@ import platform
 
 
 _OPERATING_SYSTEM = platform.system().lower()
-_ENCODING = "utf-8"
\ No newline at end of file
+_ENCODING = "utf-8"
+
+# The default amount of worker threads used by operations that work on many
+# files at once (e.g., copying or removing a directory tree). File system calls
+# release the GIL, so more threads than cores is still useful for I/O.
+_MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
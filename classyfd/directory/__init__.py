@@ -1,4 +1,5 @@
 """Contains operations for directories"""
 
 # Expose the class here to make the API more simple
-from .directory import Directory
\ No newline at end of file
+from .directory import Directory
+from .snapshot import Snapshot
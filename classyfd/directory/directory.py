@@ -3,6 +3,8 @@
 import os
 import pathlib
 import shutil
+import stat
+import time
 # Unix-like Only Imports
 try:
     import pwd
@@ -10,15 +12,18 @@ try:
 except ImportError:
     pass
 
+from . import snapshot as snapshot_
+from . import duplicates, globbing, query, ranking, tree, usage, walker
 from ..base import _BaseFileAndDirectoryInterface
+from ..file import File, hashing
 from ..exceptions import InvalidDirectoryValueError
-from .. import utils, config
+from .. import utils, config, watcher
 
 
 class Directory(_BaseFileAndDirectoryInterface):
     """A class that groups together the (meta)data and behavior of 
     directories"""
-    def __init__(self, path):
+    def __init__(self, path, stat_ttl=None):
         """
         Construct the object
 
@@ -26,6 +31,10 @@ class Directory(_BaseFileAndDirectoryInterface):
         path -- (str) where the directory is (or will be) located at. An 
                 exception is raised if the path refers to a file, and also if an
                 empty string is given.
+        stat_ttl -- (int or float) how many seconds a metadata snapshot (taken
+                    by .stat() or .refresh()) stays valid for. If None, then a
+                    snapshot stays valid until it is refreshed, or until the
+                    directory is renamed or removed.
 
         """
         if not path:
@@ -33,13 +42,15 @@ class Directory(_BaseFileAndDirectoryInterface):
             # that a path will be given upon instantiation.
             raise InvalidDirectoryValueError("No directory path was given")
         
+        if stat_ttl is not None and stat_ttl < 0:
+            raise InvalidDirectoryValueError("stat_ttl should be 0 or more")
+        
         # Raise an exception if the path refers to a file
-        path_exists = os.path.exists(path)
-        path_is_a_file = os.path.isfile(path)
-        if path_exists and path_is_a_file:
-            raise NotADirectoryError("The path refers to a file") 
+        self._raise_if_file(path)
         
         self._path = utils.normalize_path(os.path.abspath(path))         
+        self._stat_ttl = stat_ttl
+        self._invalidate_stat()
         return
     
     # Special Methods
@@ -89,17 +100,22 @@ class Directory(_BaseFileAndDirectoryInterface):
         
         """
         # Raise an exception if the path refers to a file
-        path_exists = os.path.exists(new_path)
-        path_is_a_file = os.path.isfile(new_path)
-        if path_exists and path_is_a_file:
-            raise NotADirectoryError("The path refers to a file")
+        self._raise_if_file(new_path)
         
         self._path = utils.normalize_path(os.path.abspath(new_path))         
+        self._invalidate_stat()
         return    
     
     @property
     def exists(self):
-        return os.path.exists(self.path)
+        """
+        Return whether the directory exists or not
+        
+        Return Value:
+        (bool)
+        
+        """
+        return self._get_stat_result() is not None
     
     @property
     def created_on(self):
@@ -107,7 +123,17 @@ class Directory(_BaseFileAndDirectoryInterface):
     
     @property
     def size(self):
-        pass    
+        """
+        Get the size of the directory (in bytes)
+        
+        This is the apparent size of everything in the directory tree. See
+        .get_size() for more options.
+        
+        Return Value:
+        (int)
+        
+        """
+        return self.get_size()
     
     @property
     def parent(self):
@@ -141,7 +167,8 @@ class Directory(_BaseFileAndDirectoryInterface):
             ) 
     
         # Get the owner's details from the user account and password database
-        pwd_user = pwd.getpwnam(pathlib.Path(self.path).owner())
+        stat_result = self._get_stat_result(must_exist=True)
+        pwd_user = pwd.getpwuid(stat_result.st_uid)
     
         user = {}
         user["username"] = pwd_user.pw_name
@@ -171,7 +198,8 @@ class Directory(_BaseFileAndDirectoryInterface):
             )       
     
         # Get the group's details from the group database
-        grp_group = grp.getgrnam(pathlib.Path(self.path).group())
+        stat_result = self._get_stat_result(must_exist=True)
+        grp_group = grp.getgrgid(stat_result.st_gid)
     
         group = {}
         group["name"] = grp_group.gr_name
@@ -193,7 +221,17 @@ class Directory(_BaseFileAndDirectoryInterface):
         system, all after a Directory object is created.
         
         """
-        return os.path.isdir(self.path)    
+        if self._dir_entry is not None and self._stat_ttl is None:
+            # The entry usually knows its type without a system call (it's
+            # only used once, just like its metadata)
+            entry, self._dir_entry = self._dir_entry, None
+            try:
+                return entry.is_dir()
+            except OSError:
+                return False
+        
+        stat_result = self._get_stat_result()
+        return bool(stat_result and stat.S_ISDIR(stat_result.st_mode))
     
     # Regular Methods
     def get_parent(self, levels=1):
@@ -224,6 +262,531 @@ class Directory(_BaseFileAndDirectoryInterface):
     
         return parent         
     
+    def get_size(self, allocated=False, cache=None, max_workers=None):
+        """
+        Get the size of the directory (in bytes), like du
+        
+        The whole directory tree is walked in parallel, and every file (and
+        symbolic link) in it is counted. Files with multiple hard links are
+        only counted once. Directories themselves aren't counted.
+        
+        Parameters:
+        allocated -- (bool) if True, then the space allocated on disk is 
+                     returned (from st_blocks), rather than the apparent size
+                     (st_size). The two differ for sparse files and for files
+                     that don't fill their last block.
+        cache -- (dict) if given, the subtotal of every sub-directory is stored
+                 in it. Later calls that are given the same dict only stat the
+                 files of the sub-directories whose modification time changed.
+                 Since modifying a file in place doesn't change its 
+                 directory's modification time, such changes are missed.
+        max_workers -- (int) the amount of worker threads
+        
+        Return Value:
+        (int)
+        
+        """
+        apparent_size, allocated_size = usage.get_tree_size(
+            self.path, cache=cache, max_workers=max_workers
+        )
+        
+        return allocated_size if allocated else apparent_size
+    
+    def hash_files(self, algorithm="sha256", cache=None, max_workers=None,
+                   use_processes=False, on_error=None):
+        """
+        Hash every file in the directory tree, in parallel
+        
+        The tree is walked (and every file is stat'ed) in parallel first. 
+        Then the files are hashed by a pool of threads or processes, the 
+        largest files first, with small files hashed in batches. Symbolic
+        links are never followed.
+        
+        Parameters:
+        algorithm -- (str) the name of any algorithm supported by 
+                     hashlib.new()
+        cache -- (DigestCache or bool) see File.hash()
+        max_workers -- (int) the amount of worker threads (or processes) used
+                       to hash the files. If None, then there is one process
+                       per CPU, or the default amount of threads.
+        use_processes -- (bool) whether to hash in worker processes rather 
+                         than threads. Processes are faster when there are 
+                         lots of small files.
+        on_error -- (function) if given, it is called with the OSError raised
+                    when a file (or sub-directory) can't be read, which is 
+                    then skipped. Otherwise, the error is raised.
+        
+        Return Value:
+        (generator) yields (File, digest) tuples, in the order the files are
+        hashed.
+        
+        """
+        items = []
+        for entry, stat_result in walker.scan_files(self.path, on_error):
+            file_ = File._from_dir_entry(entry, stat_ttl=self._stat_ttl)
+            items.append((file_, entry.path, stat_result))
+        
+        return hashing._hash_items(
+            items, algorithm, cache, max_workers, use_processes, on_error
+        )
+    
+    def find_duplicates(self, algorithm="sha256", min_size=1, cache=None, 
+                        max_workers=None, on_error=None):
+        """
+        Find the files with the same contents in the directory tree
+        
+        Files are eliminated in tiers (each run in parallel): first by size,
+        then by a hash of their first and last few KB, and only the files 
+        that are left are hashed in full. Hard links to the same file are not
+        duplicates of each other, so only one of their paths is considered. 
+        Symbolic links are never followed.
+        
+        Parameters:
+        algorithm -- (str) the name of the hash algorithm used for the full 
+                     hash
+        min_size -- (int) files smaller than this (in bytes) are ignored. By 
+                    default, that's only empty files.
+        cache -- (DigestCache or bool) the cache for the full hashes (see 
+                 File.hash())
+        max_workers -- (int) the amount of worker threads
+        on_error -- (function) if given, it is called with the OSError raised
+                    when a file (or sub-directory) can't be read, which is 
+                    then skipped. Otherwise, the error is raised.
+        
+        Return Value:
+        (list) contains a list of File objects for each group of duplicates.
+        The groups that waste the most space come first.
+        
+        """
+        groups = duplicates.find_duplicates(
+            self.path, algorithm=algorithm, min_size=min_size, cache=cache,
+            max_workers=max_workers, on_error=on_error
+        )
+        
+        return [
+            [
+                File._from_dir_entry(entry, stat_ttl=self._stat_ttl)
+                for entry, _ in files
+            ]
+            for files in groups
+        ]
+    
+    def snapshot(self, index_path, max_workers=None):
+        """
+        Record the state of the whole directory tree in an on-disk index
+        
+        The path, size, modification time, inode, and mode of every entry are
+        stored in an SQLite database, which can later be handed to .rescan()
+        to find out what changed without walking the whole tree again.
+        
+        Parameters:
+        index_path -- (str) where to create the index file. An exception is
+                      raised if it already exists.
+        max_workers -- (int) the amount of worker threads used to walk the 
+                       tree.
+        
+        Return Value:
+        (Snapshot)
+        
+        """
+        return snapshot_.create_snapshot(
+            self.path, index_path, max_workers=max_workers
+        )
+    
+    def rescan(self, snapshot, update=False, thorough=False, max_workers=None):
+        """
+        Find what changed in the directory tree since a snapshot was taken
+        
+        Only the directories whose modification time changed are listed 
+        again; every other directory is just stat'ed. Since modifying a file
+        in place doesn't change its directory's modification time, such 
+        changes are only found when thorough is True.
+        
+        Parameters:
+        snapshot -- (Snapshot) a snapshot of this directory (see .snapshot())
+        update -- (bool) if True, then the snapshot is updated to match the
+                  directory tree, so that the next rescan only finds newer 
+                  changes.
+        thorough -- (bool) if True, then every file in an unchanged directory
+                    is stat'ed as well.
+        max_workers -- (int) the amount of worker threads
+        
+        Return Value:
+        (dict) the keys are added, removed, and modified. Each value is a 
+        sorted list of absolute paths.
+        
+        """
+        if snapshot.root != self.path:
+            raise InvalidDirectoryValueError(
+                "The snapshot is of another directory"
+            )
+        
+        return snapshot_.rescan_snapshot(
+            snapshot, update=update, thorough=thorough, 
+            max_workers=max_workers
+        )
+    
+    def stat(self):
+        """
+        Get a snapshot of the directory's metadata
+        
+        A single os.stat() call populates the snapshot, and the metadata
+        properties (exists, is_dir, owner, and group) are then read from it 
+        until it expires (see the stat_ttl parameter of the constructor), is
+        refreshed, or the directory is renamed or removed. If there is still a
+        valid snapshot, then it is returned without touching the file system.
+        
+        Return Value:
+        (os.stat_result)
+        
+        """
+        if self._dir_entry is not None and self._stat_taken_on is None:
+            self._take_snapshot_from_dir_entry()
+        
+        if not self._stat_is_valid():
+            self.refresh()
+        
+        if self._stat_result is None:
+            raise FileNotFoundError(
+                "No such directory: '{path}'".format(path=self.path)
+            )
+        
+        return self._stat_result
+    
+    def refresh(self):
+        """
+        Take a new snapshot of the directory's metadata, discarding any 
+        previous one
+        
+        A directory that does not exist is recorded as such, so the exists 
+        property can also be answered from the snapshot.
+        
+        """
+        try:
+            self._stat_result = os.stat(self.path)
+        except OSError:
+            self._stat_result = None
+        
+        self._stat_taken_on = time.monotonic()
+        self._dir_entry = None
+        return
+    
+    def iterdir(self):
+        """
+        Iterate over the files and directories in the directory
+        
+        The entries are streamed from os.scandir(), so even a directory with 
+        millions of entries is iterated over in constant memory. The objects
+        are created from the scanned entries, so no extra system calls are 
+        made to check their types, and the first read of their metadata is 
+        answered from the entries as well. Symbolic links to directories are
+        yielded as Directory objects; everything else that isn't a directory
+        is yielded as a File object.
+        
+        Return Value:
+        (generator) yields File and Directory objects, in arbitrary order.
+        
+        """
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                yield self._create_object_from_dir_entry(entry)
+        
+        return
+    
+    def files(self):
+        """
+        Iterate over the (regular) files in the directory
+        
+        See .iterdir() for more information.
+        
+        Return Value:
+        (generator) yields File objects, in arbitrary order.
+        
+        """
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    yield File._from_dir_entry(entry, stat_ttl=self._stat_ttl)
+        
+        return
+    
+    def directories(self):
+        """
+        Iterate over the sub-directories in the directory
+        
+        See .iterdir() for more information.
+        
+        Return Value:
+        (generator) yields Directory objects, in arbitrary order.
+        
+        """
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    yield Directory._from_dir_entry(
+                        entry, stat_ttl=self._stat_ttl
+                    )
+        
+        return
+    
+    def walk(self, max_depth=None, follow_symlinks=False, ordered=False,
+             on_error=None, max_workers=None):
+        """
+        Walk the directory tree (like os.walk, but in parallel)
+        
+        The directories are scanned by a pool of worker threads, which makes a
+        big difference when each directory listing has a high latency (such
+        as on network file systems and spinning disks). The results are 
+        yielded as soon as they arrive, unless ordered is True.
+        
+        Parameters:
+        max_depth -- (int) how many levels of sub-directories to descend into.
+                     0 only walks this directory. If None, there is no limit.
+        follow_symlinks -- (bool) whether to descend into symbolic links to 
+                           directories. Symbolic link loops are detected, and
+                           a directory is never walked twice.
+        ordered -- (bool) if True, the directories are yielded in the same 
+                   order as a top-down os.walk() with sorted names would. 
+                   Results that are scanned early are held back (in memory) 
+                   until it is their turn, and there is no bound on how 
+                   many: on a wide tree, it can be most of the tree.
+        on_error -- (function) if given, it is called with the OSError raised
+                    when a directory can't be scanned. Otherwise, the directory
+                    is skipped.
+        max_workers -- (int) the amount of worker threads
+        
+        Return Value:
+        (generator) yields (directory, sub_directories, files) tuples, where
+        directory is a Directory object, sub_directories is a list of 
+        Directory objects, and files is a list of File objects. Just like
+        .iterdir(), the objects are created from the scanned entries.
+        
+        """
+        results = walker.scan_tree(
+            self.path, max_depth=max_depth, follow_symlinks=follow_symlinks,
+            ordered=ordered, on_error=on_error, max_workers=max_workers
+        )
+        for directory_path, depth, entry, entries in results:
+            if entry is None:
+                directory = self
+            else:
+                directory = Directory._from_dir_entry(
+                    entry, stat_ttl=self._stat_ttl
+                )
+            
+            sub_directories = []
+            files = []
+            for sub_entry in entries:
+                obj = self._create_object_from_dir_entry(sub_entry)
+                if isinstance(obj, Directory):
+                    sub_directories.append(obj)
+                else:
+                    files.append(obj)
+            
+            yield (directory, sub_directories, files)
+        
+        return
+    
+    def find(self, name=None, glob=None, regex=None, type=None, 
+             min_size=None, max_size=None, newer_than=None, older_than=None, 
+             max_depth=None, exclude=None, on_error=None, max_workers=None):
+        """
+        Find everything in the directory tree that matches all of the given 
+        predicates (like the find command)
+        
+        The predicates are compiled once, and evaluated by the walker's 
+        worker threads. The ones that only need the name and the type (which
+        os.scandir() already knows) are checked first, so an entry is only 
+        stat'ed if it passed them and a size or time predicate is left. 
+        Excluded directories are pruned, and are never even listed. Symbolic
+        links are never followed.
+        
+        Parameters:
+        name -- (str) the exact name
+        glob -- (str or iterable of str) glob-style patterns, at least one of
+                which has to match the name (or the path relative to this 
+                directory, using forward slashes).
+        regex -- (str or compiled regular expression) a regular expression 
+                 that has to be found in the name
+        type -- (str) "file", "directory", or "symlink"
+        min_size -- (int) the minimum size (in bytes). Size predicates only 
+                    match files.
+        max_size -- (int) the maximum size (in bytes)
+        newer_than -- (datetime.datetime, int, or float) the entry has to 
+                      have been modified after this time (a datetime, or a 
+                      timestamp).
+        older_than -- (datetime.datetime, int, or float) the entry has to 
+                      have been modified before this time
+        max_depth -- (int) how many levels of sub-directories to descend 
+                     into. 0 only searches this directory.
+        exclude -- (str or iterable of str) glob-style patterns of names (or
+                   relative paths) to skip. Excluded directories are not 
+                   descended into.
+        on_error -- (function) if given, it is called with the OSError raised
+                    when a directory can't be scanned. Otherwise, the 
+                    directory is skipped.
+        max_workers -- (int) the amount of worker threads
+        
+        Return Value:
+        (generator) yields a File or Directory object for each match, as soon
+        as it's found (in no particular order).
+        
+        """
+        # Validated here (rather than once the generator is iterated over)
+        try:
+            entries = query.find(
+                self.path, name=name, glob=glob, regex=regex, type=type, 
+                min_size=min_size, max_size=max_size, newer_than=newer_than,
+                older_than=older_than, max_depth=max_depth, exclude=exclude,
+                on_error=on_error, max_workers=max_workers
+            )
+        except ValueError as e:
+            raise InvalidDirectoryValueError(str(e))
+        
+        return self._find(entries)
+    
+    def glob(self, pattern, on_error=None, max_workers=None):
+        """
+        Find everything in the directory tree whose path (relative to this 
+        directory) matches a glob pattern
+        
+        The pattern is compiled once, into a single regular expression. The 
+        traversal starts at the pattern's literal prefix (e.g., at "src/lib"
+        for "src/lib/**/*.py"), directories that can't lead to a match are 
+        pruned, and the sub-directories are scanned in parallel. Symbolic 
+        links are never followed.
+        
+        Parameters:
+        pattern -- (str) the pattern, using forward slashes. Besides *, ?, 
+                   and [seq], it may use ** (any amount of directories) and 
+                   brace sets like {a,b} (either a or b). It can't contain
+                   "..", so it only ever matches inside this directory.
+        on_error -- (function) if given, it is called with the OSError raised
+                    when a directory can't be scanned. Otherwise, the 
+                    directory is skipped.
+        max_workers -- (int) the amount of worker threads
+        
+        Return Value:
+        (generator) yields a File or Directory object for each match, as soon
+        as it's found (in no particular order).
+        
+        """
+        try:
+            groups = globbing.compile_pattern(pattern)
+        except ValueError as e:
+            raise InvalidDirectoryValueError(str(e))
+        
+        return self._glob(groups, on_error, max_workers)
+    
+    def rglob(self, pattern, on_error=None, max_workers=None):
+        """
+        Find everything in the directory tree, however deep, whose name (or 
+        path) matches a glob pattern
+        
+        This is the same as .glob() with "**/" added to the start of the 
+        pattern.
+        
+        Parameters:
+        See .glob().
+        
+        Return Value:
+        (generator) yields File and Directory objects.
+        
+        """
+        return self.glob(
+            "**/" + pattern, on_error=on_error, max_workers=max_workers
+        )
+    
+    def top_k(self, k, key, on_error=None, max_workers=None):
+        """
+        Find the k files in the directory tree with the highest keys
+        
+        The tree is walked in parallel, and the files are streamed through a
+        bounded heap, so only about k files are kept in memory no matter how
+        big the tree is. Only regular files are ranked, and symbolic links 
+        are never followed.
+        
+        Parameters:
+        k -- (int) how many files to find
+        key -- (function) called with the os.stat_result of each file. It 
+               returns what the files are ranked by (the highest first). 
+               It's called from the worker threads.
+        on_error -- (function) if given, it is called with the OSError raised
+                    when a directory can't be scanned. Otherwise, the 
+                    directory is skipped.
+        max_workers -- (int) the amount of worker threads
+        
+        Return Value:
+        (list) contains File objects, the highest ranked first.
+        
+        """
+        entries = ranking.top_k(
+            self.path, k, key, on_error=on_error, max_workers=max_workers
+        )
+        
+        return [
+            File._from_dir_entry(entry, stat_ttl=self._stat_ttl)
+            for entry in entries
+        ]
+    
+    def largest(self, k, on_error=None, max_workers=None):
+        """
+        Find the k largest files in the directory tree (see .top_k())
+        
+        Return Value:
+        (list) contains File objects, the largest first.
+        
+        """
+        return self.top_k(
+            k, _get_size, on_error=on_error, max_workers=max_workers
+        )
+    
+    def oldest(self, k, on_error=None, max_workers=None):
+        """
+        Find the k least recently modified files in the directory tree (see 
+        .top_k())
+        
+        Return Value:
+        (list) contains File objects, the oldest first.
+        
+        """
+        return self.top_k(
+            k, _get_age, on_error=on_error, max_workers=max_workers
+        )
+    
+    def watch(self, recursive=True, debounce=0.05):
+        """
+        Watch the directory for changes
+        
+        Rather than polling, the kernel reports the changes (through inotify)
+        as they happen: entries being created, modified, deleted, or moved.
+        
+        Parameters:
+        recursive -- (bool) whether to watch the sub-directories as well.
+                     Sub-directories that appear later are watched as soon
+                     as they do.
+        debounce -- (int or float) how many seconds to wait for more events
+                    after an event arrives, so that bursts of events can be 
+                    coalesced.
+        
+        Supported Operating Systems:
+        Linux
+        
+        Return Value:
+        (Watcher) an iterable of events, which should be closed when it is no
+        longer needed (it is also a context manager). See 
+        classyfd.watcher.Watcher for more information.
+        
+        """
+        if config._OPERATING_SYSTEM != "linux":
+            raise NotImplementedError(
+                "Directory.watch() is only supported on Linux"
+            )
+        
+        return watcher.Watcher(
+            self.path, recursive=recursive, debounce=debounce
+        )
+    
     def create(self):
         pass         
     
@@ -277,8 +840,53 @@ class Directory(_BaseFileAndDirectoryInterface):
         
         return                    
     
-    def copy(self):
-        pass
+    def copy(self, directory, new_directory_name=None, include=None,
+             exclude=None, max_workers=None):
+        """
+        Copy the directory, and everything in it
+        
+        The directory skeleton is created first, and then the files are copied
+        by a pool of worker threads -- each using the fastest way of copying a
+        file that is available (see File.copy). Symbolic links are re-created
+        rather than followed.
+        
+        Parameters:
+        directory -- (str) the directory to copy the directory into
+        new_directory_name -- (str) if given, the copy will be named this. This
+                              should just be a name, so no paths.
+        include -- (str or iterable of str) if given, only files whose name (or
+                   path relative to this directory) matches one of these 
+                   glob-style patterns are copied.
+        exclude -- (str or iterable of str) files and directories whose name
+                   (or path relative to this directory) matches one of these
+                   glob-style patterns are skipped. Excluded directories are
+                   not descended into.
+        max_workers -- (int) the maximum amount of files copied at the same 
+                       time.
+        
+        Return Value:
+        (Directory) the copy of the directory
+        
+        """
+        new_directory_path = self._get_new_directory_path(
+            directory, new_directory_name=new_directory_name, operation="copy"
+        )
+        
+        real_path = os.path.join(os.path.realpath(self.path), "")
+        real_new_directory_path = os.path.join(
+            os.path.realpath(new_directory_path), ""
+        )
+        if real_new_directory_path.startswith(real_path):
+            raise InvalidDirectoryValueError(
+                "Cannot copy a directory into itself"
+            )
+        
+        tree.copy_tree(
+            self.path, new_directory_path, include=include, exclude=exclude,
+            max_workers=max_workers
+        )
+        
+        return Directory(new_directory_path, stat_ttl=self._stat_ttl)
     
     def move(self):
         pass
@@ -309,40 +917,245 @@ class Directory(_BaseFileAndDirectoryInterface):
         return
  
     
-    def remove(self, empty_only=True):
+    def remove(self, empty_only=True, max_workers=None):
         """
         Remove the directory
         
         Parameters:
         empty_only -- (bool) If True, then the directory is only removed if it
                       is empty. If False, then the directory and any files 
-                      and sub-directories are deleted. 
+                      and sub-directories are deleted (in parallel, by a pool
+                      of worker threads). 
+        max_workers -- (int) the maximum amount of sub-directories removed at
+                       the same time when empty_only is False.
+        
+        Return Value:
+        (int) the amount of entries (files, symbolic links, and directories --
+        including this one) that were removed.
         
         """
         if empty_only:
             os.rmdir(self.path)
+            entries_removed = 1
         else:
             # Delete the directory and anything in it
-            shutil.rmtree(self.path)
+            entries_removed = tree.remove_tree(
+                self.path, max_workers=max_workers
+            )
         
-        return
+        self._invalidate_stat()
+        return entries_removed
     
     # Private Methods
-    def _execute_rename(self, base_directory, new_directory_name=None):
+    @classmethod
+    def _from_dir_entry(cls, entry, stat_ttl=None):
         """
-        Execute a file rename (or move) operation
-
-        This method was created to contain the common code between the .rename()
-        and .move() methods because they share a lot of the same logic.
-
+        Construct the object from an os.DirEntry (as yielded by os.scandir)
+        
+        The path is not checked (as it is by the constructor) since the entry
+        already tells what type it is, and the entry's (cached) metadata is
+        used for the first read of the metadata -- so no extra system calls
+        are made unless the metadata is actually needed. With a stat_ttl, it
+        becomes the object's first snapshot (which expires like any other).
+        Without one, it's only used once, since a snapshot that never expires
+        would be one that was never asked for.
+        
         Parameters:
-        base_directory -- (str) the parent directory of the directory that an
-                          instance of this class refers to.
-        new_directory_name -- (str) the file's name will be renamed to 
-                              this. This should just be the new name of the file
-                              (including any file extensions), so no paths.
-
-
+        entry -- (os.DirEntry) the entry of the directory
+        stat_ttl -- (int or float) see the constructor
+        
+        Return Value:
+        (Directory)
+        
+        """
+        obj = cls.__new__(cls)
+        # The entry's path is the (already normalized) path of the directory 
+        # that was scanned joined with a name, so it is normalized as well.
+        obj._path = entry.path
+        obj._stat_ttl = stat_ttl
+        obj._invalidate_stat()
+        obj._dir_entry = entry
+        return obj
+    
+    @staticmethod
+    def _raise_if_file(path):
+        """
+        Raise a NotADirectoryError if the path refers to an existing file
+        
+        Only one os.stat() call is made, rather than one call to check if the
+        path exists and another to check if it is a file.
+        
+        Parameters:
+        path -- (str) the path to check
+        
+        """
+        try:
+            path_is_a_file = stat.S_ISREG(os.stat(path).st_mode)
+        except (OSError, ValueError):
+            # The path does not exist (or cannot be accessed)
+            path_is_a_file = False
+        
+        if path_is_a_file:
+            raise NotADirectoryError("The path refers to a file")
+        
+        return
+    
+    def _stat_is_valid(self):
+        """
+        Determine if there is a metadata snapshot that has not expired yet
+        
+        Return Value:
+        (bool)
+        
+        """
+        if self._stat_taken_on is None:
+            return False
+        elif self._stat_ttl is None:
+            return True
+        
+        age = time.monotonic() - self._stat_taken_on
+        return bool(age <= self._stat_ttl)
+    
+    def _get_stat_result(self, must_exist=False):
+        """
+        Get the directory's metadata, from the snapshot if it is still valid
+        
+        When there is no valid snapshot, a fresh os.stat() call is made, but
+        its result is not stored.
+        
+        Parameters:
+        must_exist -- (bool) if True, a FileNotFoundError is raised when the
+                      directory does not exist. If False, None is returned 
+                      instead.
+        
+        Return Value:
+        (os.stat_result or None)
+        
+        """
+        if self._dir_entry is not None and self._stat_taken_on is None:
+            if self._stat_ttl is None:
+                stat_result = self._pop_dir_entry_stat()
+            else:
+                self._take_snapshot_from_dir_entry()
+                stat_result = self._stat_result
+        elif self._stat_is_valid():
+            stat_result = self._stat_result
+        else:
+            try:
+                stat_result = os.stat(self.path)
+            except OSError:
+                if must_exist:
+                    raise
+                stat_result = None
+        
+        if stat_result is None and must_exist:
+            raise FileNotFoundError(
+                "No such directory: '{path}'".format(path=self.path)
+            )
+        
+        return stat_result
+    
+    def _create_object_from_dir_entry(self, entry):
+        """
+        Create a File or Directory object from an entry of this directory
+        
+        Parameters:
+        entry -- (os.DirEntry) the entry
+        
+        Return Value:
+        (File or Directory)
+        
+        """
+        try:
+            entry_is_a_directory = entry.is_dir()
+        except OSError:
+            entry_is_a_directory = False
+        
+        if entry_is_a_directory:
+            return Directory._from_dir_entry(entry, stat_ttl=self._stat_ttl)
+        
+        return File._from_dir_entry(entry, stat_ttl=self._stat_ttl)
+    
+    def _take_snapshot_from_dir_entry(self):
+        """Take the first snapshot from the os.DirEntry the object came from"""
+        self._stat_result = self._pop_dir_entry_stat()
+        self._stat_taken_on = time.monotonic()
+        return
+    
+    def _pop_dir_entry_stat(self):
+        """
+        Get the metadata of the os.DirEntry the object came from, and let go
+        of the entry
+        
+        Return Value:
+        (os.stat_result or None) None if the directory doesn't exist (anymore).
+        
+        """
+        entry, self._dir_entry = self._dir_entry, None
+        try:
+            return entry.stat()
+        except OSError:
+            return None
+    
+    def _invalidate_stat(self):
+        """Discard the metadata snapshot (if any)"""
+        self._stat_result = None
+        self._stat_taken_on = None
+        self._dir_entry = None
+        return
+    
+    def _find(self, entries):
+        """
+        Turn the entries found by a query into objects (see .find())
+        
+        Return Value:
+        (generator) yields File and Directory objects.
+        
+        """
+        for entry in entries:
+            yield self._create_object_from_dir_entry(entry)
+        
+        return
+    
+    def _glob(self, groups, on_error, max_workers):
+        """
+        Find the matches of a compiled glob pattern (see .glob())
+        
+        Return Value:
+        (generator) yields File and Directory objects.
+        
+        """
+        matches = globbing.glob(
+            self.path, groups, on_error=on_error, max_workers=max_workers
+        )
+        for match in matches:
+            if isinstance(match, str):
+                # A literal path (one without any wildcards)
+                if os.path.isdir(match):
+                    yield Directory(match, stat_ttl=self._stat_ttl)
+                else:
+                    yield File(match, stat_ttl=self._stat_ttl)
+            else:
+                yield self._create_object_from_dir_entry(match)
+        
+        return
+    
+    def _get_new_directory_path(self, base_directory, new_directory_name=None,
+                                operation="rename"):
+        """
+        Get (and validate) the path the directory will have after it is
+        copied, moved, or renamed
+        
+        Parameters:
+        base_directory -- (str) the directory the directory should be in
+        new_directory_name -- (str) the directory's new name, so no paths. If
+                              not given, the current name is kept.
+        operation -- (str) the name of the operation (used in the error
+                     messages), e.g., "copy" or "rename"
+        
+        Return Value:
+        (str)
+        
         """
         # Initialize these for later (conditional) use
         path_refers_to_file = None
@@ -371,18 +1184,49 @@ class Directory(_BaseFileAndDirectoryInterface):
         if path_already_exists:
             if path_refers_to_file:
                 raise FileExistsError(
-                    "Cannot rename the directory because a file with the chosen"
-                    " name already exists"
+                    "Cannot {operation} the directory because a file with the "
+                    "chosen name already exists".format(operation=operation)
                 )
             elif path_refers_to_directory:
                 raise IsADirectoryError(
-                    "Cannot rename the directory because a directory with the "
-                    "chosen name already exists"
+                    "Cannot {operation} the directory because a directory with "
+                    "the chosen name already exists".format(operation=operation)
                 )        
+        
+        return new_directory_path
+    
+    def _execute_rename(self, base_directory, new_directory_name=None):
+        """
+        Execute a file rename (or move) operation
 
-        else:
-            os.rename(self.path, new_directory_path)           
+        This method was created to contain the common code between the .rename()
+        and .move() methods because they share a lot of the same logic.
+
+        Parameters:
+        base_directory -- (str) the parent directory of the directory that an
+                          instance of this class refers to.
+        new_directory_name -- (str) the file's name will be renamed to 
+                              this. This should just be the new name of the file
+                              (including any file extensions), so no paths.
+
+
+        """
+        new_directory_path = self._get_new_directory_path(
+            base_directory, new_directory_name=new_directory_name
+        )
+        os.rename(self.path, new_directory_path)           
 
         # Update the path
         self.path = new_directory_path        
-        return    
\ No newline at end of file
+        return    
+
+
+# Private Functions
+def _get_size(stat_result):
+    """Get the key that ranks files by size"""
+    return stat_result.st_size
+
+
+def _get_age(stat_result):
+    """Get the key that ranks files by age (the oldest highest)"""
+    return -stat_result.st_mtime_ns
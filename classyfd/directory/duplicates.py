@@ -0,0 +1,178 @@
+"""
+Contains the logic for finding duplicate files in a directory tree
+
+Hashing every file in full is by far the slowest way to find duplicates, so
+files are eliminated in tiers, from the cheapest check to the most expensive
+one:
+
+1. Size: files of a unique size can't have a duplicate (and the sizes come
+   for free from walking the tree).
+2. Partial hash: of the first and last few KB of each file, which tells
+   apart most files of the same size with two small reads.
+3. Full hash: only of the files that are still candidates.
+
+Each tier runs in a pool of worker threads. Hard links to the same file are
+not duplicates (removing one doesn't free any space), so only one path of
+each inode is considered.
+
+"""
+
+import collections
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from . import walker
+from .. import config
+from ..file import hashing, reading
+
+
+# How many bytes are hashed at the start (and at the end) of a file in the
+# partial hash tier
+_PARTIAL_HASH_SIZE = 4096
+
+
+def find_duplicates(path, algorithm="sha256", min_size=1, cache=None,
+                    max_workers=None, on_error=None):
+    """
+    Find the files with the same contents in a directory tree
+
+    Parameters:
+    path -- (str) the path of the directory
+    algorithm -- (str) the name of the hash algorithm used for the full hash
+    min_size -- (int) files smaller than this (in bytes) are ignored
+    cache -- (DigestCache or bool) the cache for the full hashes (see
+             hashing.hash_file())
+    max_workers -- (int) the amount of worker threads
+    on_error -- (function) if given, it is called with the OSError raised
+                when a file (or directory) can't be read, which is then
+                skipped. Otherwise, the error is raised.
+
+    Return Value:
+    (list) contains a list of (entry, stat_result) tuples for each group of
+    duplicates, where entry is the file's os.DirEntry. The groups are sorted
+    by how much space they waste (the most first), and the files in each
+    group are sorted by path.
+
+    """
+    if max_workers is None:
+        max_workers = config._MAX_WORKERS
+
+    # Tier 1: Size
+    files_by_size = collections.defaultdict(list)
+    seen_inodes = set()
+    for entry, stat_result in walker.scan_files(path, on_error, max_workers):
+        if isinstance(stat_result, OSError):
+            _handle_error(stat_result, on_error)
+            continue
+        elif stat_result.st_size < min_size:
+            continue
+
+        inode = (stat_result.st_dev, stat_result.st_ino)
+        if inode in seen_inodes:
+            continue
+        seen_inodes.add(inode)
+
+        files_by_size[stat_result.st_size].append((entry, stat_result))
+
+    groups = [files for files in files_by_size.values() if len(files) > 1]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Tier 2: Partial Hash
+        groups = _split_groups(
+            executor, groups, _get_partial_hash, on_error
+        )
+
+        # Tier 3: Full Hash (unless the partial hash covered the whole file)
+        def get_full_hash(entry, stat_result):
+            if stat_result.st_size <= _PARTIAL_HASH_SIZE * 2:
+                return None
+            return hashing.hash_file(
+                entry.path, algorithm=algorithm, cache=cache
+            )
+
+        groups = _split_groups(executor, groups, get_full_hash, on_error)
+
+    for files in groups:
+        files.sort(key=lambda file_: file_[0].path)
+    groups.sort(
+        key=lambda files: files[0][1].st_size * (len(files) - 1),
+        reverse=True
+    )
+
+    return groups
+
+
+# Private Functions
+def _split_groups(executor, groups, get_key, on_error):
+    """
+    Split groups of candidate files by a key, in parallel
+
+    Parameters:
+    executor -- (Executor) the pool to compute the keys in
+    groups -- (list) lists of (entry, stat_result) tuples
+    get_key -- (function) called with the entry and the stat_result of each
+               file. The files with the same key stay together.
+    on_error -- (function) see find_duplicates()
+
+    Return Value:
+    (list) the new groups (with more than one file).
+
+    """
+    candidates = [file_ for files in groups for file_ in files]
+    keys = executor.map(lambda file_: _get_key_or_error(get_key, file_),
+                        candidates)
+
+    new_groups = collections.defaultdict(list)
+    for group_number, files in enumerate(groups):
+        for file_ in files:
+            key = next(keys)
+            if isinstance(key, OSError):
+                _handle_error(key, on_error)
+                continue
+            new_groups[(group_number, key)].append(file_)
+
+    return [files for files in new_groups.values() if len(files) > 1]
+
+
+def _get_key_or_error(get_key, file_):
+    """
+    Get the key of a file
+
+    Return Value:
+    (object or OSError) the key, or the error raised.
+
+    """
+    try:
+        return get_key(*file_)
+    except OSError as e:
+        return e
+
+
+def _get_partial_hash(entry, stat_result):
+    """
+    Hash the first and the last few KB of a file
+
+    Return Value:
+    (bytes) the digest.
+
+    """
+    size = stat_result.st_size
+    ranges = [(0, min(size, _PARTIAL_HASH_SIZE))]
+    if size > _PARTIAL_HASH_SIZE:
+        tail_offset = max(_PARTIAL_HASH_SIZE, size - _PARTIAL_HASH_SIZE)
+        ranges.append((tail_offset, size - tail_offset))
+
+    hash_ = hashlib.sha256()
+    for view in reading.read_ranges(entry.path, ranges):
+        hash_.update(view)
+
+    return hash_.digest()
+
+
+def _handle_error(error, on_error):
+    """Hand an error to the on_error function (or raise it if there is none)"""
+    if on_error is None:
+        raise error
+
+    on_error(error)
+    return
@@ -0,0 +1,353 @@
+"""
+Contains the glob matching engine behind Directory.glob() and rglob()
+
+A pattern is compiled once: brace sets are expanded, and each expansion is
+split into its literal prefix (the leading path segments without any
+wildcards) and the rest. The traversal starts right at the literal prefix,
+rather than at the top, and the rest is translated into one regular
+expression that is matched against every entry's relative path. Directories
+that can't lead to a match are pruned (only the segments before the first
+"**" can prune), and without a "**" the traversal never goes deeper than the
+pattern does.
+
+Supported syntax:
+*       anything within a path segment
+?       any single character within a path segment
+[seq]   any character in seq ([!seq] for any character not in it)
+**      any amount of path segments (including none). As the last segment,
+        it matches everything below (at least one segment).
+{a,b}   either a or b (brace sets can be nested)
+
+"""
+
+import collections
+import os
+import re
+
+from . import walker
+
+
+# The characters that make a path segment a wildcard
+_WILDCARD_CHARACTERS = frozenset("*?[")
+
+
+def glob(path, groups, on_error=None, max_workers=None):
+    """
+    Find the entries of a directory tree whose relative paths match a
+    (compiled) glob pattern
+
+    Parameters:
+    path -- (str) the path of the directory
+    groups -- (list) the compiled pattern (see compile_pattern())
+    on_error -- (function) see walker.scan_tree()
+    max_workers -- (int) the amount of worker threads
+
+    Return Value:
+    (generator) yields the os.DirEntry of each match, as soon as it's found
+    (in no particular order). Literal paths (patterns without any wildcards)
+    are yielded as str, since they aren't scanned.
+
+    """
+    seen_paths = set() if len(groups) > 1 else None
+    for prefix, matcher in groups:
+        start_path = os.path.join(path, *prefix) if prefix else path
+        if matcher is None:
+            matches = _find_literal(start_path)
+        elif os.path.isdir(start_path):
+            matches = _find_matches(
+                start_path, matcher, on_error, max_workers
+            )
+        else:
+            continue
+
+        for match in matches:
+            if seen_paths is not None:
+                match_path = match if isinstance(match, str) else match.path
+                if match_path in seen_paths:
+                    continue
+                seen_paths.add(match_path)
+            yield match
+
+    return
+
+
+def compile_pattern(pattern):
+    """
+    Compile a glob pattern
+
+    Parameters:
+    pattern -- (str) the pattern (see the module's docstring), relative to
+               the directory it's matched in, using forward slashes. It can't
+               contain "..".
+
+    Return Value:
+    (list) contains a (prefix, matcher) tuple for each literal prefix (a
+    tuple of path segments), where matcher is the _Matcher for the rest of
+    the patterns with that prefix. matcher is None for a pattern that is
+    literal as a whole.
+
+    """
+    if not pattern:
+        raise ValueError("The pattern should not be empty")
+
+    pattern = pattern.replace(os.sep, "/")
+    if pattern.startswith("/") or os.path.isabs(pattern):
+        raise ValueError("The pattern should be relative")
+
+    rests_by_prefix = collections.OrderedDict()
+    for expanded_pattern in _expand_braces(pattern):
+        segments = [
+            segment for segment in expanded_pattern.split("/")
+            if segment and segment != "."
+        ]
+        if ".." in segments:
+            # It could match outside of the directory
+            raise ValueError("The pattern should not contain \"..\"")
+        # Consecutive "**" segments are the same as one
+        segments = [
+            segment for i, segment in enumerate(segments)
+            if not (segment == "**" and i and segments[i - 1] == "**")
+        ]
+
+        prefix_length = 0
+        while prefix_length < len(segments):
+            segment = segments[prefix_length]
+            if segment == "**" or _WILDCARD_CHARACTERS & set(segment):
+                break
+            prefix_length += 1
+
+        prefix = tuple(segments[:prefix_length])
+        rests_by_prefix.setdefault(prefix, []).append(
+            segments[prefix_length:]
+        )
+
+    groups = []
+    for prefix, rests in rests_by_prefix.items():
+        wildcard_rests = [rest for rest in rests if rest]
+        if len(wildcard_rests) < len(rests):
+            groups.append((prefix, None))
+        if wildcard_rests:
+            try:
+                groups.append((prefix, _Matcher(wildcard_rests)))
+            except re.error as e:
+                # E.g., a character range like [z-a]
+                raise ValueError(
+                    "The pattern is invalid: {error}".format(error=e)
+                )
+
+    return groups
+
+
+# Private Functions
+def _find_literal(path):
+    """Yield a literal path, if it exists"""
+    if os.path.lexists(path):
+        yield path
+
+    return
+
+
+def _find_matches(start_path, matcher, on_error, max_workers):
+    """
+    Find the matches of a matcher below a directory
+
+    Return Value:
+    (generator) yields os.DirEntry objects.
+
+    """
+    prefix_length = len(os.path.join(start_path, ""))
+
+    def relative_path_of(entry):
+        return entry.path[prefix_length:].replace(os.sep, "/")
+
+    def prune(entry, depth):
+        return not matcher.can_contain_matches(relative_path_of(entry), depth)
+
+    def process(directory_path, depth, entry, entries):
+        return [
+            sub_entry for sub_entry in entries
+            if matcher.matches(relative_path_of(sub_entry))
+        ]
+
+    results = walker.scan_tree(
+        start_path, max_depth=matcher.max_depth, prune=prune,
+        process=process, on_error=on_error, max_workers=max_workers
+    )
+    for _, _, _, found_entries in results:
+        for entry in found_entries:
+            yield entry
+
+    return
+
+
+def _expand_braces(pattern):
+    """
+    Expand the brace sets of a pattern
+
+    Return Value:
+    (list) the patterns (a pattern without brace sets is returned as is, and
+    so are unbalanced braces).
+
+    """
+    depth = 0
+    start = None
+    for i, character in enumerate(pattern):
+        if character == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif character == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                expanded_patterns = []
+                before, after = pattern[:start], pattern[i + 1:]
+                for option in _split_options(pattern[start + 1:i]):
+                    expanded_patterns.extend(
+                        _expand_braces(before + option + after)
+                    )
+                return expanded_patterns
+
+    return [pattern]
+
+
+def _split_options(brace_set):
+    """Split the contents of a brace set on its top-level commas"""
+    options = []
+    depth = 0
+    start = 0
+    for i, character in enumerate(brace_set):
+        if character == "{":
+            depth += 1
+        elif character == "}":
+            depth -= 1
+        elif character == "," and depth == 0:
+            options.append(brace_set[start:i])
+            start = i + 1
+    options.append(brace_set[start:])
+
+    return options
+
+
+def _translate_segment(segment):
+    """
+    Translate a path segment (other than "**") into a regular expression
+
+    Return Value:
+    (str)
+
+    """
+    parts = []
+    i = 0
+    while i < len(segment):
+        character = segment[i]
+        if character == "*":
+            parts.append("[^/]*")
+        elif character == "?":
+            parts.append("[^/]")
+        elif character == "[":
+            end = i + 1
+            if end < len(segment) and segment[end] in "!^":
+                end += 1
+            if end < len(segment) and segment[end] == "]":
+                end += 1
+            end = segment.find("]", end)
+            if end == -1:
+                parts.append(re.escape(character))
+            else:
+                characters = segment[i + 1:end].replace("\\", "\\\\")
+                if characters[:1] in ("!", "^"):
+                    characters = "^" + characters[1:]
+                parts.append("(?:(?!/)[{characters}])".format(
+                    characters=characters
+                ))
+                i = end
+        else:
+            parts.append(re.escape(character))
+        i += 1
+
+    return "".join(parts)
+
+
+def _translate_segments(segments):
+    """
+    Translate path segments into a regular expression
+
+    Return Value:
+    (str)
+
+    """
+    parts = []
+    for i, segment in enumerate(segments):
+        is_last = bool(i == len(segments) - 1)
+        if segment == "**":
+            parts.append("(?:[^/]+/)*[^/]+" if is_last else "(?:[^/]+/)*")
+        else:
+            separator = "" if is_last else "/"
+            parts.append(_translate_segment(segment) + separator)
+
+    return "".join(parts)
+
+
+# Private Classes
+class _Matcher:
+    """Matches relative paths against the (wildcard) rests of patterns"""
+    def __init__(self, rests):
+        """
+        Construct the object
+
+        Parameters:
+        rests -- (list) the rest of each pattern (after the literal prefix),
+                 as lists of path segments
+
+        """
+        self._regex = re.compile(
+            "|".join(
+                "(?:{regex})".format(regex=_translate_segments(rest))
+                for rest in rests
+            )
+        )
+
+        # Without a "**", nothing deeper than the pattern can match
+        if any("**" in rest for rest in rests):
+            self.max_depth = None
+        else:
+            self.max_depth = max(len(rest) for rest in rests) - 1
+
+        # The directories at each depth (up to the first "**") that can lead
+        # to a match. None means any directory can.
+        self._directory_regexes = []
+        for depth in range(1, max(len(rest) for rest in rests)):
+            regexes = []
+            for rest in rests:
+                leading_segments = rest[:depth]
+                if "**" in leading_segments:
+                    regexes = None
+                    break
+                elif len(rest) > depth:
+                    regexes.append(_translate_segments(leading_segments))
+
+            if regexes is None:
+                break
+
+            self._directory_regexes.append(
+                re.compile(
+                    "|".join(
+                        "(?:{regex})".format(regex=regex) for regex in regexes
+                    ) or "(?!)"
+                )
+            )
+
+        return
+
+    def matches(self, relative_path):
+        """Determine if a relative path matches any of the patterns"""
+        return self._regex.fullmatch(relative_path) is not None
+
+    def can_contain_matches(self, relative_path, depth):
+        """Determine if a directory (at a depth) can lead to a match"""
+        if depth > len(self._directory_regexes):
+            return True
+
+        regex = self._directory_regexes[depth - 1]
+
+        return regex.fullmatch(relative_path) is not None
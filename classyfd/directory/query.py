@@ -0,0 +1,191 @@
+"""
+Contains the query engine behind Directory.find()
+
+The predicates of a query are compiled once, into a single matching function
+that is run by the walker's worker threads on every entry. The predicates
+that only need what os.scandir() already knows (the name and the type) are
+evaluated first, and an entry is only stat'ed when it passed all of them and
+a predicate on its size or modification time is left. Excluded directories
+(and everything deeper than max_depth) are pruned, so they are never even
+listed.
+
+"""
+
+import datetime
+import os
+import re
+import stat
+
+from . import tree, walker
+
+
+# Maps the types that can be searched for to functions that check an
+# os.DirEntry's type (symbolic links are never followed).
+TYPES = {
+    "file": lambda entry: entry.is_file(follow_symlinks=False),
+    "directory": lambda entry: entry.is_dir(follow_symlinks=False),
+    "symlink": lambda entry: entry.is_symlink(),
+}
+
+
+def find(path, name=None, glob=None, regex=None, type=None, min_size=None,
+         max_size=None, newer_than=None, older_than=None, max_depth=None,
+         exclude=None, on_error=None, max_workers=None):
+    """
+    Find the entries of a directory tree that match every given predicate
+
+    Parameters:
+    See Directory.find().
+
+    Return Value:
+    (generator) yields the os.DirEntry of each match, as soon as it's found
+    (in no particular order). The predicates are validated (and a
+    ValueError raised) right away, rather than once it's iterated over.
+
+    """
+    matches = compile_predicates(
+        name=name, glob=glob, regex=regex, type=type, min_size=min_size,
+        max_size=max_size, newer_than=newer_than, older_than=older_than
+    )
+    is_excluded = tree._compile_patterns(exclude, default=False)
+
+    return _find(path, matches, is_excluded, max_depth, on_error, max_workers)
+
+
+def compile_predicates(name=None, glob=None, regex=None, type=None,
+                       min_size=None, max_size=None, newer_than=None,
+                       older_than=None):
+    """
+    Compile the predicates of a query into a single matching function
+
+    Parameters:
+    See Directory.find().
+
+    Return Value:
+    (function) takes an os.DirEntry and its path relative to the top
+    directory, and returns whether the entry matches every predicate.
+
+    """
+    if type is not None and type not in TYPES:
+        raise ValueError(
+            "type should be one of: {types}"
+            .format(types=", ".join(sorted(TYPES)))
+        )
+
+    # The predicates that only need the entry, cheapest first
+    entry_predicates = []
+    if name is not None:
+        entry_predicates.append(
+            lambda entry, relative_path: entry.name == name
+        )
+    if type is not None:
+        is_type = TYPES[type]
+        entry_predicates.append(lambda entry, relative_path: is_type(entry))
+    if glob is not None:
+        matches_glob = tree._compile_patterns(glob, default=True)
+        entry_predicates.append(
+            lambda entry, relative_path: matches_glob(entry.name, relative_path)
+        )
+    if regex is not None:
+        try:
+            search = re.compile(regex).search
+        except re.error as e:
+            raise ValueError(
+                "The regular expression is invalid: {error}".format(error=e)
+            )
+        entry_predicates.append(
+            lambda entry, relative_path: search(entry.name) is not None
+        )
+
+    # The predicates that need the entry's stat result
+    stat_predicates = []
+    if min_size is not None or max_size is not None:
+        stat_predicates.append(
+            lambda stat_result: bool(
+                stat.S_ISREG(stat_result.st_mode) and
+                (min_size is None or stat_result.st_size >= min_size) and
+                (max_size is None or stat_result.st_size <= max_size)
+            )
+        )
+    if newer_than is not None:
+        newer_than_timestamp = _to_timestamp(newer_than)
+        stat_predicates.append(
+            lambda stat_result: stat_result.st_mtime > newer_than_timestamp
+        )
+    if older_than is not None:
+        older_than_timestamp = _to_timestamp(older_than)
+        stat_predicates.append(
+            lambda stat_result: stat_result.st_mtime < older_than_timestamp
+        )
+
+    def matches(entry, relative_path):
+        try:
+            for predicate in entry_predicates:
+                if not predicate(entry, relative_path):
+                    return False
+
+            if stat_predicates:
+                stat_result = entry.stat(follow_symlinks=False)
+                for predicate in stat_predicates:
+                    if not predicate(stat_result):
+                        return False
+        except OSError:
+            # Removed in the meantime (or unreadable)
+            return False
+
+        return True
+
+    return matches
+
+
+# Private Functions
+def _find(path, matches, is_excluded, max_depth, on_error, max_workers):
+    """
+    Find the entries of a directory tree that match (see find())
+
+    Return Value:
+    (generator) yields os.DirEntry objects.
+
+    """
+    prefix_length = len(os.path.join(path, ""))
+
+    def prune(entry, depth):
+        return is_excluded(entry.name, entry.path[prefix_length:])
+
+    def process(directory_path, depth, entry, entries):
+        found_entries = []
+        for sub_entry in entries:
+            relative_path = sub_entry.path[prefix_length:]
+            if is_excluded(sub_entry.name, relative_path):
+                continue
+            elif matches(sub_entry, relative_path):
+                found_entries.append(sub_entry)
+
+        return found_entries
+
+    results = walker.scan_tree(
+        path, max_depth=max_depth, prune=prune, process=process,
+        on_error=on_error, max_workers=max_workers
+    )
+    for _, _, _, found_entries in results:
+        for entry in found_entries:
+            yield entry
+
+    return
+
+
+def _to_timestamp(time_):
+    """
+    Convert a point in time to a timestamp
+
+    Parameters:
+    time_ -- (datetime.datetime, int, or float) a datetime, or a timestamp
+
+    Return Value:
+    (float)
+
+    """
+    if isinstance(time_, datetime.datetime):
+        return time_.timestamp()
+
+    return float(time_)
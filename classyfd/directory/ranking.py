@@ -0,0 +1,68 @@
+"""
+Contains the logic for finding the top files of a directory tree
+
+The tree is walked in parallel, and each worker thread ranks the files of
+the directories it scans (keeping only the best k of each directory). The
+consumer streams those through a bounded heap of size k, so memory stays
+O(k) no matter how big the tree is.
+
+"""
+
+import heapq
+
+from . import walker
+
+
+def top_k(path, k, key, on_error=None, max_workers=None):
+    """
+    Find the k files of a directory tree with the highest keys
+
+    Only regular files are ranked, and symbolic links are never followed.
+
+    Parameters:
+    path -- (str) the path of the directory
+    k -- (int) how many files to find
+    key -- (function) called (from the worker threads) with the
+           os.stat_result of each file. It returns what the files are ranked
+           by.
+    on_error -- (function) see walker.scan_tree()
+    max_workers -- (int) the amount of worker threads
+
+    Return Value:
+    (list) the os.DirEntry objects of the files, the highest key first. Files
+    with the same key are ranked by path.
+
+    """
+    if k <= 0:
+        return []
+
+    def process(directory_path, depth, entry, entries):
+        ranked_files = []
+        for sub_entry in entries:
+            try:
+                if not sub_entry.is_file(follow_symlinks=False):
+                    continue
+                value = key(sub_entry.stat(follow_symlinks=False))
+            except OSError:
+                # Removed in the meantime (or unreadable)
+                continue
+            ranked_files.append((value, sub_entry.path, sub_entry))
+
+        # The paths are unique, so the entries themselves are never compared
+        return heapq.nlargest(k, ranked_files)
+
+    # A min-heap, so the lowest ranked of the best k so far is at the top
+    heap = []
+    results = walker.scan_tree(
+        path, process=process, on_error=on_error, max_workers=max_workers
+    )
+    for _, _, _, ranked_files in results:
+        for ranked_file in ranked_files:
+            if len(heap) < k:
+                heapq.heappush(heap, ranked_file)
+            elif ranked_file[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, ranked_file)
+
+    heap.sort(reverse=True)
+
+    return [entry for _, _, entry in heap]
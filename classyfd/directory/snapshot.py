@@ -0,0 +1,594 @@
+"""
+Contains the logic for persistent snapshots of directory trees
+
+A snapshot records the path, size, modification time, inode, and mode of
+every entry in a directory tree in an on-disk SQLite index. A later rescan
+compares the tree with its snapshot without walking all of it again: a
+directory's listing only changes when its modification time does, so only
+the directories whose modification time changed are listed (and their
+entries stat'ed). The other directories are just stat'ed themselves, to find
+out if they changed.
+
+Modifying a file's contents in place does NOT change its directory's
+modification time, so a rescan won't notice such changes unless it is told
+to be thorough (which stats every file, but still lists only the changed
+directories).
+
+"""
+
+import os
+import sqlite3
+import stat
+from concurrent.futures import ThreadPoolExecutor
+
+from . import walker
+from .. import config, utils
+
+
+# The amount of rows inserted into the index at a time
+_BATCH_SIZE = 10000
+
+
+class Snapshot:
+    """A persistent snapshot (on-disk index) of a directory tree"""
+    def __init__(self, index_path):
+        """
+        Open an existing snapshot
+
+        Snapshots are created with Directory.snapshot().
+
+        Parameters:
+        index_path -- (str) the path of the snapshot's index file
+
+        """
+        if not os.path.isfile(index_path):
+            raise FileNotFoundError(
+                "No such snapshot: '{path}'".format(path=index_path)
+            )
+
+        self._index_path = os.path.abspath(index_path)
+        self._connection = sqlite3.connect(self._index_path)
+        self._root = self._get_metadata("root")
+        return
+
+    # Special Methods
+    def __repr__(self):
+        """Get the official string representation"""
+        repr_ = (
+            "{class_name}(\"{path}\")"
+            .format(class_name=Snapshot.__name__, path=self.index_path)
+        )
+        return repr_
+
+    def __len__(self):
+        """Get the amount of entries in the snapshot (including the root)"""
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM entries"
+        ).fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return
+
+    # Properties
+    @property
+    def index_path(self):
+        """
+        Get the path of the snapshot's index file
+
+        Return Value:
+        (str)
+
+        """
+        return self._index_path
+
+    @property
+    def root(self):
+        """
+        Get the path of the directory the snapshot is of
+
+        Return Value:
+        (str)
+
+        """
+        return self._root
+
+    # Regular Methods
+    def get(self, relative_path):
+        """
+        Get the record of an entry
+
+        Parameters:
+        relative_path -- (str) the entry's path relative to the root, using
+                         forward slashes. The root itself is "".
+
+        Return Value:
+        (dict or None) the keys are path (the relative path), is_dir, size,
+        mtime_ns, inode, and mode. None is returned if there is no such
+        entry.
+
+        """
+        parent, name = _split(relative_path)
+        row = self._connection.execute(
+            "SELECT parent, name, is_dir, size, mtime_ns, inode, mode "
+            "FROM entries WHERE parent = ? AND name = ?",
+            (parent, name)
+        ).fetchone()
+
+        return None if row is None else _row_to_record(row)
+
+    def get_children(self, relative_path):
+        """
+        Get the records of the entries directly inside a directory
+
+        Parameters:
+        relative_path -- (str) the directory's path relative to the root
+
+        Return Value:
+        (dict) maps the names of the entries to their records (see .get()).
+
+        """
+        rows = self._connection.execute(
+            "SELECT parent, name, is_dir, size, mtime_ns, inode, mode "
+            "FROM entries WHERE parent = ? AND name != ''",
+            (relative_path,)
+        )
+
+        return {row[1]: _row_to_record(row) for row in rows}
+
+    def iter_descendants(self, relative_path):
+        """
+        Iterate over the records of everything inside a directory, however
+        deep
+
+        Parameters:
+        relative_path -- (str) the directory's path relative to the root
+
+        Return Value:
+        (generator) yields records (see .get()).
+
+        """
+        if relative_path:
+            prefix = relative_path + "/"
+            # "0" is the character right after "/", so this range covers all
+            # of the paths that start with the prefix.
+            rows = self._connection.execute(
+                "SELECT parent, name, is_dir, size, mtime_ns, inode, mode "
+                "FROM entries WHERE parent = ? OR (parent >= ? AND parent < ?)",
+                (relative_path, prefix, relative_path + "0")
+            )
+        else:
+            rows = self._connection.execute(
+                "SELECT parent, name, is_dir, size, mtime_ns, inode, mode "
+                "FROM entries WHERE name != ''"
+            )
+
+        for row in rows:
+            yield _row_to_record(row)
+
+        return
+
+    def close(self):
+        """Close the snapshot's index file"""
+        self._connection.close()
+        return
+
+    # Private Methods
+    def _get_metadata(self, key):
+        """Get a value from the metadata table"""
+        row = self._connection.execute(
+            "SELECT value FROM metadata WHERE key = ?", (key,)
+        ).fetchone()
+
+        return None if row is None else row[0]
+
+    def _apply_changes(self, added, removed, modified):
+        """
+        Update the index with the changes found by a rescan
+
+        Parameters:
+        added -- (list) the records of the added entries
+        removed -- (list) the records of the removed entries
+        modified -- (list) the (new) records of the modified entries
+
+        """
+        with self._connection:
+            self._connection.executemany(
+                "DELETE FROM entries WHERE parent = ? AND name = ?",
+                (_split(record["path"]) for record in removed)
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (_record_to_row(record) for record in added + modified)
+            )
+
+        return
+
+
+def create_snapshot(root, index_path, max_workers=None):
+    """
+    Snapshot a directory tree into a new index file
+
+    Parameters:
+    root -- (str) the path of the directory
+    index_path -- (str) the path of the index file to create. It should not
+                  exist yet. The index is built in a temporary file next to
+                  it, and only renamed into place once it's complete, so a
+                  failed snapshot doesn't leave a partial index behind.
+    max_workers -- (int) the amount of worker threads
+
+    Return Value:
+    (Snapshot)
+
+    """
+    if os.path.exists(index_path):
+        raise FileExistsError(
+            "Cannot create the snapshot because the index file already exists"
+        )
+
+    root_record = _make_record("", os.stat(root))
+    if not root_record["is_dir"]:
+        raise NotADirectoryError("The path refers to a file")
+
+    index_directory = os.path.dirname(os.path.abspath(index_path))
+    temporary_path = os.path.join(
+        index_directory, utils.get_random_file_name(index_directory)
+    )
+    try:
+        _build_index(root, root_record, temporary_path, max_workers)
+        os.replace(temporary_path, index_path)
+    except BaseException:
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+        raise
+
+    return Snapshot(index_path)
+
+
+def rescan_snapshot(snapshot, update=False, thorough=False, max_workers=None):
+    """
+    Find what changed in a directory tree since it was snapshotted
+
+    Only the directories whose modification time changed are listed (see the
+    module's docstring). The directories are visited a level at a time, and
+    the directories of each level are visited in parallel.
+
+    Parameters:
+    snapshot -- (Snapshot) the snapshot to compare the tree with
+    update -- (bool) if True, then the snapshot is updated to match the tree,
+              so that the next rescan only finds the changes made after this
+              one.
+    thorough -- (bool) if True, then the files of unchanged directories are
+                stat'ed as well, so that files modified in place are found.
+    max_workers -- (int) the amount of worker threads
+
+    Return Value:
+    (dict) the keys are added, removed, and modified. Each value is a sorted
+    list of the absolute paths of those entries.
+
+    """
+    if max_workers is None:
+        max_workers = config._MAX_WORKERS
+
+    root = snapshot.root
+    added = []
+    removed = []
+    modified = []
+
+    level = [snapshot.get("")]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while level:
+            jobs = [
+                (record, snapshot.get_children(record["path"]))
+                for record in level
+            ]
+            results = executor.map(
+                lambda job: _visit(root, job[0], job[1], thorough), jobs
+            )
+
+            level = []
+            for changes in results:
+                added.extend(changes["added"])
+                modified.extend(changes["modified"])
+                for record in changes["removed"]:
+                    removed.append(record)
+                    if record["is_dir"]:
+                        removed.extend(
+                            snapshot.iter_descendants(record["path"])
+                        )
+                level.extend(changes["directories"])
+
+    if update:
+        snapshot._apply_changes(added, removed, modified)
+
+    def to_paths(records):
+        return sorted(
+            _to_absolute_path(root, record["path"]) for record in records
+        )
+
+    return {
+        "added": to_paths(added), "removed": to_paths(removed),
+        "modified": to_paths(modified)
+    }
+
+
+# Private Functions
+def _build_index(root, root_record, index_path, max_workers):
+    """
+    Snapshot a directory tree into an index file (see create_snapshot())
+
+    Parameters:
+    root -- (str) the path of the directory
+    root_record -- (dict) the record of the directory itself
+    index_path -- (str) the path of the index file to build
+    max_workers -- (int) the amount of worker threads
+
+    Return Value:
+    None
+
+    """
+    connection = sqlite3.connect(index_path)
+    try:
+        with connection:
+            connection.executescript(
+                "CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT);"
+                # The primary key keeps the entries of each directory together,
+                # so there's no need for a separate index (or row IDs).
+                "CREATE TABLE entries ("
+                "    parent TEXT NOT NULL, name TEXT NOT NULL, "
+                "    is_dir INTEGER NOT NULL, size INTEGER NOT NULL, "
+                "    mtime_ns INTEGER NOT NULL, inode INTEGER NOT NULL, "
+                "    mode INTEGER NOT NULL, "
+                "    PRIMARY KEY (parent, name)"
+                ") WITHOUT ROWID;"
+            )
+            connection.execute(
+                "INSERT INTO metadata VALUES ('root', ?)", (root,)
+            )
+            connection.execute(
+                "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                _record_to_row(root_record)
+            )
+
+            def process(directory_path, depth, entry, entries):
+                return _make_records(root, directory_path, entries)
+
+            batch = []
+            results = walker.scan_tree(
+                root, process=process, max_workers=max_workers
+            )
+            for _, _, _, records in results:
+                batch.extend(_record_to_row(record) for record in records)
+                if len(batch) >= _BATCH_SIZE:
+                    connection.executemany(
+                        "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        batch
+                    )
+                    batch = []
+
+            connection.executemany(
+                "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", batch
+            )
+    finally:
+        connection.close()
+
+    return
+
+
+def _visit(root, old_record, old_children, thorough):
+    """
+    Compare a single directory with its snapshot
+
+    Parameters:
+    root -- (str) the path of the top directory
+    old_record -- (dict) the directory's record in the snapshot
+    old_children -- (dict) the records of the directory's entries in the
+                    snapshot
+    thorough -- (bool) see rescan_snapshot()
+
+    Return Value:
+    (dict) the keys are added, removed, and modified (lists of records), and
+    directories (the old records of the sub-directories to visit next).
+
+    """
+    changes = {"added": [], "removed": [], "modified": [], "directories": []}
+    relative_path = old_record["path"]
+    path = _to_absolute_path(root, relative_path)
+
+    # The top directory was stat'ed (not lstat'ed) when it was snapshotted
+    stat_function = os.lstat if relative_path else os.stat
+    try:
+        new_record = _make_record(relative_path, stat_function(path))
+    except FileNotFoundError:
+        if relative_path:
+            # Removed since its parent was listed. The next rescan will
+            # notice it through its parent.
+            return changes
+        raise
+
+    if _records_differ(old_record, new_record):
+        changes["modified"].append(new_record)
+
+    if new_record["mtime_ns"] == old_record["mtime_ns"]:
+        # The listing is unchanged, so the sub-directories are already known
+        for name, child_record in old_children.items():
+            if child_record["is_dir"]:
+                changes["directories"].append(child_record)
+            elif thorough:
+                _compare_child(root, child_record, changes)
+
+        return changes
+
+    try:
+        with os.scandir(path) as entries:
+            new_children = {entry.name: entry for entry in entries}
+    except (FileNotFoundError, NotADirectoryError):
+        return changes
+
+    for name, child_record in old_children.items():
+        if name not in new_children:
+            changes["removed"].append(child_record)
+
+    for name, entry in new_children.items():
+        try:
+            child_record = _make_record(
+                _join(relative_path, name), entry.stat(follow_symlinks=False)
+            )
+        except FileNotFoundError:
+            continue
+
+        old_child_record = old_children.get(name)
+        if old_child_record is None:
+            _add_subtree(root, child_record, changes)
+        elif old_child_record["is_dir"] != child_record["is_dir"]:
+            # It was replaced by something of another type
+            changes["removed"].append(old_child_record)
+            _add_subtree(root, child_record, changes)
+        elif child_record["is_dir"]:
+            # The sub-directory compares its own record when it is visited
+            changes["directories"].append(old_child_record)
+        elif _records_differ(old_child_record, child_record):
+            changes["modified"].append(child_record)
+
+    return changes
+
+
+def _compare_child(root, old_record, changes):
+    """Compare a file that wasn't listed again with its snapshot"""
+    path = _to_absolute_path(root, old_record["path"])
+    try:
+        new_record = _make_record(old_record["path"], os.lstat(path))
+    except FileNotFoundError:
+        changes["removed"].append(old_record)
+        return
+
+    if _records_differ(old_record, new_record):
+        changes["modified"].append(new_record)
+
+    return
+
+
+def _add_subtree(root, record, changes):
+    """Record an added entry (and everything in it, if it's a directory)"""
+    changes["added"].append(record)
+    if not record["is_dir"]:
+        return
+
+    pending_paths = [record["path"]]
+    while pending_paths:
+        relative_path = pending_paths.pop()
+        directory_path = _to_absolute_path(root, relative_path)
+        try:
+            with os.scandir(directory_path) as entries:
+                records = _make_records(root, directory_path, entries)
+        except OSError:
+            continue
+
+        for child_record in records:
+            changes["added"].append(child_record)
+            if child_record["is_dir"]:
+                pending_paths.append(child_record["path"])
+
+    return
+
+
+def _make_records(root, directory_path, entries):
+    """Make the records of a directory's entries"""
+    relative_directory = os.path.relpath(directory_path, root)
+    if relative_directory == os.curdir:
+        relative_directory = ""
+    relative_directory = relative_directory.replace(os.sep, "/")
+
+    records = []
+    for entry in entries:
+        try:
+            stat_result = entry.stat(follow_symlinks=False)
+        except FileNotFoundError:
+            continue
+
+        records.append(
+            _make_record(_join(relative_directory, entry.name), stat_result)
+        )
+
+    return records
+
+
+def _make_record(relative_path, stat_result):
+    """Make the record of an entry from its stat result"""
+    record = {
+        "path": relative_path,
+        "is_dir": stat.S_ISDIR(stat_result.st_mode),
+        "size": stat_result.st_size,
+        "mtime_ns": stat_result.st_mtime_ns,
+        "inode": stat_result.st_ino,
+        "mode": stat_result.st_mode
+    }
+    return record
+
+
+def _records_differ(old_record, new_record):
+    """Determine if an entry changed"""
+    keys = ("size", "mtime_ns", "inode", "mode")
+    return any(old_record[key] != new_record[key] for key in keys)
+
+
+def _record_to_row(record):
+    """Convert a record into a row of the entries table"""
+    parent, name = _split(record["path"])
+    # SQLite integers are signed 64-bit, but inode numbers are unsigned
+    inode = record["inode"]
+    if inode >= 2 ** 63:
+        inode -= 2 ** 64
+
+    row = (
+        parent, name, int(record["is_dir"]), record["size"],
+        record["mtime_ns"], inode, record["mode"]
+    )
+    return row
+
+
+def _row_to_record(row):
+    """Convert a row of the entries table into a record"""
+    parent, name, is_dir, size, mtime_ns, inode, mode = row
+    if inode < 0:
+        inode += 2 ** 64
+
+    record = {
+        "path": _join(parent, name),
+        "is_dir": bool(is_dir),
+        "size": size,
+        "mtime_ns": mtime_ns,
+        "inode": inode,
+        "mode": mode
+    }
+    return record
+
+
+def _join(relative_directory, name):
+    """Join a relative directory path and a name"""
+    if not relative_directory:
+        return name
+
+    return relative_directory + "/" + name
+
+
+def _split(relative_path):
+    """Split a relative path into its parent and its name"""
+    if "/" not in relative_path:
+        return ("", relative_path)
+
+    parent, name = relative_path.rsplit("/", 1)
+    return (parent, name)
+
+
+def _to_absolute_path(root, relative_path):
+    """Convert a relative path (with forward slashes) to an absolute path"""
+    if not relative_path:
+        return root
+
+    return os.path.join(root, *relative_path.split("/"))
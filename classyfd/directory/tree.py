@@ -0,0 +1,494 @@
+"""
+Contains the logic for operations on whole directory trees
+
+Copying or removing a tree of many small files is bound by the latency of
+each file operation rather than by bandwidth, so the work is spread over a
+bounded pool of worker threads (file system calls release the GIL).
+
+"""
+
+import fnmatch
+import os
+import re
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .. import config
+from ..file import transfer
+
+
+# The flags used to open directories for dir_fd-relative operations. Symbolic
+# links are never followed.
+_DIRECTORY_FLAGS = (
+    os.O_RDONLY | getattr(os, "O_DIRECTORY", 0) | getattr(os, "O_NOFOLLOW", 0)
+)
+
+# How many levels deep a tree is split into subtrees (to be removed in
+# parallel) at most.
+_MAX_SPLIT_DEPTH = 3
+
+def copy_tree(source, destination, include=None, exclude=None,
+              max_workers=None):
+    """
+    Copy a directory tree
+
+    The directory skeleton is created first (while walking the tree with
+    os.scandir), and the files are copied by a pool of worker threads as soon
+    as their directory exists. Symbolic links are re-created, not followed.
+
+    Parameters:
+    source -- (str) the path of the directory to copy
+    destination -- (str) the path to copy the directory to. It should not
+                   exist yet, and it can't be inside the source directory. If
+                   the copy fails, then everything it created is removed.
+    include -- (str or iterable of str) if given, only files whose name (or
+               path relative to the source directory) matches one of these
+               glob-style patterns are copied. Directories are always copied.
+    exclude -- (str or iterable of str) files and directories whose name (or
+               path relative to the source directory) matches one of these
+               glob-style patterns are skipped. Excluded directories are not
+               descended into at all.
+    max_workers -- (int) the maximum amount of files copied at the same time
+
+    Return Value:
+    (int) the amount of files copied.
+
+    """
+    is_included = _compile_patterns(include, default=True)
+    is_excluded = _compile_patterns(exclude, default=False)
+    if max_workers is None:
+        max_workers = config._MAX_WORKERS
+
+    # The walk would find the copy as it is being made (and never end)
+    real_source = os.path.join(os.path.realpath(source), "")
+    real_destination = os.path.join(os.path.realpath(destination), "")
+    if real_destination.startswith(real_source):
+        raise ValueError("Cannot copy a directory into itself")
+
+    os.mkdir(destination)
+    # Directory modes are applied last, so that read-only directories can
+    # still be filled.
+    directory_modes = [(destination, stat.S_IMODE(os.stat(source).st_mode))]
+    copier = _BoundedExecutor(max_workers)
+
+    try:
+        try:
+            pending_directories = [(source, destination, "")]
+            while pending_directories:
+                source_directory, destination_directory, relative_directory = (
+                    pending_directories.pop()
+                )
+                _copy_entries(
+                    source_directory, destination_directory,
+                    relative_directory, is_included, is_excluded,
+                    directory_modes, pending_directories, copier
+                )
+        except BaseException:
+            # The copies in flight are waited for, but it's this error that
+            # is raised (not one of theirs)
+            copier.shutdown(raise_exception=False)
+            raise
+        else:
+            files_copied = copier.shutdown()
+
+        for path, mode in reversed(directory_modes):
+            os.chmod(path, mode)
+    except BaseException:
+        # Don't leave a partial copy behind
+        _discard_copy(destination, directory_modes)
+        raise
+
+    return files_copied
+
+
+def remove_tree(path, max_workers=None):
+    """
+    Remove a directory tree
+
+    The tree is split into subtrees, which are removed in parallel by a pool
+    of worker threads. Each subtree is removed relative to open directory file
+    descriptors (dir_fd), so no path is resolved more than once and symbolic
+    links are never followed. Operating systems without dir_fd support (such
+    as Windows) fall back to removing the tree serially, by path.
+
+    Parameters:
+    path -- (str) the path of the directory to remove
+    max_workers -- (int) the maximum amount of subtrees removed at the same
+                   time
+
+    Return Value:
+    (int) the amount of entries (files, symbolic links, and directories --
+    including the directory itself) removed.
+
+    """
+    if max_workers is None:
+        max_workers = config._MAX_WORKERS
+
+    if os.path.islink(path):
+        # Just like shutil.rmtree(), refuse to remove where a link points to
+        raise OSError("Cannot remove a symbolic link to a directory")
+
+    supports_dir_fd = bool(
+        os.open in os.supports_dir_fd and
+        os.unlink in os.supports_dir_fd and
+        os.rmdir in os.supports_dir_fd and
+        os.scandir in os.supports_fd
+    )
+    if not supports_dir_fd:
+        return _remove_tree_by_path(path)
+
+    root_fd = os.open(path, _DIRECTORY_FLAGS)
+    # The directories that were split up, in the order they were opened, so
+    # they can be removed (in reverse) once their subtrees are gone.
+    split_directories = []
+    entries_removed = 0
+    remover = _BoundedExecutor(max_workers)
+    try:
+        # Split the tree into enough subtrees to keep the workers busy by
+        # going a few levels deep (but no deeper than needed). The files found
+        # on the way are removed right away.
+        directories_to_split = [root_fd]
+        for depth in range(_MAX_SPLIT_DEPTH):
+            subtrees = []
+            for directory_fd in directories_to_split:
+                entries_removed += _remove_files(directory_fd, subtrees)
+
+            is_last_level = bool(depth == _MAX_SPLIT_DEPTH - 1)
+            if len(subtrees) >= max_workers * 4 or is_last_level:
+                break
+
+            directories_to_split = []
+            for parent_fd, name in subtrees:
+                directory_fd = os.open(name, _DIRECTORY_FLAGS, dir_fd=parent_fd)
+                split_directories.append((parent_fd, name, directory_fd))
+                directories_to_split.append(directory_fd)
+
+        try:
+            for parent_fd, name in subtrees:
+                remover.submit(_remove_subtree, parent_fd, name)
+        except BaseException:
+            remover.shutdown(raise_exception=False)
+            raise
+        else:
+            entries_removed += remover.shutdown()
+
+        for parent_fd, name, directory_fd in reversed(split_directories):
+            os.close(directory_fd)
+            os.rmdir(name, dir_fd=parent_fd)
+            entries_removed += 1
+        split_directories = []
+    finally:
+        for parent_fd, name, directory_fd in split_directories:
+            os.close(directory_fd)
+        os.close(root_fd)
+
+    os.rmdir(path)
+    entries_removed += 1
+
+    return entries_removed
+
+
+# Private Functions
+def _copy_entries(source_directory, destination_directory,
+                  relative_directory, is_included, is_excluded,
+                  directory_modes, pending_directories, copier):
+    """
+    Copy the entries of a directory (the subdirectories are only created,
+    and added to pending_directories to be copied later)
+
+    """
+    with os.scandir(source_directory) as entries:
+        for entry in entries:
+            relative_path = os.path.join(relative_directory, entry.name)
+            if is_excluded(entry.name, relative_path):
+                continue
+
+            destination_path = os.path.join(destination_directory, entry.name)
+            if entry.is_symlink():
+                os.symlink(os.readlink(entry.path), destination_path)
+            elif entry.is_dir():
+                os.mkdir(destination_path)
+                directory_modes.append(
+                    (destination_path, stat.S_IMODE(entry.stat().st_mode))
+                )
+                pending_directories.append(
+                    (entry.path, destination_path, relative_path)
+                )
+            elif is_included(entry.name, relative_path):
+                copier.submit(_copy_file, entry.path, destination_path)
+
+    return
+
+
+def _discard_copy(destination, directory_modes):
+    """Remove a partial copy (ignoring any errors while doing so)"""
+    # A read-only directory's entries can't be removed
+    for path, _ in directory_modes:
+        try:
+            os.chmod(path, stat.S_IRWXU)
+        except OSError:
+            pass
+
+    try:
+        remove_tree(destination)
+    except OSError:
+        pass
+
+    return
+
+
+def _copy_file(source, destination):
+    """Copy a file, and count it (for the copier's total)"""
+    transfer.copy_file(source, destination)
+    return 1
+
+
+def _remove_files(directory_fd, subdirectories):
+    """
+    Remove everything in a directory that isn't a directory itself
+
+    Parameters:
+    directory_fd -- (int) the file descriptor of the directory
+    subdirectories -- (list) the (directory_fd, name) of every subdirectory
+                      found is appended to this.
+
+    Return Value:
+    (int) the amount of entries removed.
+
+    """
+    entries_removed = 0
+    with os.scandir(directory_fd) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append((directory_fd, entry.name))
+            else:
+                os.unlink(entry.name, dir_fd=directory_fd)
+                entries_removed += 1
+
+    return entries_removed
+
+
+def _remove_subtree(parent_fd, name):
+    """
+    Remove a directory, and everything in it, relative to its parent
+
+    The subtree is walked with an explicit stack (rather than recursion), and
+    only the directory being emptied is kept open: the walk goes down by name
+    and comes back up through "..", which is checked against the directory
+    it came down from. So no tree is too deep for it (to recurse into, or to
+    keep a file descriptor open for every level).
+
+    Parameters:
+    parent_fd -- (int) the file descriptor of the parent directory
+    name -- (str) the name of the directory to remove
+
+    Return Value:
+    (int) the amount of entries removed.
+
+    """
+    entries_removed = 0
+    # The directories from the top of the subtree down to the one that is
+    # open: (name, identity, names of the subdirectories left to remove)
+    stack = []
+    directory_fd = os.open(name, _DIRECTORY_FLAGS, dir_fd=parent_fd)
+    went_down = True
+    try:
+        while True:
+            if went_down:
+                subdirectories = []
+                entries_removed += _remove_files(directory_fd, subdirectories)
+                stack.append((
+                    name, _get_identity(directory_fd),
+                    [subdirectory_name
+                     for _, subdirectory_name in subdirectories]
+                ))
+
+            pending_names = stack[-1][2]
+            if pending_names:
+                name = pending_names.pop()
+                subdirectory_fd = os.open(
+                    name, _DIRECTORY_FLAGS, dir_fd=directory_fd
+                )
+                os.close(directory_fd)
+                directory_fd = subdirectory_fd
+                went_down = True
+                continue
+
+            # It's empty now, so go back up and remove it
+            name, _, _ = stack.pop()
+            if not stack:
+                os.close(directory_fd)
+                directory_fd = None
+                os.rmdir(name, dir_fd=parent_fd)
+                entries_removed += 1
+                break
+
+            up_fd = os.open("..", _DIRECTORY_FLAGS, dir_fd=directory_fd)
+            os.close(directory_fd)
+            directory_fd = up_fd
+            if _get_identity(directory_fd) != stack[-1][1]:
+                raise OSError(
+                    "The directory tree was moved while it was being removed"
+                )
+            os.rmdir(name, dir_fd=directory_fd)
+            entries_removed += 1
+            went_down = False
+    finally:
+        if directory_fd is not None:
+            os.close(directory_fd)
+
+    return entries_removed
+
+
+def _get_identity(fd):
+    """Get the (st_dev, st_ino) of an open file"""
+    stat_result = os.fstat(fd)
+    return (stat_result.st_dev, stat_result.st_ino)
+
+
+def _remove_tree_by_path(path):
+    """
+    Remove a directory tree serially, by path
+
+    Return Value:
+    (int) the amount of entries removed.
+
+    """
+    entries_removed = 0
+    for root, directories, files in os.walk(path, topdown=False):
+        for name in files:
+            os.unlink(os.path.join(root, name))
+            entries_removed += 1
+        for name in directories:
+            directory_path = os.path.join(root, name)
+            if os.path.islink(directory_path):
+                os.unlink(directory_path)
+            else:
+                os.rmdir(directory_path)
+            entries_removed += 1
+
+    os.rmdir(path)
+
+    return entries_removed + 1
+
+
+def _compile_patterns(patterns, default):
+    """
+    Compile glob-style patterns into a single matching function
+
+    Parameters:
+    patterns -- (str, iterable of str, or None) the patterns
+    default -- (bool) what the matching function returns when there are no
+               patterns.
+
+    Return Value:
+    (function) takes an entry's name and its relative path, and returns
+    whether either one matches any of the patterns.
+
+    """
+    if not patterns:
+        return lambda name, relative_path: default
+
+    if isinstance(patterns, str):
+        patterns = (patterns,)
+
+    # One regular expression for all of the patterns is much faster than
+    # calling fnmatch() for each of them.
+    regexp = re.compile(
+        "|".join(
+            "(?:{pattern})".format(pattern=fnmatch.translate(p))
+            for p in patterns
+        )
+    )
+
+    def matches(name, relative_path):
+        return bool(
+            regexp.match(name) or
+            regexp.match(relative_path.replace(os.sep, "/"))
+        )
+
+    return matches
+
+
+# Private Classes
+class _BoundedExecutor:
+    """
+    A thread pool that only allows a limited amount of tasks to be queued
+
+    Without a bound, walking a huge tree would queue up a task (and a future)
+    for every file in it long before the workers got through them.
+
+    """
+    def __init__(self, max_workers):
+        """
+        Construct the object
+
+        Parameters:
+        max_workers -- (int) the amount of worker threads
+
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._slots = threading.BoundedSemaphore(max_workers * 4)
+        self._lock = threading.Lock()
+        self._total = 0
+        self._exception = None
+        return
+
+    def submit(self, function, *args):
+        """
+        Run a function in a worker thread, blocking while the queue is full
+
+        If an earlier task failed, then its exception is raised here instead,
+        so that no more work gets queued.
+
+        """
+        self._raise_exception()
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(self._on_done)
+        return
+
+    def shutdown(self, raise_exception=True):
+        """
+        Wait for all of the tasks to finish
+
+        Parameters:
+        raise_exception -- (bool) whether to raise the exception of the first
+                           task that failed. Pass False when shutting down
+                           because of another error, so that it isn't masked.
+
+        Return Value:
+        (int) the sum of what the (successful) tasks returned. Tasks should
+        return a count of what they did.
+
+        """
+        self._executor.shutdown(wait=True)
+        if raise_exception:
+            self._raise_exception()
+
+        return self._total
+
+    def _on_done(self, future):
+        """Record the task's outcome and free up its slot in the queue"""
+        with self._lock:
+            exception = future.exception()
+            if exception is None:
+                self._total += future.result()
+            elif self._exception is None:
+                self._exception = exception
+
+        self._slots.release()
+        return
+
+    def _raise_exception(self):
+        """Raise the exception of the first task that failed (if any)"""
+        if self._exception is not None:
+            raise self._exception
+
+        return
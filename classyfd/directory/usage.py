@@ -0,0 +1,148 @@
+"""
+Contains the logic for measuring how much space a directory tree uses
+
+This works like du: every file (and symbolic link) is stat'ed, files with
+multiple hard links are only counted once, and both the apparent size (the
+sum of st_size) and the allocated size (the blocks actually used on disk) are
+measured. The stat calls are made by the worker threads of the parallel tree
+walker.
+
+Measuring the same huge tree over and over can be made much cheaper with a
+cache of per-directory subtotals, keyed on each directory's modification
+time. A directory's modification time only changes when entries are added to
+it, removed from it, or renamed, so a directory that hasn't changed doesn't
+need its files stat'ed again. Note that modifying a file's contents in place
+does NOT change its directory's modification time, so the cache trades that
+kind of change going unnoticed for speed.
+
+"""
+
+import os
+
+from . import walker
+
+
+def get_tree_size(path, cache=None, max_workers=None):
+    """
+    Measure the size of a directory tree
+
+    Directories themselves aren't counted, only the files and symbolic links
+    in them. Symbolic links are never followed.
+
+    Parameters:
+    path -- (str) the path of the directory
+    cache -- (dict) if given, the subtotal of every directory is stored in it,
+             and reused by later calls (that are given the same dict) for any
+             directory whose modification time hasn't changed.
+    max_workers -- (int) the amount of worker threads
+
+    Return Value:
+    (tuple) the apparent size and the allocated size (both in bytes).
+
+    """
+    def process(directory_path, depth, entry, entries):
+        return _get_subtotal(directory_path, entry, entries, cache)
+
+    apparent_size = 0
+    allocated_size = 0
+    # Files with multiple hard links may be found in several directories, so
+    # they are only counted the first time.
+    counted_inodes = set()
+
+    results = walker.scan_tree(
+        path, process=process, on_error=_raise_if_top(path),
+        max_workers=max_workers
+    )
+    for _, _, _, subtotal in results:
+        apparent_subtotal, allocated_subtotal, linked_files = subtotal
+        apparent_size += apparent_subtotal
+        allocated_size += allocated_subtotal
+        for device, inode, apparent, allocated in linked_files:
+            if (device, inode) in counted_inodes:
+                continue
+            counted_inodes.add((device, inode))
+            apparent_size += apparent
+            allocated_size += allocated
+
+    return (apparent_size, allocated_size)
+
+
+# Private Functions
+def _get_subtotal(directory_path, entry, entries, cache):
+    """
+    Get the size of the files directly inside a directory
+
+    Parameters:
+    directory_path -- (str) the path of the directory
+    entry -- (os.DirEntry or None) the directory's entry
+    entries -- (list) the os.DirEntry objects in the directory
+    cache -- (dict or None) see get_tree_size()
+
+    Return Value:
+    (tuple) the apparent size and the allocated size of the files that only
+    have one hard link, and a tuple of (st_dev, st_ino, apparent size,
+    allocated size) tuples for the files with more than one.
+
+    """
+    cache_key = None
+    if cache is not None:
+        if entry is None:
+            directory_stat = os.stat(directory_path)
+        else:
+            directory_stat = entry.stat(follow_symlinks=False)
+
+        cache_key = (
+            directory_stat.st_dev, directory_stat.st_ino,
+            directory_stat.st_mtime_ns
+        )
+        cached = cache.get(directory_path)
+        if cached is not None and cached[0] == cache_key:
+            return cached[1]
+
+    apparent_size = 0
+    allocated_size = 0
+    linked_files = []
+    for sub_entry in entries:
+        if sub_entry.is_dir(follow_symlinks=False):
+            continue
+
+        try:
+            stat_result = sub_entry.stat(follow_symlinks=False)
+        except FileNotFoundError:
+            # Removed since the directory was scanned
+            continue
+
+        apparent = stat_result.st_size
+        # st_blocks is always in 512-byte units (and missing on Windows)
+        allocated = getattr(stat_result, "st_blocks", None)
+        allocated = apparent if allocated is None else allocated * 512
+
+        if stat_result.st_nlink > 1:
+            linked_files.append(
+                (stat_result.st_dev, stat_result.st_ino, apparent, allocated)
+            )
+        else:
+            apparent_size += apparent
+            allocated_size += allocated
+
+    subtotal = (apparent_size, allocated_size, tuple(linked_files))
+    if cache is not None:
+        cache[directory_path] = (cache_key, subtotal)
+
+    return subtotal
+
+
+def _raise_if_top(path):
+    """
+    Get an error handler that raises errors for the top directory (which
+    means the tree can't be measured at all), and ignores all other errors
+    (like du, the rest of the tree is still measured).
+
+    """
+    def on_error(error):
+        if error.filename == path:
+            raise error
+
+        return
+
+    return on_error
@@ -0,0 +1,375 @@
+"""
+Contains the parallel directory tree traversal engine
+
+os.walk() scans one directory at a time, so on network file systems and
+spinning disks it spends most of its time waiting on each directory listing.
+Here, a pool of worker threads pulls directories off a shared queue, scans
+them with os.scandir() (which releases the GIL), and queues up the
+sub-directories they find for whichever worker is free next. The results are
+streamed back to the caller as they arrive.
+
+"""
+
+import os
+import queue
+import threading
+
+from .. import config
+
+
+# Used by the workers to tell the consumer that there is nothing left to scan
+_DONE = object()
+
+# How long (in seconds) a blocked worker waits before checking if it should
+# stop (because the consumer went away).
+_POLL_INTERVAL = 0.1
+
+
+def scan_tree(path, max_depth=None, follow_symlinks=False, prune=None,
+              process=None, ordered=False, on_error=None, max_workers=None):
+    """
+    Scan a directory tree in parallel
+
+    Parameters:
+    path -- (str) the path of the directory to scan
+    max_depth -- (int) how many levels of sub-directories to descend into. 0
+                 only scans the directory itself. If None, there is no limit.
+    follow_symlinks -- (bool) whether to descend into symbolic links to
+                       directories. Loops are detected by the (st_dev, st_ino)
+                       of each directory, and a directory is never scanned
+                       twice.
+    prune -- (function) if given, it is called with the os.DirEntry of every
+             sub-directory (and its depth), and that sub-directory isn't
+             descended into if it returns True. It is called from the worker
+             threads.
+    process -- (function) if given, it is called (from the worker threads)
+               with the directory_path, depth, entry, and entries of every
+               scanned directory, and what it returns is yielded in place of
+               entries. This is where per-entry work (like calling stat) 
+               should be done, so that it is done in parallel.
+    ordered -- (bool) if True, the directories are yielded in the same order
+               as a (sorted) top-down os.walk() would. Results that arrive
+               early are held back (in memory) until it is their turn, and
+               there is no bound on how many: in the worst case (when the
+               first directory in order is scanned last), that is every
+               result of a wide tree. If False, they are yielded as soon as
+               they are scanned (and memory stays bounded).
+    on_error -- (function) if given, it is called with the OSError raised
+                when a directory can't be scanned (or processed). Otherwise,
+                the directory is silently skipped (just like os.walk() does).
+                Any other exception is raised.
+    max_workers -- (int) the amount of worker threads
+
+    Return Value:
+    (generator) yields (directory_path, depth, entry, entries) tuples. entry
+    is the os.DirEntry of the directory (None for the top directory), and
+    entries is a list of the os.DirEntry objects in the directory (or what
+    process returned for it).
+
+    """
+    if max_workers is None:
+        max_workers = config._MAX_WORKERS
+
+    scanner = _TreeScanner(
+        max_depth=max_depth, follow_symlinks=follow_symlinks, prune=prune,
+        process=process, max_workers=max_workers
+    )
+    results = scanner.start(path)
+    try:
+        if ordered:
+            results = _order_results(path, results)
+
+        for directory_path, depth, entry, entries, error, _ in results:
+            if error is not None:
+                if not isinstance(error, OSError):
+                    raise error
+                elif on_error is not None:
+                    on_error(error)
+                continue
+
+            yield (directory_path, depth, entry, entries)
+    finally:
+        scanner.stop()
+
+    return
+
+
+def scan_files(path, on_error=None, max_workers=None):
+    """
+    Find (and stat) every regular file in a directory tree, in parallel
+
+    Symbolic links are never followed (or included).
+
+    Parameters:
+    path -- (str) the path of the directory
+    on_error -- (function) if given, it is called with the OSError raised
+                when a directory can't be scanned. Otherwise, the error is
+                raised.
+    max_workers -- (int) the amount of worker threads
+
+    Return Value:
+    (generator) yields an (entry, stat_result) tuple for each file, where
+    entry is its os.DirEntry. stat_result is the OSError raised if the file
+    couldn't be stat'ed.
+
+    """
+    def process(directory_path, depth, entry, entries):
+        files = []
+        for sub_entry in entries:
+            try:
+                if not sub_entry.is_file(follow_symlinks=False):
+                    continue
+                stat_result = sub_entry.stat(follow_symlinks=False)
+            except OSError as e:
+                stat_result = e
+            files.append((sub_entry, stat_result))
+
+        return files
+
+    if on_error is None:
+        on_error = _raise_error
+
+    results = scan_tree(
+        path, process=process, on_error=on_error, max_workers=max_workers
+    )
+    for _, _, _, files in results:
+        for file_ in files:
+            yield file_
+
+    return
+
+
+# Private Functions
+def _raise_error(error):
+    """Raise an error (the on_error function for when none is given)"""
+    raise error
+
+
+def _order_results(path, results):
+    """
+    Put the results in the order of a (sorted) top-down walk
+
+    Parameters:
+    path -- (str) the path of the top directory
+    results -- (iterable) the results, in the order they were scanned
+
+    Return Value:
+    (generator) yields the same results, in order. If the result of a
+    directory never arrives (e.g., because the scan was stopped), then the
+    results held back for its sub-directories are yielded at the end (in
+    path order), rather than being lost.
+
+    """
+    # Results can't be left in the queue until it's their turn, since the
+    # workers would block on a full queue (while the result that is needed
+    # next may be behind them).
+    held_back = {}
+    next_paths = [path]
+    results = iter(results)
+    while next_paths:
+        next_path = next_paths.pop()
+        while next_path not in held_back:
+            try:
+                result = next(results)
+            except StopIteration:
+                break
+            held_back[result[0]] = result
+        else:
+            result = held_back.pop(next_path)
+            yield result
+
+            # Sub-directories are visited in name order, so push them in
+            # reverse
+            descended_paths = result[-1]
+            next_paths.extend(sorted(descended_paths, reverse=True))
+
+    for held_back_path in sorted(held_back):
+        yield held_back[held_back_path]
+
+    return
+
+
+# Private Classes
+class _TreeScanner:
+    """Scans a directory tree with a pool of worker threads"""
+    def __init__(self, max_depth, follow_symlinks, prune, process,
+                 max_workers):
+        """
+        Construct the object
+
+        Parameters:
+        See scan_tree().
+
+        """
+        self._max_depth = max_depth
+        self._follow_symlinks = follow_symlinks
+        self._prune = prune
+        self._process = process
+        self._max_workers = max(1, max_workers)
+
+        self._pending = queue.Queue()
+        # Bounded, so that the workers can't get too far ahead of a slow
+        # consumer.
+        self._results = queue.Queue(maxsize=self._max_workers * 4)
+        self._stopped = threading.Event()
+
+        # The amount of directories queued up or being scanned. When it drops
+        # to 0, the whole tree has been scanned.
+        self._unfinished = 0
+        self._lock = threading.Lock()
+        self._visited = set()
+        self._threads = []
+        return
+
+    def start(self, path):
+        """
+        Start scanning
+
+        Parameters:
+        path -- (str) the path of the top directory
+
+        Return Value:
+        (generator) yields (directory_path, depth, entry, entries, error,
+        descended_paths) tuples as the directories are scanned.
+
+        """
+        if self._follow_symlinks:
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                pass
+            else:
+                self._visited.add((stat_result.st_dev, stat_result.st_ino))
+
+        self._queue_directory(path, 0, None)
+        for i in range(self._max_workers):
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        return self._iterate_results()
+
+    def stop(self):
+        """Stop scanning, and wait for the workers to exit"""
+        self._stopped.set()
+        for i in range(len(self._threads)):
+            self._pending.put(None)
+        for thread in self._threads:
+            thread.join()
+
+        return
+
+    def _iterate_results(self):
+        """Yield the results until there are no more"""
+        while True:
+            result = self._results.get()
+            if result is _DONE:
+                break
+            yield result
+
+        return
+
+    def _queue_directory(self, path, depth, entry):
+        """Queue up a directory to be scanned"""
+        with self._lock:
+            self._unfinished += 1
+
+        self._pending.put((path, depth, entry))
+        return
+
+    def _put_result(self, result):
+        """Hand a result to the consumer, unless it went away"""
+        while not self._stopped.is_set():
+            try:
+                self._results.put(result, timeout=_POLL_INTERVAL)
+            except queue.Full:
+                continue
+            else:
+                break
+
+        return
+
+    def _work(self):
+        """Scan directories until there are no more (or until stopped)"""
+        while not self._stopped.is_set():
+            item = self._pending.get()
+            if item is None:
+                break
+
+            path, depth, entry = item
+            try:
+                self._scan(path, depth, entry)
+            finally:
+                with self._lock:
+                    self._unfinished -= 1
+                    is_finished = bool(self._unfinished == 0)
+
+            if is_finished:
+                self._put_result(_DONE)
+
+        return
+
+    def _scan(self, path, depth, entry):
+        """Scan a single directory, and queue up its sub-directories"""
+        descended_paths = ()
+        try:
+            with os.scandir(path) as scanned_entries:
+                entries = list(scanned_entries)
+
+            subdirectories = []
+            can_descend = bool(
+                self._max_depth is None or depth < self._max_depth
+            )
+            if can_descend:
+                subdirectories = [
+                    sub_entry for sub_entry in entries
+                    if self._should_descend(sub_entry, depth + 1)
+                ]
+
+            # The sub-directories are queued up first so that the other
+            # workers can start on them right away. The tree can't be 
+            # considered finished in the meantime, since this directory still
+            # counts as unfinished.
+            for sub_entry in subdirectories:
+                self._queue_directory(sub_entry.path, depth + 1, sub_entry)
+            descended_paths = tuple(
+                sub_entry.path for sub_entry in subdirectories
+            )
+
+            if self._process is not None:
+                entries = self._process(path, depth, entry, entries)
+        except Exception as e:
+            # Errors are handed to the consumer, which decides what to do
+            self._put_result((path, depth, entry, None, e, descended_paths))
+            return
+
+        self._put_result((path, depth, entry, entries, None, descended_paths))
+
+        return
+
+    def _should_descend(self, entry, depth):
+        """Determine if a sub-directory should be scanned"""
+        try:
+            if not entry.is_dir(follow_symlinks=self._follow_symlinks):
+                return False
+        except OSError:
+            return False
+
+        if self._prune is not None and self._prune(entry, depth):
+            return False
+
+        if self._follow_symlinks:
+            try:
+                stat_result = entry.stat()
+            except OSError:
+                return False
+
+            key = (stat_result.st_dev, stat_result.st_ino)
+            with self._lock:
+                if key in self._visited:
+                    # A symbolic link loop (or a directory that was already
+                    # reached through another link)
+                    return False
+                self._visited.add(key)
+
+        return True
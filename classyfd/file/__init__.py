@@ -1,4 +1,6 @@
 """Contains operations for files"""
 
 # Expose the class here to make the API more simple
-from .file import File
\ No newline at end of file
+from .file import File
+from .appending import Appender
+from .hashing import DigestCache, hash_files
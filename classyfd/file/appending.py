@@ -0,0 +1,286 @@
+"""
+Contains an Appender class for high-rate appends to a file
+
+Writing (and fsync'ing) every record on its own caps the rate of durable
+appends at the latency of fsync. Here, producers only hand their records to
+the appender, and a single background thread writes whatever has piled up
+with one os.writev() call and then makes all of it durable with one fsync
+(i.e., group commit). Producers that need to know their record is on disk
+can wait for it, and every producer waiting at the same time is released by
+the same fsync.
+
+"""
+
+import os
+import threading
+import time
+
+
+# The maximum amount of buffers handed to a single os.writev() call
+try:
+    _MAX_IOVECS = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    _MAX_IOVECS = 1024
+if _MAX_IOVECS <= 0:
+    _MAX_IOVECS = 1024
+
+
+class Appender:
+    """A thread-safe, buffered appender with group commit"""
+    def __init__(self, path, flush_interval=0.05, flush_size=1024 * 1024,
+                 fsync=True):
+        """
+        Open a file for appending (it's created if it doesn't exist)
+
+        Parameters:
+        path -- (str) the path of the file
+        flush_interval -- (int or float) how many seconds appended data is
+                          held back at most, before it's written (and
+                          flushed to disk).
+        flush_size -- (int) how many bytes may be held back, before they are
+                      written right away.
+        fsync -- (bool) whether to flush what is written to disk (with fsync).
+                 If False, then the data is only handed to the operating
+                 system.
+
+        """
+        self._path = os.path.abspath(path)
+        self._flush_interval = flush_interval
+        self._flush_size = flush_size
+        self._fsync = fsync
+
+        self._fd = os.open(
+            self._path,
+            (os.O_WRONLY | os.O_APPEND | os.O_CREAT |
+             getattr(os, "O_BINARY", 0)),
+            0o666
+        )
+        self._condition = threading.Condition()
+        self._pending = []
+        self._pending_size = 0
+        # Every append gets a sequence number, so that it's known which
+        # appends have been flushed.
+        self._appended = 0
+        self._flushed = 0
+        self._waiters = 0
+        self._closing = False
+        self._error = None
+
+        # The flusher gets its own reference to the file descriptor, since
+        # closing takes self._fd away.
+        self._thread = threading.Thread(
+            target=self._run, args=(self._fd,), daemon=True
+        )
+        self._thread.start()
+        return
+
+    # Special Methods
+    def __repr__(self):
+        """Get the official string representation"""
+        repr_ = (
+            "{class_name}(\"{path}\")"
+            .format(class_name=Appender.__name__, path=self._path)
+        )
+        return repr_
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return
+
+    # Properties
+    @property
+    def path(self):
+        """
+        Get the path of the file
+
+        Return Value:
+        (str)
+
+        """
+        return self._path
+
+    @property
+    def closed(self):
+        """
+        Whether the appender is closed or not
+
+        Return Value:
+        (bool)
+
+        """
+        return self._fd is None
+
+    # Regular Methods
+    def append(self, data, wait=False):
+        """
+        Append data to the file
+
+        Parameters:
+        data -- (bytes-like object) the data. It's copied, so the caller may
+                reuse its buffer right away.
+        wait -- (bool) if True, then this blocks until the data has been
+                written (and flushed to disk, unless fsync is False).
+
+        """
+        data = bytes(data)
+        with self._condition:
+            self._raise_if_unusable()
+            if data:
+                self._pending.append(data)
+                self._pending_size += len(data)
+                self._appended += 1
+                if self._pending_size >= self._flush_size:
+                    self._condition.notify_all()
+            sequence = self._appended
+
+        if wait:
+            self._wait_for(sequence)
+
+        return
+
+    def flush(self):
+        """Block until everything appended so far has been flushed"""
+        with self._condition:
+            self._raise_if_unusable()
+            sequence = self._appended
+
+        self._wait_for(sequence)
+        return
+
+    def close(self):
+        """
+        Flush everything that was appended, and close the file
+
+        If writing (or flushing) failed, the error is raised here (and by
+        every call to .append() and .flush() after it failed). Later (or
+        concurrent) calls wait for the first one to finish flushing, and raise
+        the same error.
+
+        """
+        # Take the file descriptor while holding the lock, so that it can
+        # only ever be closed once.
+        with self._condition:
+            is_first_call = not self._closing
+            self._closing = True
+            fd, self._fd = self._fd, None
+            self._condition.notify_all()
+
+        self._thread.join()
+        if is_first_call:
+            os.close(fd)
+
+        if self._error is not None:
+            raise self._error
+
+        return
+
+    # Private Methods
+    def _raise_if_unusable(self):
+        """Raise an exception if the appender is closed (or failed)"""
+        if self._error is not None:
+            raise self._error
+        elif self._closing:
+            raise ValueError("The appender is closed")
+
+        return
+
+    def _wait_for(self, sequence):
+        """Block until the append with a sequence number has been flushed"""
+        with self._condition:
+            self._waiters += 1
+            self._condition.notify_all()
+            try:
+                while self._flushed < sequence and self._error is None:
+                    self._condition.wait()
+            finally:
+                self._waiters -= 1
+
+            if self._flushed < sequence:
+                raise self._error
+
+        return
+
+    def _run(self, fd):
+        """Write (and flush) the pending data until the appender is closed"""
+        while True:
+            with self._condition:
+                if not self._wait_for_work():
+                    break
+
+                chunks = self._pending
+                sequence = self._appended
+                self._pending = []
+                self._pending_size = 0
+
+            try:
+                _write_all(fd, chunks)
+                if self._fsync:
+                    os.fsync(fd)
+            except OSError as e:
+                with self._condition:
+                    self._error = e
+                    self._condition.notify_all()
+                break
+
+            with self._condition:
+                self._flushed = sequence
+                self._condition.notify_all()
+
+        return
+
+    def _wait_for_work(self):
+        """
+        Wait until the pending data should be written (with the condition's
+        lock held)
+
+        Return Value:
+        (bool) False if the appender is closing and there is nothing left to
+        write.
+
+        """
+        deadline = None
+        while True:
+            if not self._pending:
+                if self._closing:
+                    return False
+                self._condition.wait()
+                continue
+
+            # Write right away if someone is waiting, since everything that
+            # piled up while the previous write (and fsync) was in progress
+            # is written together anyway.
+            if deadline is None:
+                deadline = time.monotonic() + self._flush_interval
+            is_due = bool(
+                self._waiters or self._closing or
+                self._pending_size >= self._flush_size
+            )
+            remaining = deadline - time.monotonic()
+            if is_due or remaining <= 0:
+                return True
+
+            self._condition.wait(remaining)
+
+
+# Private Functions
+def _write_all(fd, chunks):
+    """Write all of the chunks to a file (retrying partial writes)"""
+    index = 0
+    while index < len(chunks):
+        batch = chunks[index:index + _MAX_IOVECS]
+        if hasattr(os, "writev"):
+            written = os.writev(fd, batch)
+        else:
+            written = os.write(fd, b"".join(batch))
+
+        for chunk in batch:
+            if written < len(chunk):
+                chunks[index] = memoryview(chunk)[written:]
+                break
+            written -= len(chunk)
+            index += 1
+
+    return
@@ -0,0 +1,116 @@
+"""
+Contains the logic for comparing the contents of files
+
+The comparison goes from the cheapest check to the most expensive one, and
+stops as soon as it has an answer:
+
+1. The same (st_dev, st_ino) means the same file.
+2. Different sizes mean different contents.
+3. Cached digests (if both files have one) answer without reading anything.
+4. A few sampled blocks (at the start, the middle, and the end) catch most
+   differences with three small reads per file.
+5. Otherwise, both files are read in lockstep, in large chunks, until a
+   difference is found (or the end).
+
+"""
+
+import os
+
+from . import hashing, reading
+
+
+# The size of each sampled block
+_SAMPLE_SIZE = 4096
+
+# The size of the chunks read from each file while streaming
+_CHUNK_SIZE = 1024 * 1024
+
+
+def files_equal(path, other_path, shallow=False, cache=None,
+                algorithm="sha256"):
+    """
+    Determine if two files have the same contents
+
+    Parameters:
+    path -- (str) the path of the first file
+    other_path -- (str) the path of the second file
+    shallow -- (bool) if True, then files with the same size and
+               modification time are considered equal without reading them
+               (just like filecmp.cmp() does).
+    cache -- (DigestCache or bool) the digest cache to look the files up in.
+             If None, then the cache shared by the whole process is used. If
+             False, then no cache is used. Nothing is ever hashed (or added
+             to the cache) by a comparison.
+    algorithm -- (str) the algorithm of the cached digests to look for
+
+    Return Value:
+    (bool)
+
+    """
+    stat_result = os.stat(path)
+    other_stat_result = os.stat(other_path)
+
+    is_same_file = bool(
+        stat_result.st_dev == other_stat_result.st_dev and
+        stat_result.st_ino == other_stat_result.st_ino
+    )
+    if is_same_file:
+        return True
+    elif stat_result.st_size != other_stat_result.st_size:
+        return False
+    elif shallow and stat_result.st_mtime_ns == other_stat_result.st_mtime_ns:
+        return True
+
+    if cache is None:
+        cache = hashing._get_default_cache()
+    if cache is not False:
+        digest = cache.get(stat_result, algorithm)
+        other_digest = cache.get(other_stat_result, algorithm)
+        if digest is not None and other_digest is not None:
+            return digest == other_digest
+
+    size = stat_result.st_size
+    if size > _SAMPLE_SIZE * 3:
+        sample_ranges = [
+            (0, _SAMPLE_SIZE),
+            ((size - _SAMPLE_SIZE) // 2, _SAMPLE_SIZE),
+            (size - _SAMPLE_SIZE, _SAMPLE_SIZE),
+        ]
+        samples = reading.read_ranges(path, sample_ranges, max_gap=0)
+        other_samples = reading.read_ranges(
+            other_path, sample_ranges, max_gap=0
+        )
+        if samples != other_samples:
+            return False
+
+    return _stream_equal(path, other_path)
+
+
+# Private Functions
+def _stream_equal(path, other_path):
+    """
+    Compare two files by reading them in lockstep
+
+    Return Value:
+    (bool)
+
+    """
+    buffer = reading._buffer_pool.acquire(_CHUNK_SIZE)
+    other_buffer = reading._buffer_pool.acquire(_CHUNK_SIZE)
+    try:
+        view = memoryview(buffer)
+        other_view = memoryview(other_buffer)
+        with open(path, mode="rb", buffering=0) as f, \
+                open(other_path, mode="rb", buffering=0) as other_f:
+            reading._advise_sequential(f.fileno())
+            reading._advise_sequential(other_f.fileno())
+            while True:
+                size = reading._readinto_full(f, view)
+                other_size = reading._readinto_full(other_f, other_view)
+                if size != other_size or view[:size] != other_view[:size]:
+                    return False
+                elif size < len(view):
+                    return True
+    finally:
+        reading._buffer_pool.release(buffer)
+        reading._buffer_pool.release(other_buffer)
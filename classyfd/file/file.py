@@ -1,8 +1,12 @@
 """Contains a File class to represent real files"""
 
+import contextlib
+import errno
 import os
 import pathlib
 import shutil
+import stat
+import time
 # Unix-like Only Imports
 try:
     import pwd
@@ -10,14 +14,17 @@ try:
 except ImportError:
     pass
 
-from .. import config, utils
+from . import (
+    appending, comparing, hashing, lines, reading, sorting, transfer, writing
+)
+from .. import config, utils, watcher
 from ..base import _BaseFileAndDirectoryInterface
 from ..exceptions import FileError, InvalidFileValueError
 
 
 class File(_BaseFileAndDirectoryInterface):
     """A class that groups together the (meta)data and behavior of files"""
-    def __init__(self, path):
+    def __init__(self, path, stat_ttl=None):
         """
         Construct the object
         
@@ -25,6 +32,10 @@ class File(_BaseFileAndDirectoryInterface):
         path -- (str) where the file is (or will be) located at. An exception
                 is raised if the path refers to a directory, and also if an
                 empty string is given.
+        stat_ttl -- (int or float) how many seconds a metadata snapshot (taken
+                    by .stat() or .refresh()) stays valid for. If None, then a
+                    snapshot stays valid until it is refreshed, or until the
+                    file is moved, renamed, or removed.
         
         """
         if not path:
@@ -32,13 +43,15 @@ class File(_BaseFileAndDirectoryInterface):
             # that a path will be given upon instantiation.
             raise InvalidFileValueError("No file path was given")
         
+        if stat_ttl is not None and stat_ttl < 0:
+            raise InvalidFileValueError("stat_ttl should be 0 or more")
+        
         # Raise an exception if the path refers to a directory
-        path_exists = os.path.exists(path)
-        path_is_a_directory = os.path.isdir(path)
-        if path_exists and path_is_a_directory:
-            raise IsADirectoryError("The path refers to a directory")
+        self._raise_if_directory(path)
         
         self._path = utils.normalize_path(os.path.abspath(path)) 
+        self._stat_ttl = stat_ttl
+        self._invalidate_stat()
         return
     
     # Special Methods
@@ -89,12 +102,10 @@ class File(_BaseFileAndDirectoryInterface):
         
         """
         # Raise an exception if the path refers to a directory
-        path_exists = os.path.exists(new_path)
-        path_is_a_directory = os.path.isdir(new_path)
-        if path_exists and path_is_a_directory:
-            raise IsADirectoryError("The path refers to a directory")
+        self._raise_if_directory(new_path)
         
         self._path = utils.normalize_path(os.path.abspath(new_path))         
+        self._invalidate_stat()
         return
     
     @property
@@ -106,7 +117,7 @@ class File(_BaseFileAndDirectoryInterface):
         (bool)
         
         """
-        return os.path.exists(self.path)
+        return self._get_stat_result() is not None
     
     @property
     def created_on(self):
@@ -121,7 +132,7 @@ class File(_BaseFileAndDirectoryInterface):
         (int)
         
         """
-        return os.path.getsize(self.path) 
+        return self._get_stat_result(must_exist=True).st_size
     
     @property
     def parent(self):
@@ -155,7 +166,8 @@ class File(_BaseFileAndDirectoryInterface):
             ) 
         
         # Get the owner's details from the user account and password database
-        pwd_user = pwd.getpwnam(pathlib.Path(self.path).owner())
+        stat_result = self._get_stat_result(must_exist=True)
+        pwd_user = pwd.getpwuid(stat_result.st_uid)
         
         user = {}
         user["username"] = pwd_user.pw_name
@@ -185,7 +197,8 @@ class File(_BaseFileAndDirectoryInterface):
             )       
         
         # Get the group's details from the group database
-        grp_group = grp.getgrnam(pathlib.Path(self.path).group())
+        stat_result = self._get_stat_result(must_exist=True)
+        grp_group = grp.getgrgid(stat_result.st_gid)
         
         group = {}
         group["name"] = grp_group.gr_name
@@ -246,7 +259,15 @@ class File(_BaseFileAndDirectoryInterface):
         all after a File object is created.
         
         """
-        return os.path.isfile(self.path)
+        if self._dir_entry is not None and self._stat_taken_on is None:
+            # The entry usually knows its type without a system call
+            try:
+                return self._dir_entry.is_file()
+            except OSError:
+                return False
+        
+        stat_result = self._get_stat_result()
+        return bool(stat_result and stat.S_ISREG(stat_result.st_mode))
     
     # Regular Methods
     def get_parent(self, levels=1):
@@ -277,6 +298,83 @@ class File(_BaseFileAndDirectoryInterface):
                
         return parent         
     
+    def stat(self):
+        """
+        Get a snapshot of the file's metadata
+        
+        A single os.stat() call populates the snapshot, and the metadata
+        properties (exists, size, is_file, owner, and group) are then read from
+        it until it expires (see the stat_ttl parameter of the constructor),
+        is refreshed, or the file is moved, renamed, or removed. If there is
+        still a valid snapshot, then it is returned without touching the file
+        system.
+        
+        Return Value:
+        (os.stat_result)
+        
+        """
+        if self._dir_entry is not None and self._stat_taken_on is None:
+            self._take_snapshot_from_dir_entry()
+        
+        if not self._stat_is_valid():
+            self.refresh()
+        
+        if self._stat_result is None:
+            raise FileNotFoundError(
+                "No such file: '{path}'".format(path=self.path)
+            )
+        
+        return self._stat_result
+    
+    def refresh(self):
+        """
+        Take a new snapshot of the file's metadata, discarding any previous one
+        
+        A file that does not exist is recorded as such, so the exists property
+        can also be answered from the snapshot.
+        
+        """
+        try:
+            self._stat_result = os.stat(self.path)
+        except OSError:
+            self._stat_result = None
+        
+        self._stat_taken_on = time.monotonic()
+        self._dir_entry = None
+        return
+    
+    def watch(self, debounce=0.05):
+        """
+        Watch the file for changes
+        
+        Rather than polling the file (e.g., checking .exists or .size in a 
+        loop), the kernel reports the changes (through inotify) as they 
+        happen. The file's directory is what is actually watched, so the file
+        being created, replaced, or moved in is reported as well.
+        
+        Parameters:
+        debounce -- (int or float) how many seconds to wait for more events
+                    after an event arrives, so that bursts of events can be 
+                    coalesced.
+        
+        Supported Operating Systems:
+        Linux
+        
+        Return Value:
+        (Watcher) an iterable of events, which should be closed when it is no
+        longer needed (it is also a context manager). See 
+        classyfd.watcher.Watcher for more information.
+        
+        """
+        if config._OPERATING_SYSTEM != "linux":
+            raise NotImplementedError(
+                "File.watch() is only supported on Linux"
+            )
+        
+        return watcher.Watcher(
+            self.parent, names=(self.name,), debounce=debounce
+        )
+    
     def create(self):
         pass         
     
@@ -329,13 +427,52 @@ class File(_BaseFileAndDirectoryInterface):
         
         return                    
     
-    def copy(self):
-        pass
+    def copy(self, directory, new_file_name=None, replace_existing_file=False):
+        """
+        Copy the file
+        
+        The data is copied by the kernel whenever possible (using a reflink,
+        copy_file_range, or sendfile -- in that order), rather than being read
+        into Python and written back out again. Holes in sparse files are
+        preserved, and so are the file's permission bits.
+        
+        Parameters:
+        directory -- (str) the directory to copy the file into
+        new_file_name -- (str) if given, the copy will be named this. This 
+                         should just be the name of the file (including any 
+                         file extensions), so no paths.
+        replace_existing_file -- (bool) if the path of the copy already exists,
+                                 then this variable determines what action to
+                                 take. If False, then a FileExistsError is
+                                 raised. If True, then the existing file gets
+                                 replaced with the copy.
+        
+        Return Value:
+        (File) the copy of the file
+        
+        """
+        new_file_path = self._get_new_file_path(
+            directory, new_file_name=new_file_name,
+            replace_existing_file=replace_existing_file
+        )
+        
+        if os.path.exists(new_file_path) and os.path.samefile(
+                self.path, new_file_path):
+            raise InvalidFileValueError("Cannot copy the file onto itself")
+        
+        transfer.copy_file(self.path, new_file_path)
+        
+        return File(new_file_path, stat_ttl=self._stat_ttl)
     
     def move(self, directory, new_file_name=None, replace_existing_file=False):
         """
         Move the file
         
+        If the directory is on another file system, then the file is copied
+        there (into a temporary file that is flushed to disk and then renamed
+        into place) and the original is removed afterwards. Its mode, owner, 
+        group, and timestamps are preserved.
+        
         Parameters:
         directory -- (str) the directory to move the file into
         new_file_name -- (str) if given, the file's name will be renamed to 
@@ -388,6 +525,7 @@ class File(_BaseFileAndDirectoryInterface):
     def remove(self):
         """Remove (delete) the file"""
         os.remove(self.path)
+        self._invalidate_stat()
         return
     
     def open(self, *args, **kwargs):
@@ -421,25 +559,532 @@ class File(_BaseFileAndDirectoryInterface):
         """
         return open(self.path, *args, **kwargs)
     
+    def appender(self, flush_interval=0.05, flush_size=1024 * 1024, 
+                 fsync=True):
+        """
+        Get an appender for high-rate appends to the file
+        
+        Appends (from any amount of threads) are buffered and written by a 
+        background thread in batches, with one os.writev() call and one fsync
+        for each batch (i.e., group commit), rather than one fsync per 
+        append. The file is created if it doesn't exist.
+        
+        Parameters:
+        flush_interval -- (int or float) how many seconds appended data is 
+                          held back at most, before it's written.
+        flush_size -- (int) how many bytes may be held back, before they are
+                      written right away.
+        fsync -- (bool) whether each batch is flushed to disk (with fsync)
+        
+        Return Value:
+        (Appender) call .append(data) to append, .append(data, wait=True) to 
+        block until the data is durable, and .close() (or use it as a context
+        manager) to flush everything and close the file.
+        
+        """
+        appender = appending.Appender(
+            self.path, flush_interval=flush_interval, flush_size=flush_size,
+            fsync=fsync
+        )
+        self._invalidate_stat()
+        
+        return appender
+    
+    @contextlib.contextmanager
+    def atomic_writer(self, mode="wb", encoding=None):
+        """
+        Write the file atomically, through a standard Python file object
+        
+        What is written goes to a temporary file in the same directory, which
+        is flushed to disk (with fsync) and then renamed over the file. The 
+        directory is flushed to disk as well, so that the rename is durable.
+        Readers (and crashes) only ever see the old or the new contents.
+        
+        If the block raises an exception, the file is left alone. If the file
+        already exists, its permissions are kept.
+        
+        Parameters:
+        mode -- (str) "wb" to write bytes, or "w" (or "wt") to write text
+        encoding -- (str) the encoding used in text mode. If None, then 
+                    UTF-8 is used.
+        
+        Return Value:
+        (context manager) gives a writable file object.
+        
+        """
+        try:
+            with writing.atomic_writer(
+                    self.path, mode=mode, encoding=encoding) as f:
+                yield f
+        finally:
+            self._invalidate_stat()
+        
+        return
+    
+    def write_atomic(self, data, encoding=None):
+        """
+        Replace the file's contents atomically (see .atomic_writer())
+        
+        Parameters:
+        data -- (bytes-like object, str, or an iterable of them) the new 
+                contents. Chunks from an iterable are written as they come.
+        encoding -- (str) the encoding used for str data. If None, then UTF-8
+                    is used.
+        
+        """
+        try:
+            writing.write_atomic(self.path, data, encoding=encoding)
+        finally:
+            self._invalidate_stat()
+        
+        return
+    
+    def iter_chunks(self, chunk_size=reading.DEFAULT_CHUNK_SIZE):
+        """
+        Iterate over the file's contents in fixed-size chunks
+        
+        The chunks are read (with readinto) into a buffer that is reused for
+        every chunk -- and taken from a pool, so it is reused across calls
+        as well -- rather than allocating a new bytes object for each one.
+        
+        Parameters:
+        chunk_size -- (int) the size of each chunk (in bytes). Only the last
+                      chunk may be smaller.
+        
+        Return Value:
+        (generator) yields a memoryview for each chunk. Since the buffer is
+        reused, a chunk is only valid until the next one is read. Use 
+        bytes(chunk) to keep it around for longer.
+        
+        """
+        return reading.iter_chunks(self.path, chunk_size=chunk_size)
+    
+    def readinto_chunks(self, buffer):
+        """
+        Iterate over the file's contents by reading it into a given buffer, 
+        one chunk at a time
+        
+        Parameters:
+        buffer -- (bytearray, memoryview, or any other writable bytes-like 
+                  object) each chunk is read into this buffer, so its size is
+                  the chunk size.
+        
+        Return Value:
+        (generator) yields a memoryview of the part of the buffer that was 
+        filled by each chunk. A chunk is only valid until the next one is 
+        read.
+        
+        """
+        return reading.readinto_chunks(self.path, buffer)
+    
+    def read_ranges(self, ranges, max_gap=4096):
+        """
+        Read many byte ranges of the file at once
+        
+        The file is opened once, and ranges that overlap (or are close 
+        together) are merged, so that each merged range takes a single 
+        positional read (pread) straight into one shared buffer.
+        
+        Parameters:
+        ranges -- (iterable) (offset, length) tuples
+        max_gap -- (int) how many unwanted bytes may be read between two 
+                   ranges to merge them.
+        
+        Return Value:
+        (list) contains a memoryview for each range, in the order they were
+        given. A range that goes past the end of the file is cut short.
+        
+        """
+        return reading.read_ranges(self.path, ranges, max_gap=max_gap)
+    
+    def count_lines(self, max_workers=None):
+        """
+        Count the lines in the file
+        
+        The file is read in large chunks (by a few threads in parallel), each
+        into a reused buffer, and the newlines in each chunk are counted 
+        there.
+        
+        Parameters:
+        max_workers -- (int) the amount of worker threads. There are never 
+                       more than the buffer pool keeps buffers of one size
+                       (which is also the default).
+        
+        Return Value:
+        (int) the amount of newline characters, plus 1 if the file doesn't 
+        end with one (and isn't empty).
+        
+        """
+        try:
+            line_count = lines.count_lines(
+                self.path, max_workers=max_workers
+            )
+        except ValueError as e:
+            raise InvalidFileValueError(str(e))
+        
+        return line_count
+    
+    def build_line_index(self, index_path=None, 
+                         interval=lines.DEFAULT_INDEX_INTERVAL):
+        """
+        Build a line index of the file, so that .read_line() can jump 
+        straight to (nearly) any line
+        
+        The index holds the byte offset of every Nth line, as an array of 
+        64-bit integers, in a sidecar file. It's only used while the file's 
+        size and modification time are the same as when it was built.
+        
+        Parameters:
+        index_path -- (str) where to save the index. If None, then it's saved
+                      next to the file, with ".lineindex" added to its name.
+        interval -- (int) how many lines apart the indexed lines are
+        
+        Return Value:
+        (int) the amount of lines in the file.
+        
+        """
+        return lines.build_line_index(
+            self.path, index_path=index_path, interval=interval
+        )
+    
+    def read_line(self, line_number, index_path=None):
+        """
+        Read a line of the file
+        
+        With an up to date line index (see .build_line_index()), this seeks 
+        to the closest indexed line and reads from there. Otherwise, the file
+        is read from the start.
+        
+        Parameters:
+        line_number -- (int) the (0-based) number of the line. An IndexError
+                       is raised if the file doesn't have that many lines.
+        index_path -- (str) where the line index is, if it isn't next to the
+                      file.
+        
+        Return Value:
+        (bytes) the line, including its newline character (if it has one).
+        
+        """
+        return lines.read_line(
+            self.path, line_number, index_path=index_path
+        )
+    
+    def map_lines(self, function, max_workers=None, ordered=True, 
+                  reduce=None, range_size=lines.DEFAULT_MAP_RANGE_SIZE):
+        """
+        Call a function with every line of the file, in parallel worker 
+        processes
+        
+        The file is split into ranges that start and end on line boundaries,
+        and each worker process memory-maps (and iterates over) the lines of
+        one range at a time.
+        
+        Parameters:
+        function -- (function) called with each line (bytes, including its 
+                    newline character). It has to be picklable (e.g., defined
+                    at the top level of a module), and so does what it 
+                    returns.
+        max_workers -- (int) the amount of worker processes. If None, then 
+                       there is one per CPU.
+        ordered -- (bool) whether the results are in the order of the lines,
+                   or in the order the ranges are done.
+        reduce -- (function) if given, then the results are combined with it
+                  (like functools.reduce()) in the workers and then across the
+                  ranges, and the combined result is returned.
+        range_size -- (int) the (approximate) size of the ranges, in bytes
+        
+        Return Value:
+        (generator or object) yields the result of each line. If reduce is 
+        given, then the combined result is returned instead (None for an 
+        empty file).
+        
+        """
+        return lines.map_lines(
+            self.path, function, max_workers=max_workers, ordered=ordered, 
+            reduce=reduce, range_size=range_size
+        )
+    
+    def sort(self, output, key=None, reverse=False, 
+             memory_limit=sorting.DEFAULT_MEMORY_LIMIT, max_workers=1,
+             temporary_directory=None):
+        """
+        Sort the lines of the file (of any size) into another file
+        
+        This is an external merge sort: the file is split into runs that fit
+        in memory, each run is sorted and written to a temporary file, and 
+        then the runs are merged. Lines are compared as bytes (including 
+        their newline character), and the sort is stable.
+        
+        Parameters:
+        output -- (File or str) the file to write the sorted lines to. It's 
+                  written atomically, so it may be this file itself.
+        key -- (function) if given, then lines are compared by what it 
+               returns for them (like sorted()).
+        reverse -- (bool) whether to sort in descending order
+        memory_limit -- (int) roughly how many bytes of lines are held in 
+                        memory at once
+        max_workers -- (int) how many runs are sorted at the same time, in 
+                       worker processes. If it's more than 1, then key has to
+                       be picklable.
+        temporary_directory -- (str) where to write the runs. If None, then
+                               the output's directory is used.
+        
+        Return Value:
+        (File) the output file.
+        
+        """
+        output_path = output.path if isinstance(output, File) else output
+        sorting.sort_file(
+            self.path, output_path, key=key, reverse=reverse, 
+            memory_limit=memory_limit, max_workers=max_workers, 
+            temporary_directory=temporary_directory
+        )
+        
+        if isinstance(output, File):
+            output._invalidate_stat()
+            return output
+        
+        return File(output_path)
+    
+    def equals(self, other, shallow=False, cache=None):
+        """
+        Determine if another file has the same contents as this one
+        
+        The checks go from the cheapest to the most expensive, and stop as 
+        soon as there is an answer: the same inode, different sizes, cached 
+        digests (if both files have one), a few sampled blocks (at the start,
+        the middle, and the end), and finally reading both files in lockstep,
+        in large chunks.
+        
+        Parameters:
+        other -- (File or str) the other file (or its path)
+        shallow -- (bool) if True, then files with the same size and 
+                   modification time are considered equal without reading 
+                   them (like filecmp.cmp()).
+        cache -- (DigestCache or bool) the digest cache to look the SHA-256 
+                 digests of the files up in (see .hash()). If None, then the 
+                 cache shared by the whole process is used. If False, then no
+                 cache is used.
+        
+        Return Value:
+        (bool)
+        
+        """
+        other_path = other.path if isinstance(other, File) else other
+        
+        return comparing.files_equal(
+            self.path, other_path, shallow=shallow, cache=cache
+        )
+    
+    def mmap(self, access="read", offset=0, length=None, advice=None):
+        """
+        Memory-map the file (or a part of it)
+        
+        Unlike seeking and reading, slicing a memory-mapped file doesn't make
+        a system call or copy any data, which makes it well suited to random
+        access into large files.
+        
+        Parameters:
+        access -- (str) "read" for read-only access, "write" for changes that
+                  are written through to the file, or "copy" for changes that
+                  are only made in memory (copy-on-write).
+        offset -- (int) where the mapping starts in the file. It doesn't need
+                  to be aligned to the page size.
+        length -- (int) how many bytes to map. If None, then everything from 
+                  the offset to the end of the file is mapped.
+        advice -- (str) a hint (passed on to the kernel with madvise) of how 
+                  the mapping will be used: "normal", "sequential", "random",
+                  "willneed", or "dontneed".
+        
+        Return Value:
+        (context manager) gives an (mmap, memoryview) tuple, where the 
+        memoryview covers exactly the requested range. Any memoryviews taken
+        from it should be released before the context manager exits.
+        
+        """
+        return reading.map_file(
+            self.path, access=access, offset=offset, length=length, 
+            advice=advice
+        )
+    
+    def hash(self, algorithm="sha256", cache=None):
+        """
+        Hash the file's contents
+        
+        The digest is cached (keyed on the file's device, inode, size, and 
+        modification time), so hashing an unchanged file again is almost 
+        free. The file is hashed in large chunks, without holding the GIL, 
+        so files can be hashed concurrently from different threads.
+        
+        Parameters:
+        algorithm -- (str) the name of any algorithm supported by 
+                     hashlib.new()
+        cache -- (DigestCache or bool) the cache to use. If None, then a cache
+                 that is shared by the whole process (only kept in memory,
+                 and bounded to the most recently used digests) is used. 
+                 Pass a DigestCache with an index path to keep the digests 
+                 between runs, or False to not cache anything.
+        
+        Return Value:
+        (str) the hexadecimal digest.
+        
+        """
+        return hashing.hash_file(self.path, algorithm=algorithm, cache=cache)
+    
     # Private Methods
-    def _execute_rename(self, directory, new_file_name=None,
-                        replace_existing_file=False):
+    @classmethod
+    def _from_dir_entry(cls, entry, stat_ttl=None):
         """
-        Execute a file rename (or move) operation
+        Construct the object from an os.DirEntry (as yielded by os.scandir)
         
-        This method was created to contain the common code between the .rename()
-        and .move() methods because they share a lot of the same logic.
+        The path is not checked (as it is by the constructor) since the entry
+        already tells what type it is, and the entry's (cached) metadata is
+        used for the first read of the metadata -- so no extra system calls
+        are made unless the metadata is actually needed. With a stat_ttl, it
+        becomes the object's first snapshot (which expires like any other).
+        Without one, it's only used once, since a snapshot that never expires
+        would be one that was never asked for.
+        
+        Parameters:
+        entry -- (os.DirEntry) the entry of the file
+        stat_ttl -- (int or float) see the constructor
+        
+        Return Value:
+        (File)
+        
+        """
+        obj = cls.__new__(cls)
+        # The entry's path is the (already normalized) path of the directory 
+        # that was scanned joined with a name, so it is normalized as well.
+        obj._path = entry.path
+        obj._stat_ttl = stat_ttl
+        obj._invalidate_stat()
+        obj._dir_entry = entry
+        return obj
+    
+    @staticmethod
+    def _raise_if_directory(path):
+        """
+        Raise an IsADirectoryError if the path refers to an existing directory
+        
+        Only one os.stat() call is made, rather than one call to check if the
+        path exists and another to check if it is a directory.
+        
+        Parameters:
+        path -- (str) the path to check
+        
+        """
+        try:
+            path_is_a_directory = stat.S_ISDIR(os.stat(path).st_mode)
+        except (OSError, ValueError):
+            # The path does not exist (or cannot be accessed)
+            path_is_a_directory = False
+        
+        if path_is_a_directory:
+            raise IsADirectoryError("The path refers to a directory")
+        
+        return
+    
+    def _stat_is_valid(self):
+        """
+        Determine if there is a metadata snapshot that has not expired yet
+        
+        Return Value:
+        (bool)
+        
+        """
+        if self._stat_taken_on is None:
+            return False
+        elif self._stat_ttl is None:
+            return True
+        
+        age = time.monotonic() - self._stat_taken_on
+        return bool(age <= self._stat_ttl)
+    
+    def _get_stat_result(self, must_exist=False):
+        """
+        Get the file's metadata, from the snapshot if it is still valid
+        
+        When there is no valid snapshot, a fresh os.stat() call is made, but
+        its result is not stored. Snapshots are only ever taken explicitly
+        (through .stat() or .refresh()) so that the properties keep reflecting
+        the file system when no snapshot was asked for.
+        
+        Parameters:
+        must_exist -- (bool) if True, a FileNotFoundError is raised when the
+                      file does not exist. If False, None is returned instead.
+        
+        Return Value:
+        (os.stat_result or None)
+        
+        """
+        if self._dir_entry is not None and self._stat_taken_on is None:
+            if self._stat_ttl is None:
+                stat_result = self._pop_dir_entry_stat()
+            else:
+                self._take_snapshot_from_dir_entry()
+                stat_result = self._stat_result
+        elif self._stat_is_valid():
+            stat_result = self._stat_result
+        else:
+            try:
+                stat_result = os.stat(self.path)
+            except OSError:
+                if must_exist:
+                    raise
+                stat_result = None
+        
+        if stat_result is None and must_exist:
+            raise FileNotFoundError(
+                "No such file: '{path}'".format(path=self.path)
+            )
+        
+        return stat_result
+    
+    def _take_snapshot_from_dir_entry(self):
+        """Take the first snapshot from the os.DirEntry the object came from"""
+        self._stat_result = self._pop_dir_entry_stat()
+        self._stat_taken_on = time.monotonic()
+        return
+    
+    def _pop_dir_entry_stat(self):
+        """
+        Get the metadata of the os.DirEntry the object came from, and let go
+        of the entry
+        
+        Return Value:
+        (os.stat_result or None) None if the file doesn't exist (anymore).
+        
+        """
+        entry, self._dir_entry = self._dir_entry, None
+        try:
+            return entry.stat()
+        except OSError:
+            return None
+    
+    def _invalidate_stat(self):
+        """Discard the metadata snapshot (if any)"""
+        self._stat_result = None
+        self._stat_taken_on = None
+        self._dir_entry = None
+        return
+    
+    def _get_new_file_path(self, directory, new_file_name=None,
+                           replace_existing_file=False):
+        """
+        Get (and validate) the path the file will have after it is copied, 
+        moved, or renamed
         
         Parameters:
         directory -- (str) the directory the file should be in
-        new_file_name -- (str) the file's name will be renamed to 
-                         this. This should just be the new name of the file
-                         (including any file extensions), so no paths.
-        replace_existing_file -- (bool) if the path of the new file name already
-                                 exists, then this variable determines what 
-                                 action to take. If False, then a 
-                                 FileExistsError is raised. If True, then the
-                                 existing file gets replaced with this one.
+        new_file_name -- (str) the file's new name. This should just be the new
+                         name of the file (including any file extensions), so
+                         no paths. If not given, the current name is kept.
+        replace_existing_file -- (bool) if False, then an exception is raised
+                                 if the new path already exists.
+        
+        Return Value:
+        (str)
         
         """
         # Initialize these for later (conditional) use
@@ -463,27 +1108,61 @@ class File(_BaseFileAndDirectoryInterface):
             path_refers_to_file = os.path.isfile(new_file_path)
             path_refers_to_directory = os.path.isdir(new_file_path)
         
-        if path_already_exists and not replace_existing_file:
+        if path_already_exists and path_refers_to_directory:
+            raise IsADirectoryError(
+                "A directory with the chosen file name already exists"
+            )
+        elif path_already_exists and not replace_existing_file:
             if path_refers_to_file:
                 raise FileExistsError(
-                    "Cannot rename the file because a file with the chosen name"
-                    " already exists"
+                    "A file with the chosen file name already exists"
                 )
-            elif path_refers_to_directory:
-                raise IsADirectoryError(
-                    "Cannot rename the file because a directory with the chosen"
-                    " name already exists"
-                )   
         
-        elif path_already_exists and replace_existing_file:
-            # os.replace() is the Python-recommended way of doing cross-platform
-            # file replaces, rather than os.rename().
-            os.replace(self.path, new_file_path)
+        return new_file_path
+    
+    def _execute_rename(self, directory, new_file_name=None,
+                        replace_existing_file=False):
+        """
+        Execute a file rename (or move) operation
         
-        else:
-            # Perform a simple "rename" operation since the new file path does
-            # not already exist.
-            os.rename(self.path, new_file_path)           
+        This method was created to contain the common code between the .rename()
+        and .move() methods because they share a lot of the same logic.
+        
+        Parameters:
+        directory -- (str) the directory the file should be in
+        new_file_name -- (str) the file's name will be renamed to 
+                         this. This should just be the new name of the file
+                         (including any file extensions), so no paths.
+        replace_existing_file -- (bool) if the path of the new file name already
+                                 exists, then this variable determines what 
+                                 action to take. If False, then a 
+                                 FileExistsError is raised. If True, then the
+                                 existing file gets replaced with this one.
+        
+        """
+        new_file_path = self._get_new_file_path(
+            directory, new_file_name=new_file_name,
+            replace_existing_file=replace_existing_file
+        )
+        path_already_exists = os.path.exists(new_file_path)
+        
+        try:
+            if path_already_exists and replace_existing_file:
+                # os.replace() is the Python-recommended way of doing 
+                # cross-platform file replaces, rather than os.rename().
+                os.replace(self.path, new_file_path)
+            
+            else:
+                # Perform a simple "rename" operation since the new file path
+                # does not already exist.
+                os.rename(self.path, new_file_path)           
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            
+            # The new path is on another file system, so the file can't just
+            # be renamed. It has to be copied over, and then removed.
+            transfer.move_file_across_file_systems(self.path, new_file_path)
                     
         # Update the path
         self.path = new_file_path        
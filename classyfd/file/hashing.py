@@ -0,0 +1,524 @@
+"""
+Contains the logic for hashing files, with cached digests
+
+Files are streamed through hashlib in large chunks (read into a pooled
+buffer), and hashlib releases the GIL while it hashes a chunk, so several
+files can be hashed at the same time by different threads.
+
+Since verifying the same files again and again is common, digests are kept
+in a cache keyed on the file's device, inode, size, and modification time,
+so an unchanged file is never hashed twice (the cache shared by the whole
+process only keeps the most recently used digests). Like any cache keyed on
+the modification time, it can be fooled by a file that is rewritten (to the
+same size) within the file system's timestamp granularity, or whose
+modification time is set back on purpose.
+
+Many files can be hashed at once with hash_files(), which spreads them over
+a pool of threads (or processes, when there are so many small files that
+Python itself becomes the bottleneck). The largest files are started first,
+so that one huge file doesn't start last and hold everything up, and small
+files are hashed in batches, so that the overhead of each task (which is
+significant for processes) is paid per batch rather than per file.
+
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from concurrent.futures import (
+    ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+)
+
+from . import reading
+from .. import config
+
+
+# Files smaller than this (in bytes) are hashed in batches
+_SMALL_FILE_SIZE = 1024 * 1024
+
+# The maximum amount of bytes (and files) in a batch
+_MAX_BATCH_SIZE = 16 * 1024 * 1024
+_MAX_BATCH_FILES = 512
+
+# How many digests the cache shared by the whole process keeps at most
+_DEFAULT_CACHE_MAX_ENTRIES = 100000
+
+
+class DigestCache:
+    """
+    A store of file digests, keyed on (st_dev, st_ino, st_size, st_mtime_ns)
+
+    """
+    def __init__(self, index_path=":memory:", max_entries=None):
+        """
+        Open (or create) a digest cache
+
+        Parameters:
+        index_path -- (str) the path of the cache's index file (an SQLite
+                      database). If it's ":memory:", then the cache is only
+                      kept in memory.
+        max_entries -- (int) if given, then the least recently used digests
+                       are evicted to keep the cache at this many digests at
+                       most. Otherwise, the cache grows without bound.
+
+        """
+        if max_entries is not None and max_entries <= 0:
+            raise ValueError("max_entries should be more than 0")
+
+        if index_path != ":memory:":
+            index_path = os.path.abspath(index_path)
+
+        self._index_path = index_path
+        self._max_entries = max_entries
+        # The connection is shared by every thread (behind a lock), since
+        # files are commonly hashed from many threads at once.
+        self._connection = sqlite3.connect(
+            index_path, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        with self._connection:
+            # There is only one row per file (and algorithm), so the stale
+            # digests of modified files are replaced rather than piling up.
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS digests ("
+                "device INTEGER NOT NULL, inode INTEGER NOT NULL, "
+                "algorithm TEXT NOT NULL, size INTEGER NOT NULL, "
+                "mtime_ns INTEGER NOT NULL, digest TEXT NOT NULL, "
+                "last_used INTEGER NOT NULL, "
+                "PRIMARY KEY (device, inode, algorithm)) WITHOUT ROWID"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS digests_last_used "
+                "ON digests (last_used)"
+            )
+            last_used, entry_count = self._connection.execute(
+                "SELECT MAX(last_used), COUNT(*) FROM digests"
+            ).fetchone()
+
+        # A counter (rather than a timestamp), so that the order of use is
+        # exact. The amount of entries is tracked, so that a bounded cache
+        # doesn't have to count them on every insert.
+        self._last_used = last_used or 0
+        self._entry_count = entry_count
+
+        return
+
+    # Special Methods
+    def __repr__(self):
+        """Get the official string representation"""
+        repr_ = (
+            "{class_name}(\"{path}\")"
+            .format(class_name=DigestCache.__name__, path=self.index_path)
+        )
+        return repr_
+
+    def __len__(self):
+        """Get the amount of digests in the cache"""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM digests"
+            ).fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return
+
+    # Properties
+    @property
+    def index_path(self):
+        """
+        Get the path of the cache's index file
+
+        Return Value:
+        (str)
+
+        """
+        return self._index_path
+
+    @property
+    def max_entries(self):
+        """
+        Get the maximum amount of digests the cache keeps
+
+        Return Value:
+        (int or None) None means there is no maximum.
+
+        """
+        return self._max_entries
+
+    # Regular Methods
+    def get(self, stat_result, algorithm):
+        """
+        Get the cached digest of a file
+
+        Parameters:
+        stat_result -- (os.stat_result) the file's current stat result
+        algorithm -- (str) the name of the hash algorithm
+
+        Return Value:
+        (str or None) the hexadecimal digest, or None if there is no digest
+        for the file as it is now.
+
+        """
+        key = (stat_result.st_dev, stat_result.st_ino, algorithm)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT digest FROM digests WHERE device = ? AND inode = ? "
+                "AND algorithm = ? AND size = ? AND mtime_ns = ?",
+                key + (stat_result.st_size, stat_result.st_mtime_ns)
+            ).fetchone()
+            if row is not None and self._max_entries is not None:
+                # Only a bounded cache needs to know what was used recently
+                with self._connection:
+                    self._connection.execute(
+                        "UPDATE digests SET last_used = ? WHERE device = ? "
+                        "AND inode = ? AND algorithm = ?",
+                        (self._next_last_used(),) + key
+                    )
+
+        return None if row is None else row[0]
+
+    def set(self, stat_result, algorithm, digest):
+        """
+        Cache the digest of a file
+
+        Parameters:
+        stat_result -- (os.stat_result) the file's stat result, from when it
+                       was hashed
+        algorithm -- (str) the name of the hash algorithm
+        digest -- (str) the hexadecimal digest
+
+        """
+        key = (stat_result.st_dev, stat_result.st_ino, algorithm)
+        with self._lock, self._connection:
+            is_new = self._connection.execute(
+                "SELECT 1 FROM digests WHERE device = ? AND inode = ? "
+                "AND algorithm = ?",
+                key
+            ).fetchone() is None
+            self._connection.execute(
+                "INSERT OR REPLACE INTO digests "
+                "(device, inode, algorithm, size, mtime_ns, digest, "
+                "last_used) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                key + (stat_result.st_size, stat_result.st_mtime_ns, digest,
+                       self._next_last_used())
+            )
+            if is_new:
+                self._entry_count += 1
+
+            excess = (
+                0 if self._max_entries is None
+                else self._entry_count - self._max_entries
+            )
+            if excess > 0:
+                self._connection.execute(
+                    "DELETE FROM digests WHERE (device, inode, algorithm) IN "
+                    "(SELECT device, inode, algorithm FROM digests "
+                    "ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+                self._entry_count -= excess
+
+        return
+
+    def clear(self):
+        """Remove every digest from the cache"""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM digests")
+            self._entry_count = 0
+
+        return
+
+    def close(self):
+        """Close the cache's index file"""
+        with self._lock:
+            self._connection.close()
+
+        return
+
+    # Private Methods
+    def _next_last_used(self):
+        """Get the value that marks a digest as the most recently used one"""
+        self._last_used += 1
+        return self._last_used
+
+
+def hash_file(path, algorithm="sha256", cache=None):
+    """
+    Hash a file's contents
+
+    Parameters:
+    path -- (str) the path of the file
+    algorithm -- (str) the name of any algorithm supported by hashlib.new()
+    cache -- (DigestCache or bool) the cache to look the digest up in (and to
+             store it in). If None, then a cache that is shared by the whole
+             process is used (which is only kept in memory, and only keeps
+             the most recently used digests). If False, then nothing is
+             cached.
+
+    Return Value:
+    (str) the hexadecimal digest.
+
+    """
+    if cache is None:
+        cache = _get_default_cache()
+
+    # Fail early (with a ValueError) on an unsupported algorithm
+    hashlib.new(algorithm)
+
+    if cache is not False:
+        digest = cache.get(os.stat(path), algorithm)
+        if digest is not None:
+            return digest
+
+    digest, stat_result = _hash_path(path, algorithm)
+    if cache is not False and stat_result is not None:
+        cache.set(stat_result, algorithm, digest)
+
+    return digest
+
+
+def hash_files(files, algorithm="sha256", cache=None, max_workers=None,
+               use_processes=False, on_error=None):
+    """
+    Hash many files in parallel
+
+    Parameters:
+    files -- (iterable of File or str) the files (or their paths)
+    algorithm -- (str) the name of any algorithm supported by hashlib.new()
+    cache -- (DigestCache or bool) see hash_file(). Only the calling process
+             uses the cache, so it works with use_processes as well.
+    max_workers -- (int) the amount of worker threads (or processes). If 
+                   None, then there is one process per CPU, or the default
+                   amount of threads.
+    use_processes -- (bool) whether to hash in worker processes rather than
+                     threads. hashlib doesn't hold the GIL while it hashes a
+                     large chunk, so threads are enough for large files, but
+                     hashing lots of small files is bound by the interpreter.
+    on_error -- (function) if given, it is called with the OSError raised
+                when a file can't be hashed (which is then skipped).
+                Otherwise, the error is raised.
+
+    Return Value:
+    (generator) yields a (file, digest) tuple for each file (where file is
+    what was given), in the order they are hashed. The digests found in the
+    cache are yielded first.
+
+    """
+    files = list(files)
+    paths = [
+        file_ if isinstance(file_, str) else file_.path for file_ in files
+    ]
+    with ThreadPoolExecutor(max_workers=config._MAX_WORKERS) as executor:
+        stat_results = list(executor.map(_stat_or_error, paths))
+
+    items = zip(files, paths, stat_results)
+    return _hash_items(
+        items, algorithm, cache, max_workers, use_processes, on_error
+    )
+
+
+# Private Functions
+def _hash_items(items, algorithm, cache, max_workers, use_processes,
+                on_error):
+    """
+    Hash many files in parallel
+
+    Parameters:
+    items -- (iterable) (key, path, stat_result) tuples. key is what is 
+             yielded with the digest, and stat_result may be the OSError that
+             was raised when the file was stat'ed.
+    See hash_files() for the rest.
+
+    Return Value:
+    (generator) yields (key, digest) tuples.
+
+    """
+    if cache is None:
+        cache = _get_default_cache()
+    if max_workers is None:
+        max_workers = (
+            (os.cpu_count() or 1) if use_processes else config._MAX_WORKERS
+        )
+
+    # Fail early (with a ValueError) on an unsupported algorithm
+    hashlib.new(algorithm)
+
+    pending_items = []
+    for key, path, stat_result in items:
+        if isinstance(stat_result, OSError):
+            _handle_error(stat_result, on_error)
+            continue
+        elif cache is not False:
+            digest = cache.get(stat_result, algorithm)
+            if digest is not None:
+                yield (key, digest)
+                continue
+
+        pending_items.append((key, path, stat_result))
+
+    if not pending_items:
+        return
+
+    executor_class = (
+        ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    )
+    with executor_class(max_workers=max_workers) as executor:
+        batches = {}
+        for batch in _make_batches(pending_items):
+            paths = [path for _, path, _ in batch]
+            batches[executor.submit(_hash_batch, paths, algorithm)] = batch
+
+        try:
+            for future in as_completed(batches):
+                batch = batches.pop(future)
+                for (key, _, _), result in zip(batch, future.result()):
+                    digest, stat_result, error = result
+                    if error is not None:
+                        _handle_error(error, on_error)
+                        continue
+                    elif cache is not False and stat_result is not None:
+                        cache.set(stat_result, algorithm, digest)
+
+                    yield (key, digest)
+        finally:
+            # Don't start on what is left if the caller stopped early (or an
+            # error was raised)
+            for future in batches:
+                future.cancel()
+
+    return
+
+
+def _make_batches(items):
+    """
+    Split files into batches, the largest files first
+
+    Parameters:
+    items -- (list) (key, path, stat_result) tuples
+
+    Return Value:
+    (list) contains lists of items. Large files are in a batch of their own.
+
+    """
+    items = sorted(items, key=lambda item: item[2].st_size, reverse=True)
+
+    batches = []
+    batch = []
+    batch_size = 0
+    for item in items:
+        size = item[2].st_size
+        if size >= _SMALL_FILE_SIZE:
+            batches.append([item])
+            continue
+
+        is_full = bool(
+            batch_size + size > _MAX_BATCH_SIZE or
+            len(batch) == _MAX_BATCH_FILES
+        )
+        if is_full:
+            batches.append(batch)
+            batch = []
+            batch_size = 0
+
+        batch.append(item)
+        batch_size += size
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
+def _hash_batch(paths, algorithm):
+    """
+    Hash a batch of files (in a worker thread or process)
+
+    Return Value:
+    (list) contains a (digest, stat_result, error) tuple for each file. See
+    _hash_path() for the first two, and error is the OSError raised (if
+    any).
+
+    """
+    results = []
+    for path in paths:
+        try:
+            digest, stat_result = _hash_path(path, algorithm)
+        except OSError as e:
+            results.append((None, None, e))
+        else:
+            results.append((digest, stat_result, None))
+
+    return results
+
+
+def _hash_path(path, algorithm):
+    """
+    Hash a file
+
+    Return Value:
+    (tuple) the hexadecimal digest, and the file's stat result. The stat
+    result is None if the file changed while it was being hashed (in which
+    case the digest shouldn't be cached).
+
+    """
+    stat_result = os.stat(path)
+    hash_ = hashlib.new(algorithm)
+    for chunk in reading.iter_chunks(path):
+        hash_.update(chunk)
+
+    if _stat_key(os.stat(path)) != _stat_key(stat_result):
+        stat_result = None
+
+    return (hash_.hexdigest(), stat_result)
+
+
+def _stat_or_error(path):
+    """
+    Stat a file
+
+    Return Value:
+    (os.stat_result or OSError) the stat result, or the error raised.
+
+    """
+    try:
+        return os.stat(path)
+    except OSError as e:
+        return e
+
+
+def _handle_error(error, on_error):
+    """Hand an error to the on_error function (or raise it if there is none)"""
+    if on_error is None:
+        raise error
+
+    on_error(error)
+    return
+
+
+def _stat_key(stat_result):
+    """Get what identifies a version of a file from its stat result"""
+    return (
+        stat_result.st_dev, stat_result.st_ino, stat_result.st_size,
+        stat_result.st_mtime_ns
+    )
+
+
+def _get_default_cache():
+    """Get (or create) the digest cache shared by the whole process"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = DigestCache(
+                max_entries=_DEFAULT_CACHE_MAX_ENTRIES
+            )
+
+    return _default_cache
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
@@ -0,0 +1,432 @@
+"""
+Contains the logic for counting and indexing the lines of a file
+
+Counting lines is done in large chunks, each read (with pread) into a pooled
+buffer and counted there with bytearray.count(), which runs at memchr speed.
+The chunks are spread over a few threads, so that reading one chunk overlaps
+with counting another. There are never more threads than the buffer pool
+keeps buffers of one size, so every chunk reuses a pooled buffer and memory
+stays at a few chunks.
+
+To jump to a line without reading everything before it, a line index can be
+built: the byte offset of every Nth line, stored as a compact array('Q') in
+a sidecar file next to the file. Reading line n then only means seeking to
+the closest indexed line before it and skipping fewer than N lines.
+
+To process the lines of a huge file on every core, map_lines() splits the
+file into ranges that start and end on line boundaries, and hands each range
+to a worker process, which memory-maps just its own range.
+
+"""
+
+import array
+import collections
+import functools
+import os
+import re
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+)
+
+from . import reading, writing
+
+
+# The suffix of a line index's sidecar file (when no path is given for it)
+INDEX_SUFFIX = ".lineindex"
+
+# How many lines apart the indexed lines are (when not given)
+DEFAULT_INDEX_INTERVAL = 1000
+
+# The size of the chunks a file is split into (to be counted in parallel)
+_COUNT_CHUNK_SIZE = 16 * 1024 * 1024
+
+# The size of the ranges a file is split into by map_lines() (when not given)
+DEFAULT_MAP_RANGE_SIZE = 32 * 1024 * 1024
+
+# The first value in a line index (it's changed when the format is)
+_INDEX_VERSION = 1
+
+# The header of a line index is: the version, the interval, the size and
+# modification time of the file it's for, and the amount of lines.
+_HEADER_LENGTH = 5
+
+
+def count_lines(path, max_workers=None):
+    """
+    Count the lines in a file
+
+    Parameters:
+    path -- (str) the path of the file
+    max_workers -- (int) the amount of worker threads. Each one holds a
+                   chunk in memory, so there are never more than the buffer
+                   pool keeps (which is also the default).
+
+    Return Value:
+    (int) the amount of newline characters, plus 1 if the file doesn't end
+    with one (and isn't empty).
+
+    """
+    if max_workers is not None and max_workers <= 0:
+        raise ValueError("max_workers should be more than 0")
+
+    max_pooled_buffers = reading._buffer_pool.max_buffers_per_size
+    if max_workers is None:
+        max_workers = max_pooled_buffers
+    max_workers = min(max_workers, max_pooled_buffers)
+
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        file_size = os.fstat(fd).st_size
+        offsets = range(0, file_size, _COUNT_CHUNK_SIZE)
+        if len(offsets) <= 1:
+            newline_count = sum(_count_newlines(fd, o) for o in offsets)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                newline_count = sum(
+                    executor.map(functools.partial(_count_newlines, fd),
+                                 offsets)
+                )
+
+        if file_size and _read_last_byte(fd, file_size) != b"\n":
+            newline_count += 1
+    finally:
+        os.close(fd)
+
+    return newline_count
+
+
+def build_line_index(path, index_path=None,
+                     interval=DEFAULT_INDEX_INTERVAL):
+    """
+    Build a line index of a file, and save it to a sidecar file
+
+    Parameters:
+    path -- (str) the path of the file
+    index_path -- (str) where to save the index. If None, then it's saved
+                  next to the file (with INDEX_SUFFIX added to its name).
+    interval -- (int) how many lines apart the indexed lines are. A smaller
+                interval makes reading a line faster, and the index bigger
+                (8 bytes per indexed line).
+
+    Return Value:
+    (int) the amount of lines in the file.
+
+    """
+    if interval <= 0:
+        raise ValueError("interval should be more than 0")
+
+    if index_path is None:
+        index_path = path + INDEX_SUFFIX
+
+    stat_result = os.stat(path)
+    offsets = array.array("Q")
+    line_count = 0
+    with reading.map_file(path, advice="sequential") as (mapping, view):
+        if mapping is not None:
+            # One match of this pattern covers interval lines, so the regular
+            # expression engine does the scanning and Python only loops once
+            # per indexed line.
+            pattern = re.compile(
+                b"(?:[^\n]*\n){" + str(interval).encode() + b"}"
+            )
+            position = 0
+            while position < len(mapping):
+                offsets.append(position)
+                match = pattern.match(mapping, position)
+                if match is None:
+                    break
+                position = match.end()
+                line_count += interval
+
+            if position < len(mapping):
+                tail_newlines = mapping[position:].count(b"\n")
+                line_count += tail_newlines
+                if mapping[-1:] != b"\n":
+                    line_count += 1
+
+    header = array.array(
+        "Q",
+        (_INDEX_VERSION, interval, stat_result.st_size,
+         stat_result.st_mtime_ns, line_count)
+    )
+    writing.write_atomic(index_path, (header.tobytes(), offsets.tobytes()))
+
+    return line_count
+
+
+def read_line(path, line_number, index_path=None):
+    """
+    Read a line of a file
+
+    Parameters:
+    path -- (str) the path of the file
+    line_number -- (int) the (0-based) number of the line
+    index_path -- (str) where the file's line index is (see
+                  build_line_index()). If there is no index there (or it's
+                  out of date), then the file is read from the start.
+
+    Return Value:
+    (bytes) the line, including its newline character (if it has one).
+
+    """
+    if line_number < 0:
+        raise IndexError("line_number should be 0 or more")
+
+    if index_path is None:
+        index_path = path + INDEX_SUFFIX
+
+    offset = 0
+    lines_to_skip = line_number
+    index = _load_line_index(path, index_path)
+    if index is not None:
+        interval, line_count, offsets = index
+        if line_number >= line_count:
+            raise IndexError("The file doesn't have that many lines")
+        offset = offsets[line_number // interval]
+        lines_to_skip = line_number % interval
+
+    with open(path, mode="rb") as f:
+        f.seek(offset)
+        for i in range(lines_to_skip):
+            if not f.readline():
+                break
+        line = f.readline()
+
+    if not line:
+        raise IndexError("The file doesn't have that many lines")
+
+    return line
+
+
+def map_lines(path, function, max_workers=None, ordered=True, reduce=None,
+              range_size=DEFAULT_MAP_RANGE_SIZE):
+    """
+    Call a function with every line of a file, in parallel worker processes
+
+    Parameters:
+    path -- (str) the path of the file
+    function -- (function) called with each line (bytes, including its
+                newline character). It's called in another process, so it
+                (and what it returns) has to be picklable, e.g., a function
+                defined at the top level of a module.
+    max_workers -- (int) the amount of worker processes. If None, then there
+                   is one per CPU.
+    ordered -- (bool) if True, then the results are yielded (or combined) in
+               the order of the lines. Otherwise, the results of each range
+               are yielded as soon as the range is done (which keeps the
+               workers busy when some ranges take longer than others).
+    reduce -- (function) if given, then the results are combined with it
+              (like functools.reduce()), first within each worker and then
+              across the ranges, and only the final value is returned. This
+              saves sending every result back from the workers.
+    range_size -- (int) the (approximate) size of the ranges, in bytes
+
+    Return Value:
+    (generator or object) yields the result of each line. If reduce is given,
+    then the combined result is returned instead (None for an empty file).
+
+    """
+    if range_size <= 0:
+        raise ValueError("range_size should be more than 0")
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    ranges = _split_into_line_ranges(path, range_size)
+    results = _map_ranges(
+        path, ranges, function, reduce, max_workers, ordered
+    )
+    if reduce is None:
+        return _flatten(results)
+
+    range_results = [
+        combined_result for has_lines, combined_result in results if has_lines
+    ]
+
+    return functools.reduce(reduce, range_results) if range_results else None
+
+
+# Private Functions
+def _split_into_line_ranges(path, range_size):
+    """
+    Split a file into byte ranges that start and end on line boundaries
+
+    Return Value:
+    (list) contains (start, end) tuples, in order.
+
+    """
+    ranges = []
+    with reading.map_file(path) as (mapping, view):
+        file_size = len(view)
+        start = 0
+        while start < file_size:
+            newline_index = -1
+            if start + range_size < file_size:
+                newline_index = mapping.find(b"\n", start + range_size - 1)
+            end = file_size if newline_index == -1 else newline_index + 1
+            ranges.append((start, end))
+            start = end
+
+    return ranges
+
+
+def _map_ranges(path, ranges, function, reduce, max_workers, ordered):
+    """
+    Map the lines of each range in a pool of worker processes
+
+    Only a few ranges per worker are in flight at a time, so that the results
+    can't pile up (in memory) faster than they are consumed.
+
+    Return Value:
+    (generator) yields the result of each range (see _map_range()).
+
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending_ranges = iter(ranges)
+        futures = collections.deque()
+
+        def submit_next():
+            for start, end in pending_ranges:
+                futures.append(
+                    executor.submit(
+                        _map_range, path, start, end, function, reduce
+                    )
+                )
+                return True
+
+            return False
+
+        try:
+            for i in range(max_workers * 2):
+                if not submit_next():
+                    break
+
+            while futures:
+                if ordered:
+                    done_futures = [futures.popleft()]
+                else:
+                    done_futures, _ = wait(
+                        futures, return_when=FIRST_COMPLETED
+                    )
+                    for future in done_futures:
+                        futures.remove(future)
+
+                for future in done_futures:
+                    result = future.result()
+                    submit_next()
+                    yield result
+        finally:
+            for future in futures:
+                future.cancel()
+
+    return
+
+
+def _map_range(path, start, end, function, reduce):
+    """
+    Map the lines of a range of a file (in a worker process)
+
+    Return Value:
+    (list or tuple) the results of the lines. If reduce is given, then a
+    tuple of whether the range has any lines and their combined result.
+
+    """
+    results = []
+    has_lines = False
+    combined_result = None
+    with reading.map_file(path, offset=start, length=end - start,
+                          advice="sequential") as (mapping, view):
+        # The mapping starts on an allocation boundary, so it may start a
+        # little before the range does.
+        mapping.seek(len(mapping) - len(view))
+        for line in iter(mapping.readline, b""):
+            result = function(line)
+            if reduce is None:
+                results.append(result)
+            elif has_lines:
+                combined_result = reduce(combined_result, result)
+            else:
+                combined_result = result
+                has_lines = True
+
+    return results if reduce is None else (has_lines, combined_result)
+
+
+def _flatten(results):
+    """Yield every item of every list"""
+    for result in results:
+        for item in result:
+            yield item
+
+    return
+
+
+def _count_newlines(fd, offset):
+    """Count the newline characters in a chunk of a file"""
+    buffer = reading._buffer_pool.acquire(_COUNT_CHUNK_SIZE)
+    try:
+        size = reading._pread_full(fd, memoryview(buffer), offset)
+        newline_count = buffer.count(b"\n", 0, size)
+    finally:
+        reading._buffer_pool.release(buffer)
+
+    return newline_count
+
+
+def _read_last_byte(fd, file_size):
+    """Read the last byte of a file"""
+    last_byte = bytearray(1)
+    reading._pread_full(fd, memoryview(last_byte), file_size - 1)
+    return bytes(last_byte)
+
+
+def _load_line_index(path, index_path):
+    """
+    Load a file's line index (if it has an up to date one)
+
+    Return Value:
+    (tuple or None) the interval, the amount of lines, and the offsets
+    (array). None is returned if there is no index, or if it's out of date.
+
+    """
+    try:
+        index_stat_result = os.stat(index_path)
+    except FileNotFoundError:
+        return None
+
+    index = _read_line_index(
+        index_path, index_stat_result.st_size, index_stat_result.st_mtime_ns
+    )
+    if index is None:
+        return None
+
+    stat_result = os.stat(path)
+    size, mtime_ns, interval, line_count, offsets = index
+    is_up_to_date = bool(
+        size == stat_result.st_size and mtime_ns == stat_result.st_mtime_ns
+    )
+
+    return (interval, line_count, offsets) if is_up_to_date else None
+
+
+@functools.lru_cache(maxsize=8)
+def _read_line_index(index_path, index_size, index_mtime_ns):
+    """
+    Read a line index file (the size and modification time of the file are
+    only there so that a changed index isn't read from the cache)
+
+    Return Value:
+    (tuple or None) the size and modification time of the file it's for, the
+    interval, the amount of lines, and the offsets (array). None is returned
+    if it isn't a line index (of this version).
+
+    """
+    values = array.array("Q")
+    with open(index_path, mode="rb") as f:
+        values.frombytes(f.read())
+
+    if len(values) < _HEADER_LENGTH or values[0] != _INDEX_VERSION:
+        return None
+
+    version, interval, size, mtime_ns, line_count = values[:_HEADER_LENGTH]
+
+    return (size, mtime_ns, interval, line_count, values[_HEADER_LENGTH:])
@@ -0,0 +1,411 @@
+"""
+Contains the logic for reading files efficiently
+
+Reading a file with f.read(size) in a loop allocates a new bytes object for
+every chunk. Here, the chunks are read straight into a reusable buffer with
+readinto() (on an unbuffered file, so the data isn't copied through Python's
+own buffer first either) and handed out as memoryview slices of it.
+
+For random access, files can be memory-mapped instead, so that any part of
+them can be sliced without a system call or a copy. Or many ranges can be
+read at once with read_ranges(), which merges nearby ranges and reads them
+with positional reads (no seeking) straight into a single buffer.
+
+"""
+
+import contextlib
+import mmap
+import os
+import threading
+
+
+# The chunk size used when none is given
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Maps the access modes accepted by map_file() to the mmap module's constants
+_MMAP_ACCESS_MODES = {
+    "read": mmap.ACCESS_READ,
+    "write": mmap.ACCESS_WRITE,
+    "copy": mmap.ACCESS_COPY,
+}
+
+# Maps the advice accepted by map_file() to the names of the mmap module's
+# constants (not all of which exist on every operating system).
+_MMAP_ADVICE = {
+    "normal": "MADV_NORMAL",
+    "sequential": "MADV_SEQUENTIAL",
+    "random": "MADV_RANDOM",
+    "willneed": "MADV_WILLNEED",
+    "dontneed": "MADV_DONTNEED",
+}
+
+
+def iter_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Iterate over a file in fixed-size chunks, using a pooled buffer
+
+    Parameters:
+    path -- (str) the path of the file
+    chunk_size -- (int) the size of each chunk (in bytes). Only the last
+                  chunk may be smaller.
+
+    Return Value:
+    (generator) yields a memoryview for each chunk. A memoryview is only
+    valid until the next chunk is read (since the buffer is reused), so use
+    bytes(chunk) to keep a chunk around.
+
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size should be more than 0")
+
+    buffer = _buffer_pool.acquire(chunk_size)
+    try:
+        for chunk in readinto_chunks(path, buffer):
+            yield chunk
+    finally:
+        _buffer_pool.release(buffer)
+
+    return
+
+
+def readinto_chunks(path, buffer):
+    """
+    Iterate over a file by reading it into a buffer, one chunk at a time
+
+    Parameters:
+    path -- (str) the path of the file
+    buffer -- (bytearray, memoryview, or any other writable bytes-like
+              object) each chunk is read into this buffer, so its size is
+              the chunk size.
+
+    Return Value:
+    (generator) yields a memoryview of the part of the buffer that was filled
+    by each chunk. A memoryview is only valid until the next chunk is read.
+
+    """
+    view = memoryview(buffer).cast("B")
+    if not len(view):
+        raise ValueError("The buffer should not be empty")
+
+    with open(path, mode="rb", buffering=0) as f:
+        _advise_sequential(f.fileno())
+        while True:
+            size = _readinto_full(f, view)
+            if size == 0:
+                break
+
+            yield view[:size]
+
+            if size < len(view):
+                # The end of the file was reached
+                break
+
+    return
+
+
+@contextlib.contextmanager
+def map_file(path, access="read", offset=0, length=None, advice=None):
+    """
+    Memory-map a file (or a part of it)
+
+    Parameters:
+    path -- (str) the path of the file
+    access -- (str) "read" for read-only access, "write" for changes that are
+              written through to the file, or "copy" for changes that are
+              only made in memory (copy-on-write).
+    offset -- (int) where the mapping starts in the file. It doesn't need to
+              be aligned to the page size.
+    length -- (int) how many bytes to map. If None, then everything from the
+              offset to the end of the file is mapped.
+    advice -- (str) if given, this is passed on to the kernel (via madvise)
+              as a hint of how the mapping will be used. It can be "normal",
+              "sequential", "random", "willneed", or "dontneed". Advice that
+              isn't supported by the operating system is ignored.
+
+    Return Value:
+    (context manager) gives an (mmap, memoryview) tuple. The memoryview 
+    covers exactly the requested range, and slicing it doesn't copy any data.
+    Any memoryviews taken from it should be released before the context
+    manager exits. For an empty range, the mmap is None.
+
+    """
+    if access not in _MMAP_ACCESS_MODES:
+        raise ValueError(
+            "access should be one of: {modes}"
+            .format(modes=", ".join(sorted(_MMAP_ACCESS_MODES)))
+        )
+    elif advice is not None and advice not in _MMAP_ADVICE:
+        raise ValueError(
+            "advice should be one of: {advice}"
+            .format(advice=", ".join(sorted(_MMAP_ADVICE)))
+        )
+    elif offset < 0 or (length is not None and length < 0):
+        raise ValueError("offset and length should be 0 or more")
+
+    mode = "r+b" if access == "write" else "rb"
+    with open(path, mode=mode, buffering=0) as f:
+        file_size = os.fstat(f.fileno()).st_size
+        if length is None:
+            length = max(file_size - offset, 0)
+        elif offset + length > file_size:
+            raise ValueError("The range goes past the end of the file")
+
+        if length == 0:
+            yield (None, memoryview(b""))
+            return
+
+        # Mappings have to start on an allocation boundary, so map a little
+        # more and leave the extra out of the memoryview.
+        aligned_offset = offset - (offset % mmap.ALLOCATIONGRANULARITY)
+        padding = offset - aligned_offset
+        mapping = mmap.mmap(
+            f.fileno(), padding + length, access=_MMAP_ACCESS_MODES[access],
+            offset=aligned_offset
+        )
+
+    try:
+        if advice is not None:
+            _advise(mapping, advice)
+
+        view = memoryview(mapping)[padding:]
+        try:
+            yield (mapping, view)
+        finally:
+            view.release()
+    finally:
+        mapping.close()
+
+    return
+
+
+def read_ranges(path, ranges, max_gap=4096):
+    """
+    Read many byte ranges of a file
+
+    The file is opened once, and the ranges are sorted and merged (when they
+    overlap, touch, or are at most max_gap bytes apart) so that each merged
+    range takes a single positional read (pread) into a shared buffer.
+
+    Parameters:
+    path -- (str) the path of the file
+    ranges -- (iterable) (offset, length) tuples
+    max_gap -- (int) how many unwanted bytes may be read between two ranges
+               to merge them (reading a few more bytes is cheaper than
+               another system call).
+
+    Return Value:
+    (list) contains a memoryview for each range, in the order they were
+    given. The memoryviews all share one buffer, so no data is copied. A
+    range that goes past the end of the file is cut short.
+
+    """
+    ranges = list(ranges)
+    for offset, length in ranges:
+        if offset < 0 or length < 0:
+            raise ValueError("offset and length should be 0 or more")
+
+    views = [None] * len(ranges)
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        # Nothing is allocated for what is past the end of the file
+        file_size = os.fstat(fd).st_size
+        spans = [
+            (span_offset, max(0, min(span_length, file_size - span_offset)),
+             members)
+            for span_offset, span_length, members in _merge_ranges(
+                ranges, max_gap
+            )
+        ]
+        buffer = bytearray(sum(span_length for _, span_length, _ in spans))
+        view = memoryview(buffer)
+
+        buffer_offset = 0
+        for span_offset, span_length, members in spans:
+            span_view = view[buffer_offset:buffer_offset + span_length]
+            size = _pread_full(fd, span_view, span_offset)
+
+            for index in members:
+                offset, length = ranges[index]
+                start = offset - span_offset
+                end = min(start + length, size)
+                start = min(start, end)
+                views[index] = span_view[start:end]
+
+            buffer_offset += span_length
+    finally:
+        os.close(fd)
+
+    return views
+
+
+# Private Functions
+def _merge_ranges(ranges, max_gap):
+    """
+    Merge byte ranges that overlap (or are close together)
+
+    Parameters:
+    ranges -- (list) (offset, length) tuples
+    max_gap -- (int) see read_ranges()
+
+    Return Value:
+    (list) contains an (offset, length, members) tuple for each merged range,
+    in order. members is a list of the indexes (in ranges) of the ranges it
+    covers.
+
+    """
+    spans = []
+    order = sorted(range(len(ranges)), key=lambda index: ranges[index][0])
+    for index in order:
+        offset, length = ranges[index]
+        if spans:
+            span_offset, span_length, members = spans[-1]
+            span_end = span_offset + span_length
+            if offset <= span_end + max_gap:
+                end = max(span_end, offset + length)
+                members.append(index)
+                spans[-1] = (span_offset, end - span_offset, members)
+                continue
+
+        spans.append((offset, length, [index]))
+
+    return spans
+
+
+def _pread_full(fd, view, offset):
+    """
+    Read from a file at an offset into a buffer, until the buffer is full or
+    the end of the file is reached (without moving the file position, where
+    possible)
+
+    Return Value:
+    (int) the amount of bytes read.
+
+    """
+    filled = 0
+    while filled < len(view):
+        if hasattr(os, "preadv"):
+            # Reads straight into the buffer
+            size = os.preadv(fd, [view[filled:]], offset + filled)
+        elif hasattr(os, "pread"):
+            data = os.pread(fd, len(view) - filled, offset + filled)
+            size = len(data)
+            view[filled:filled + size] = data
+        else:
+            os.lseek(fd, offset + filled, os.SEEK_SET)
+            data = os.read(fd, len(view) - filled)
+            size = len(data)
+            view[filled:filled + size] = data
+
+        if not size:
+            break
+        filled += size
+
+    return filled
+
+
+def _advise(mapping, advice):
+    """Pass advice about how a mapping will be used on to the kernel"""
+    constant = getattr(mmap, _MMAP_ADVICE[advice], None)
+    if constant is None or not hasattr(mapping, "madvise"):
+        return
+
+    try:
+        mapping.madvise(constant)
+    except OSError:
+        # Just a hint, so it doesn't matter if it isn't supported
+        pass
+
+    return
+
+
+def _readinto_full(f, view):
+    """
+    Fill a buffer from a file (short reads are retried until the buffer is
+    full or the end of the file is reached)
+
+    Return Value:
+    (int) the amount of bytes read.
+
+    """
+    filled = 0
+    while filled < len(view):
+        size = f.readinto(view[filled:])
+        if not size:
+            break
+        filled += size
+
+    return filled
+
+
+def _advise_sequential(fd):
+    """Tell the kernel that the file will be read sequentially (if possible)"""
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            # Just a hint, so it doesn't matter if it isn't supported
+            pass
+
+    return
+
+
+# Private Classes
+class _BufferPool:
+    """
+    A thread-safe pool of reusable buffers
+
+    Only a few buffers of each size are kept, so the pool can't grow without
+    bound.
+
+    """
+    def __init__(self, max_buffers_per_size=4):
+        """
+        Construct the object
+
+        Parameters:
+        max_buffers_per_size -- (int) how many free buffers of each size to
+                                keep at most.
+
+        """
+        self._max_buffers_per_size = max_buffers_per_size
+        self._free_buffers = {}
+        self._lock = threading.Lock()
+        return
+
+    @property
+    def max_buffers_per_size(self):
+        """
+        Get how many free buffers of each size are kept at most
+
+        Return Value:
+        (int)
+
+        """
+        return self._max_buffers_per_size
+
+    def acquire(self, size):
+        """
+        Get a buffer from the pool (or a new one if there is none free)
+
+        Return Value:
+        (bytearray)
+
+        """
+        with self._lock:
+            free_buffers = self._free_buffers.get(size)
+            if free_buffers:
+                return free_buffers.pop()
+
+        return bytearray(size)
+
+    def release(self, buffer):
+        """Give a buffer back to the pool"""
+        with self._lock:
+            free_buffers = self._free_buffers.setdefault(len(buffer), [])
+            if len(free_buffers) < self._max_buffers_per_size:
+                free_buffers.append(buffer)
+
+        return
+
+
+_buffer_pool = _BufferPool()
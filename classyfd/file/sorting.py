@@ -0,0 +1,193 @@
+"""
+Contains the logic for sorting the lines of files larger than memory
+
+The file is split into ranges (on line boundaries) that fit in memory. Each
+range is read, sorted, and written to a temporary file (a run), optionally in
+parallel worker processes. The runs are then merged with heapq.merge(), which
+only ever holds one line of each run in memory. When there are too many runs
+to keep open at once, they are merged in several passes.
+
+"""
+
+import heapq
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from . import lines, writing
+from .. import utils
+
+
+# How many bytes of lines are sorted in memory at once (when not given)
+DEFAULT_MEMORY_LIMIT = 256 * 1024 * 1024
+
+# How many runs are merged at once at most (each one is an open file)
+_MAX_MERGE_WIDTH = 128
+
+# The buffer size used for reading the runs while merging
+_MERGE_BUFFER_SIZE = 1024 * 1024
+
+
+def sort_file(path, output, key=None, reverse=False,
+              memory_limit=DEFAULT_MEMORY_LIMIT, max_workers=1,
+              temporary_directory=None):
+    """
+    Sort the lines of a file (of any size)
+
+    Lines are compared as bytes (including their newline character), and the
+    sort is stable. A newline character is added to the last line if it
+    doesn't have one.
+
+    Parameters:
+    path -- (str) the path of the file
+    output -- (str) where to write the sorted lines. It's written atomically,
+              so it may be the file itself.
+    key -- (function) if given, then lines are compared by what it returns
+           for them (like sorted()).
+    reverse -- (bool) whether to sort in descending order
+    memory_limit -- (int) roughly how many bytes of lines are held in memory
+                    at once (shared by the workers). Python's overhead for
+                    each line comes on top of this.
+    max_workers -- (int) how many runs are sorted at the same time, in worker
+                   processes. If it's more than 1, then key has to be
+                   picklable (e.g., a function defined at the top level of a
+                   module).
+    temporary_directory -- (str) where to write the runs. If None, then the
+                           output's directory is used.
+
+    """
+    if memory_limit <= 0:
+        raise ValueError("memory_limit should be more than 0")
+
+    output = os.path.abspath(output)
+    if temporary_directory is None:
+        temporary_directory = os.path.dirname(output)
+
+    run_size = max(1, memory_limit // max(1, max_workers))
+    ranges = lines._split_into_line_ranges(path, run_size)
+    if len(ranges) <= 1:
+        # It fits in memory
+        sorted_lines = []
+        for start, end in ranges:
+            sorted_lines = _read_sorted_lines(path, start, end, key, reverse)
+        writing.write_atomic(output, (b"".join(sorted_lines),))
+        return
+
+    # Every run (including the merged ones) is removed in the end
+    temporary_paths = []
+    try:
+        tasks = [
+            (path, start, end, key, reverse, temporary_directory)
+            for start, end in ranges
+        ]
+        if max_workers > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(_make_run, *task) for task in tasks]
+                # Every run that was made is collected (so it gets removed),
+                # even if another one failed.
+                error = None
+                for future in futures:
+                    try:
+                        temporary_paths.append(future.result())
+                    except Exception as e:
+                        error = error or e
+                if error is not None:
+                    raise error
+        else:
+            for task in tasks:
+                temporary_paths.append(_make_run(*task))
+        run_paths = list(temporary_paths)
+
+        # Merge in passes until the rest can be merged at once
+        while len(run_paths) > _MAX_MERGE_WIDTH:
+            merged_run_paths = []
+            for i in range(0, len(run_paths), _MAX_MERGE_WIDTH):
+                group = run_paths[i:i + _MAX_MERGE_WIDTH]
+                merged_run_path = os.path.join(
+                    temporary_directory,
+                    utils.get_random_file_name(temporary_directory)
+                )
+                temporary_paths.append(merged_run_path)
+                with open(merged_run_path, mode="xb") as f:
+                    _merge_runs(group, f, key, reverse)
+                merged_run_paths.append(merged_run_path)
+                _remove_files(group)
+            run_paths = merged_run_paths
+
+        with writing.atomic_writer(output) as f:
+            _merge_runs(run_paths, f, key, reverse)
+    finally:
+        _remove_files(temporary_paths)
+
+    return
+
+
+# Private Functions
+def _read_sorted_lines(path, start, end, key, reverse):
+    """
+    Read a range of a file, and sort its lines
+
+    Return Value:
+    (list) the sorted lines (bytes).
+
+    """
+    with open(path, mode="rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    # Only b"\n" ends a line, just like when the runs are merged
+    # (bytes.splitlines() would also split on b"\r" and others).
+    lines_ = io.BytesIO(data).readlines()
+    del data
+    if lines_ and not lines_[-1].endswith(b"\n"):
+        lines_[-1] += b"\n"
+    lines_.sort(key=key, reverse=reverse)
+
+    return lines_
+
+
+def _make_run(path, start, end, key, reverse, temporary_directory):
+    """
+    Sort a range of a file into a run (possibly in a worker process)
+
+    Return Value:
+    (str) the path of the run.
+
+    """
+    sorted_lines = _read_sorted_lines(path, start, end, key, reverse)
+    run_path = os.path.join(
+        temporary_directory, utils.get_random_file_name(temporary_directory)
+    )
+    with open(run_path, mode="xb") as f:
+        f.writelines(sorted_lines)
+
+    return run_path
+
+
+def _merge_runs(run_paths, output_file, key, reverse):
+    """Merge sorted runs into an (open) output file"""
+    run_files = []
+    try:
+        for run_path in run_paths:
+            run_files.append(
+                open(run_path, mode="rb", buffering=_MERGE_BUFFER_SIZE)
+            )
+        output_file.writelines(
+            heapq.merge(*run_files, key=key, reverse=reverse)
+        )
+    finally:
+        for run_file in run_files:
+            run_file.close()
+
+    return
+
+
+def _remove_files(paths):
+    """Remove files, ignoring any that are already gone"""
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    return
@@ -0,0 +1,452 @@
+"""
+Contains the logic for transferring (copying and moving) files
+
+The fastest primitive available is always tried first, so copies are done by
+the kernel whenever possible rather than by reading data into Python and
+writing it back out again. In order of preference:
+
+1. A reflink (FICLONE), which shares the data blocks on copy-on-write file
+   systems such as Btrfs and XFS, so no data is copied at all.
+2. os.copy_file_range(), which copies the data inside the kernel (and may be
+   offloaded to the storage itself).
+3. os.sendfile(), which also copies the data inside the kernel.
+4. A plain read/write loop using a reusable buffer.
+
+Holes in sparse files are preserved (where SEEK_DATA and SEEK_HOLE are
+supported) by only copying the regions that actually contain data.
+
+Moves that can't be done with a rename, because they cross file systems, are
+built on top of the same copy logic.
+
+"""
+
+import errno
+import os
+import stat
+# Unix-like Only Imports
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from .. import utils
+
+
+# The ioctl request number of FICLONE on Linux (_IOW(0x94, 9, int))
+_FICLONE = 0x40049409
+
+# The amount of bytes handed to the kernel per copy_file_range()/sendfile()
+# call, and the size of the buffer used by the read/write loop.
+_KERNEL_CHUNK_SIZE = 1024 * 1024 * 1024
+_BUFFER_SIZE = 1024 * 1024
+
+# Errors that mean "this primitive can't be used here", rather than that the
+# copy itself failed. When one is raised, the next primitive is tried.
+_UNSUPPORTED_ERRNOS = frozenset(
+    getattr(errno, name) for name in (
+        "ENOSYS", "EXDEV", "EINVAL", "ENOTSUP", "EOPNOTSUPP", "ENOTTY",
+        "EBADF", "EPERM", "ETXTBSY"
+    )
+    if hasattr(errno, name)
+)
+
+
+def copy_file(source, destination, copy_mode=True, copy_metadata=False,
+              fsync=False):
+    """
+    Copy the contents of a file
+
+    Parameters:
+    source -- (str) the path of the file to copy
+    destination -- (str) the path to copy the file to. If it already exists,
+                   then it is overwritten.
+    copy_mode -- (bool) whether to copy the permission bits of the source file
+                 to the destination file as well.
+    copy_metadata -- (bool) whether to copy the owner, group, and access and
+                     modification times of the source file as well. The owner
+                     and group are only copied if the user is allowed to.
+    fsync -- (bool) whether to flush the destination file to disk before
+             returning.
+
+    Return Value:
+    (str) the method that was used to copy the data. This is one of "reflink",
+    "copy_file_range", "sendfile", or "buffered".
+
+    """
+    source_fd = os.open(source, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        source_stat = os.fstat(source_fd)
+        if stat.S_ISDIR(source_stat.st_mode):
+            raise IsADirectoryError(
+                "Cannot copy the file because it is a directory"
+            )
+
+        destination_flags = (
+            os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+        )
+        destination_fd = os.open(
+            destination, destination_flags, stat.S_IMODE(source_stat.st_mode)
+        )
+        try:
+            method = copy_file_descriptor(
+                source_fd, destination_fd, size=source_stat.st_size
+            )
+            if copy_metadata:
+                _copy_owner(source_stat, destination_fd)
+            if (copy_mode or copy_metadata) and hasattr(os, "fchmod"):
+                os.fchmod(destination_fd, stat.S_IMODE(source_stat.st_mode))
+            if copy_metadata:
+                _copy_times(source_stat, destination, destination_fd)
+            if fsync:
+                os.fsync(destination_fd)
+        finally:
+            os.close(destination_fd)
+    finally:
+        os.close(source_fd)
+
+    return method
+
+
+def move_file_across_file_systems(source, destination):
+    """
+    Move a file to another file system
+
+    This is meant for when a rename fails with EXDEV. The file is copied (see
+    copy_file) into a temporary file next to the destination, flushed to disk,
+    renamed into place, and only then is the source file removed. That way,
+    the destination path either doesn't exist or holds the complete file, and
+    the source is never removed before its copy is durable.
+
+    The mode, owner, group, and access and modification times are preserved.
+
+    Parameters:
+    source -- (str) the path of the file to move
+    destination -- (str) the path to move the file to. If it already exists,
+                   then it is replaced.
+
+    """
+    destination_directory = os.path.dirname(destination)
+    temporary_path = os.path.join(
+        destination_directory,
+        utils.get_random_file_name(destination_directory)
+    )
+
+    try:
+        copy_file(source, temporary_path, copy_metadata=True, fsync=True)
+        os.replace(temporary_path, destination)
+    except BaseException:
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+        raise
+
+    fsync_directory(destination_directory)
+    os.remove(source)
+
+    return
+
+
+def fsync_directory(directory):
+    """
+    Flush a directory's entries to disk
+
+    This is what makes a newly created (or renamed) file's name durable. It
+    does nothing on operating systems that can't open directories, such as
+    Windows.
+
+    Parameters:
+    directory -- (str) the path of the directory
+
+    """
+    if not utils.determine_if_os_is_posix_compliant():
+        return
+
+    directory_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(directory_fd)
+    except OSError as e:
+        # Some file systems don't support fsync() on directories
+        if e.errno not in _UNSUPPORTED_ERRNOS:
+            raise
+    finally:
+        os.close(directory_fd)
+
+    return
+
+
+def copy_file_descriptor(source_fd, destination_fd, size=None):
+    """
+    Copy all of the data from one open file to another
+
+    The destination file should be empty (e.g., opened with O_TRUNC).
+
+    Parameters:
+    source_fd -- (int) a file descriptor opened for reading
+    destination_fd -- (int) a file descriptor opened for writing
+    size -- (int) the size of the source file. If None, then it is looked up.
+
+    Return Value:
+    (str) the method that was used to copy the data. This is one of "reflink",
+    "copy_file_range", "sendfile", or "buffered".
+
+    """
+    if size is None:
+        size = os.fstat(source_fd).st_size
+
+    if _reflink(source_fd, destination_fd):
+        return "reflink"
+
+    # Track which primitives turned out to be unsupported so that they are
+    # not retried for every data region of a sparse file.
+    unsupported_methods = set()
+    method = "buffered"
+    for offset, length in _get_data_regions(source_fd, size):
+        method = _copy_range(
+            source_fd, destination_fd, offset, length, unsupported_methods
+        )
+
+    # Extending the file to its full size re-creates any trailing hole, and
+    # is harmless if the data already reaches the end.
+    os.ftruncate(destination_fd, size)
+
+    return method
+
+
+# Private Functions
+def _copy_owner(source_stat, destination_fd):
+    """Copy the owner and group, if the user is allowed to change them"""
+    if not hasattr(os, "fchown"):
+        return
+
+    try:
+        os.fchown(destination_fd, source_stat.st_uid, source_stat.st_gid)
+    except PermissionError:
+        # Only root can give files away, so a regular user keeps ownership
+        pass
+
+    return
+
+
+def _copy_times(source_stat, destination, destination_fd):
+    """Copy the access and modification times (with nanosecond precision)"""
+    times = (source_stat.st_atime_ns, source_stat.st_mtime_ns)
+    if os.utime in os.supports_fd:
+        os.utime(destination_fd, ns=times)
+    else:
+        os.utime(destination, ns=times)
+
+    return
+
+
+def _reflink(source_fd, destination_fd):
+    """
+    Try to clone the source file's data blocks into the destination file
+
+    Return Value:
+    (bool) whether the clone succeeded.
+
+    """
+    if fcntl is None or not hasattr(fcntl, "ioctl"):
+        return False
+
+    try:
+        fcntl.ioctl(destination_fd, _FICLONE, source_fd)
+    except OSError as e:
+        if e.errno in _UNSUPPORTED_ERRNOS:
+            return False
+        raise
+
+    return True
+
+
+def _get_data_regions(fd, size):
+    """
+    Get the regions of a file that contain data, skipping any holes
+
+    If the file system (or operating system) can't report holes, then the
+    whole file is treated as a single region.
+
+    Parameters:
+    fd -- (int) the file descriptor of the file
+    size -- (int) the size of the file
+
+    Return Value:
+    (generator) yields (offset, length) tuples.
+
+    """
+    if size == 0:
+        return
+
+    if not hasattr(os, "SEEK_DATA") or not hasattr(os, "SEEK_HOLE"):
+        yield (0, size)
+        return
+
+    offset = 0
+    while offset < size:
+        try:
+            data_start = os.lseek(fd, offset, os.SEEK_DATA)
+        except OSError as e:
+            if e.errno == errno.ENXIO:
+                # There is no more data, only a trailing hole
+                break
+            elif offset == 0 and e.errno in _UNSUPPORTED_ERRNOS:
+                yield (0, size)
+                break
+            raise
+
+        data_end = min(os.lseek(fd, data_start, os.SEEK_HOLE), size)
+        if data_end <= data_start:
+            break
+
+        yield (data_start, data_end - data_start)
+        offset = data_end
+
+    return
+
+
+def _copy_range(source_fd, destination_fd, offset, length,
+                unsupported_methods):
+    """
+    Copy a region of one file to the same offset in another file
+
+    Parameters:
+    source_fd -- (int) a file descriptor opened for reading
+    destination_fd -- (int) a file descriptor opened for writing
+    offset -- (int) where the region starts
+    length -- (int) how many bytes to copy
+    unsupported_methods -- (set) the names of the methods that are already
+                           known to be unsupported. It is updated in place.
+
+    Return Value:
+    (str) the method that was used.
+
+    """
+    methods = (
+        ("copy_file_range", _copy_range_with_copy_file_range),
+        ("sendfile", _copy_range_with_sendfile),
+    )
+
+    for name, copy_function in methods:
+        if name in unsupported_methods:
+            continue
+
+        copied = copy_function(source_fd, destination_fd, offset, length)
+        if copied is None:
+            unsupported_methods.add(name)
+            continue
+        elif copied < length:
+            # The source file shrank while it was being copied, or the
+            # primitive stopped early. Let the buffered loop finish the job.
+            _copy_range_with_buffer(
+                source_fd, destination_fd, offset + copied, length - copied
+            )
+
+        return name
+
+    _copy_range_with_buffer(source_fd, destination_fd, offset, length)
+    return "buffered"
+
+
+def _copy_range_with_copy_file_range(source_fd, destination_fd, offset,
+                                     length):
+    """
+    Copy a region using os.copy_file_range()
+
+    Return Value:
+    (int or None) how many bytes were copied, or None if copy_file_range()
+    can't be used.
+
+    """
+    if not hasattr(os, "copy_file_range"):
+        return None
+
+    copied = 0
+    while copied < length:
+        count = min(length - copied, _KERNEL_CHUNK_SIZE)
+        try:
+            sent = os.copy_file_range(
+                source_fd, destination_fd, count,
+                offset + copied, offset + copied
+            )
+        except OSError as e:
+            if copied == 0 and e.errno in _UNSUPPORTED_ERRNOS:
+                return None
+            raise
+
+        if sent == 0:
+            # End of the file was reached early
+            break
+        copied += sent
+
+    return copied
+
+
+def _copy_range_with_sendfile(source_fd, destination_fd, offset, length):
+    """
+    Copy a region using os.sendfile()
+
+    Return Value:
+    (int or None) how many bytes were copied, or None if sendfile() can't be
+    used.
+
+    """
+    if not hasattr(os, "sendfile"):
+        return None
+
+    # sendfile() writes at the destination's current position
+    os.lseek(destination_fd, offset, os.SEEK_SET)
+
+    copied = 0
+    while copied < length:
+        count = min(length - copied, _KERNEL_CHUNK_SIZE)
+        try:
+            sent = os.sendfile(
+                destination_fd, source_fd, offset + copied, count
+            )
+        except OSError as e:
+            if copied == 0 and e.errno in _UNSUPPORTED_ERRNOS:
+                return None
+            raise
+
+        if sent == 0:
+            break
+        copied += sent
+
+    return copied
+
+
+def _copy_range_with_buffer(source_fd, destination_fd, offset, length):
+    """
+    Copy a region by reading it into a reusable buffer and writing it out
+
+    This is the fallback for when no kernel-side primitive is available.
+
+    """
+    buffer = bytearray(min(_BUFFER_SIZE, max(length, 1)))
+    view = memoryview(buffer)
+
+    os.lseek(source_fd, offset, os.SEEK_SET)
+    os.lseek(destination_fd, offset, os.SEEK_SET)
+
+    remaining = length
+    while remaining > 0:
+        read_view = view[:min(remaining, len(buffer))]
+        if hasattr(os, "readv"):
+            read_size = os.readv(source_fd, [read_view])
+        else:
+            # Windows has no readv(), so a new bytes object is unavoidable
+            data = os.read(source_fd, len(read_view))
+            read_size = len(data)
+            read_view[:read_size] = data
+
+        if read_size == 0:
+            break
+
+        written = 0
+        while written < read_size:
+            written += os.write(destination_fd, view[written:read_size])
+        remaining -= read_size
+
+    view.release()
+    return
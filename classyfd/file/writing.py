@@ -0,0 +1,120 @@
+"""
+Contains the logic for writing files atomically
+
+A file that is written in place can be left half-written (or empty) by a
+crash or a power loss. Here, the new contents are written to a temporary file
+in the same directory instead, flushed to disk, and renamed over the original
+file (which is atomic on the same file system). Finally, the directory is
+flushed to disk as well, so that the rename itself is durable. Readers see
+either the old contents or the new contents, never anything in between.
+
+"""
+
+import contextlib
+import os
+import stat
+
+from . import transfer
+from .. import config, utils
+
+
+# The modes accepted by atomic_writer() and what they become when the
+# temporary file is opened (it's created exclusively, so it can't clobber
+# anything).
+_WRITE_MODES = {"w": "x", "wt": "xt", "wb": "xb"}
+
+
+@contextlib.contextmanager
+def atomic_writer(path, mode="wb", encoding=None):
+    """
+    Write a file atomically, through a standard Python file object
+
+    The file is only replaced if the block exits without an exception;
+    otherwise, the temporary file is removed and the original file is left
+    alone. If the file already exists, its permissions are kept.
+
+    Parameters:
+    path -- (str) the path of the file
+    mode -- (str) "wb" to write bytes, or "w" (or "wt") to write text
+    encoding -- (str) the encoding used in text mode. If None, then the
+                package's default encoding (UTF-8) is used.
+
+    Return Value:
+    (context manager) gives the (writable) file object of the temporary file.
+
+    """
+    if mode not in _WRITE_MODES:
+        raise ValueError(
+            "mode should be one of: {modes}"
+            .format(modes=", ".join(sorted(_WRITE_MODES)))
+        )
+
+    if encoding is None and mode != "wb":
+        encoding = config._ENCODING
+
+    path = os.path.abspath(path)
+    directory = os.path.dirname(path)
+    temporary_path = os.path.join(
+        directory, utils.get_random_file_name(directory)
+    )
+
+    try:
+        with open(temporary_path, _WRITE_MODES[mode], encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+
+        _copy_permissions(path, temporary_path)
+        os.replace(temporary_path, path)
+    except BaseException:
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+        raise
+
+    transfer.fsync_directory(directory)
+
+    return
+
+
+def write_atomic(path, data, encoding=None):
+    """
+    Write a file atomically (see atomic_writer())
+
+    Parameters:
+    path -- (str) the path of the file
+    data -- (bytes-like object, str, or an iterable of them) the new
+            contents. Given an iterable (such as a generator), the chunks are
+            written as they come, so they don't all have to be in memory at
+            once.
+    encoding -- (str) the encoding used for str data. If None, then the
+                package's default encoding (UTF-8) is used.
+
+    """
+    if isinstance(data, (bytes, bytearray, memoryview, str)):
+        chunks = iter((data,))
+    else:
+        chunks = iter(data)
+
+    # The first chunk decides between text and binary mode
+    first_chunk = next(chunks, b"")
+    mode = "w" if isinstance(first_chunk, str) else "wb"
+    with atomic_writer(path, mode=mode, encoding=encoding) as f:
+        f.write(first_chunk)
+        for chunk in chunks:
+            f.write(chunk)
+
+    return
+
+
+# Private Functions
+def _copy_permissions(source, destination):
+    """Copy a file's permissions to another file (if the file exists)"""
+    try:
+        mode = stat.S_IMODE(os.stat(source).st_mode)
+    except FileNotFoundError:
+        return
+
+    os.chmod(destination, mode)
+    return
@@ -0,0 +1,423 @@
+"""
+Contains a Watcher class that delivers file system change events
+
+The events come from Linux's inotify API, which is called through ctypes, so
+nothing outside of the Python Standard Library is needed. Rather than polling
+(e.g., checking File.exists or File.size in a loop), the kernel tells us what
+changed as soon as it changes.
+
+Events usually come in bursts (e.g., a file being written to in many small
+chunks), so they are collected for a short debounce window and coalesced
+before they are handed out: a file that is created and then written to is
+reported as created once, a file that is created and removed again isn't
+reported at all, and so on.
+
+Supported Operating Systems:
+Linux
+
+"""
+
+import collections
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+from . import config
+
+
+# inotify Constants (see inotify(7))
+_IN_MODIFY = 0x00000002
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    _IN_MODIFY | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE |
+    _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR
+)
+
+# struct inotify_event {int wd; uint32_t mask, cookie, len; char name[];}
+_EVENT_HEADER = struct.Struct("iIII")
+
+_READ_SIZE = 64 * 1024
+
+# Event Types
+CREATED = "created"
+MODIFIED = "modified"
+DELETED = "deleted"
+MOVED = "moved"
+OVERFLOW = "overflow"
+
+# How a pending event type changes when another event for the same path
+# arrives within the debounce window. None means the events cancel out.
+_COALESCED_TYPES = {
+    (CREATED, MODIFIED): CREATED,
+    (CREATED, DELETED): None,
+    (MODIFIED, MODIFIED): MODIFIED,
+    (MODIFIED, DELETED): DELETED,
+    (DELETED, CREATED): MODIFIED,
+    (MOVED, MODIFIED): MOVED,
+}
+
+_libc = None
+
+
+class Watcher:
+    """Watches a directory (and optionally its sub-directories) for changes"""
+    def __init__(self, path, recursive=False, names=None, debounce=0.05):
+        """
+        Construct the object, and start watching
+
+        Parameters:
+        path -- (str) the directory to watch
+        recursive -- (bool) whether to watch the sub-directories as well.
+                     Sub-directories that are created (or moved in) later are
+                     watched as soon as they appear.
+        names -- (iterable of str) if given, only events for the entries (of
+                 the watched directory) with these names are delivered.
+        debounce -- (int or float) how many seconds to wait for more events
+                    after an event arrives, before the collected events are
+                    coalesced and delivered.
+
+        Supported Operating Systems:
+        Linux
+
+        """
+        if config._OPERATING_SYSTEM != "linux":
+            raise NotImplementedError("Watching is only supported on Linux")
+
+        self._path = os.path.abspath(path)
+        self._recursive = recursive
+        self._names = None if names is None else frozenset(names)
+        self._debounce = debounce
+
+        self._watched_paths = {}
+        self._fd = _call_libc("inotify_init1", _IN_NONBLOCK | _IN_CLOEXEC)
+        try:
+            self._add_watch(self._path)
+            if recursive:
+                self._add_sub_directory_watches(self._path)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+        return
+
+    # Special Methods
+    def __repr__(self):
+        """Get the official string representation"""
+        repr_ = (
+            "{class_name}(\"{path}\")"
+            .format(class_name=Watcher.__name__, path=self._path)
+        )
+        return repr_
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return
+
+    def __iter__(self):
+        """
+        Iterate over the events, forever (or until the watcher is closed)
+
+        Return Value:
+        (generator) yields events (see .read()).
+
+        """
+        while not self.closed:
+            for event in self.read():
+                yield event
+
+        return
+
+    # Properties
+    @property
+    def closed(self):
+        """
+        Whether the watcher is closed or not
+
+        Return Value:
+        (bool)
+
+        """
+        return self._fd is None
+
+    # Regular Methods
+    def read(self, timeout=None):
+        """
+        Wait for events, and return them (coalesced)
+
+        Parameters:
+        timeout -- (int or float) how many seconds to wait for the first event
+                   at most. If None, then wait for as long as it takes.
+
+        Return Value:
+        (list) contains the events, in the order they (first) happened. Each
+        event is a dict with the keys type, path, and is_dir. The type is one
+        of "created", "modified", "deleted", "moved", or "overflow". Moved
+        events also have a destination key. An overflow event means the
+        kernel's event queue overflowed and events were lost (its path is
+        None). An empty list is returned if the timeout expired.
+
+        """
+        if not self._wait(timeout):
+            return []
+
+        raw_events = self._read_raw_events()
+        # Keep collecting until the burst is over, but not forever: under a
+        # constant stream of events, they are delivered every so often.
+        deadline = time.monotonic() + self._debounce * 10
+        while self._debounce and time.monotonic() < deadline:
+            if not self._wait(self._debounce):
+                break
+            raw_events.extend(self._read_raw_events())
+
+        return self._coalesce(raw_events)
+
+    def close(self):
+        """Stop watching"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+        return
+
+    # Private Methods
+    def _add_watch(self, path):
+        """Start watching a directory"""
+        watch_descriptor = _call_libc(
+            "inotify_add_watch", self._fd, os.fsencode(path), _WATCH_MASK
+        )
+        self._watched_paths[watch_descriptor] = path
+        return
+
+    def _add_sub_directory_watches(self, path):
+        """
+        Start watching every directory inside a directory, however deep
+
+        Return Value:
+        (list) the paths of the entries found (so that the caller can report
+        them, since they may have been created before the watches were).
+
+        """
+        found_paths = []
+        pending_paths = [path]
+        while pending_paths:
+            directory_path = pending_paths.pop()
+            try:
+                with os.scandir(directory_path) as entries:
+                    for entry in entries:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        found_paths.append((entry.path, is_dir))
+                        if is_dir:
+                            self._add_watch(entry.path)
+                            pending_paths.append(entry.path)
+            except FileNotFoundError:
+                # Removed in the meantime
+                continue
+
+        return found_paths
+
+    def _wait(self, timeout):
+        """
+        Wait for the inotify file descriptor to become readable
+
+        Return Value:
+        (bool) whether it is readable.
+
+        """
+        if self._fd is None:
+            return False
+
+        poller = select.poll()
+        poller.register(self._fd, select.POLLIN)
+        timeout_ms = None if timeout is None else int(timeout * 1000)
+        return bool(poller.poll(timeout_ms))
+
+    def _read_raw_events(self):
+        """
+        Read all of the events that are queued up
+
+        Return Value:
+        (list) contains (watch_descriptor, mask, cookie, name) tuples.
+
+        """
+        raw_events = []
+        while True:
+            try:
+                data = os.read(self._fd, _READ_SIZE)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(data):
+                watch_descriptor, mask, cookie, length = (
+                    _EVENT_HEADER.unpack_from(data, offset)
+                )
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                raw_events.append(
+                    (watch_descriptor, mask, cookie, os.fsdecode(name))
+                )
+
+        return raw_events
+
+    def _coalesce(self, raw_events):
+        """Turn raw inotify events into coalesced events"""
+        # Maps the paths to their pending events, in the order they happened
+        pending_events = collections.OrderedDict()
+        moved_from = {}
+
+        def add(event_type, path, is_dir):
+            previous_event = pending_events.pop(path, None)
+            if previous_event is not None:
+                key = (previous_event["type"], event_type)
+                event_type = _COALESCED_TYPES.get(key, event_type)
+                if event_type is None:
+                    return
+                elif event_type == MOVED:
+                    # The move (and where it was moved from) is kept
+                    pending_events[path] = previous_event
+                    return
+
+            if self._is_wanted(path):
+                pending_events[path] = {
+                    "type": event_type, "path": path, "is_dir": is_dir
+                }
+
+            return
+
+        for watch_descriptor, mask, cookie, name in raw_events:
+            if mask & _IN_Q_OVERFLOW:
+                pending_events[None] = {
+                    "type": OVERFLOW, "path": None, "is_dir": False
+                }
+                continue
+
+            directory_path = self._watched_paths.get(watch_descriptor)
+            if mask & _IN_IGNORED:
+                self._watched_paths.pop(watch_descriptor, None)
+                continue
+            elif directory_path is None or not name:
+                # Events about the watched directories themselves are also
+                # reported by their parents.
+                continue
+
+            path = os.path.join(directory_path, name)
+            is_dir = bool(mask & _IN_ISDIR)
+
+            if mask & _IN_CREATE:
+                add(CREATED, path, is_dir)
+                if is_dir and self._recursive:
+                    self._watch_new_directory(path, add)
+            elif mask & _IN_MODIFY:
+                add(MODIFIED, path, is_dir)
+            elif mask & _IN_DELETE:
+                add(DELETED, path, is_dir)
+            elif mask & _IN_MOVED_FROM:
+                moved_from[cookie] = (path, is_dir)
+            elif mask & _IN_MOVED_TO:
+                source = moved_from.pop(cookie, None)
+                if source is None:
+                    # Moved in from somewhere that isn't watched
+                    add(CREATED, path, is_dir)
+                elif self._is_wanted(source[0]) or self._is_wanted(path):
+                    pending_events.pop(source[0], None)
+                    pending_events[path] = {
+                        "type": MOVED, "path": source[0], "destination": path,
+                        "is_dir": is_dir
+                    }
+
+                if is_dir and self._recursive:
+                    if source is None:
+                        self._watch_new_directory(path, add)
+                    else:
+                        # Its watches (and everything in it) moved along
+                        self._move_watches(source[0], path)
+
+        # Moved out to somewhere that isn't watched
+        for path, is_dir in moved_from.values():
+            add(DELETED, path, is_dir)
+
+        return list(pending_events.values())
+
+    def _watch_new_directory(self, path, add):
+        """
+        Start watching a new sub-directory (and everything in it), and report
+        what is already in it
+
+        """
+        try:
+            self._add_watch(path)
+        except FileNotFoundError:
+            return
+
+        for found_path, is_dir in self._add_sub_directory_watches(path):
+            add(CREATED, found_path, is_dir)
+
+        return
+
+    def _move_watches(self, path, new_path):
+        """
+        Update the paths of a moved directory's watches (and those of the
+        directories in it)
+
+        """
+        path_prefix = os.path.join(path, "")
+        for watch_descriptor, watched_path in self._watched_paths.items():
+            if watched_path == path:
+                self._watched_paths[watch_descriptor] = new_path
+            elif watched_path.startswith(path_prefix):
+                self._watched_paths[watch_descriptor] = os.path.join(
+                    new_path, watched_path[len(path_prefix):]
+                )
+
+        return
+
+    def _is_wanted(self, path):
+        """Determine if the events for a path should be delivered"""
+        if self._names is None:
+            return True
+
+        return bool(
+            os.path.dirname(path) == self._path and
+            os.path.basename(path) in self._names
+        )
+
+
+# Private Functions
+def _call_libc(function_name, *args):
+    """
+    Call an inotify function from the C library
+
+    Return Value:
+    (int) what the function returned.
+
+    """
+    global _libc
+    if _libc is None:
+        library_name = ctypes.util.find_library("c") or "libc.so.6"
+        _libc = ctypes.CDLL(library_name, use_errno=True)
+
+    result = getattr(_libc, function_name)(*args)
+    if result == -1:
+        error_number = ctypes.get_errno()
+        raise OSError(error_number, os.strerror(error_number))
+
+    return result
@@ -2,10 +2,13 @@
 
 import unittest
 import os
+import hashlib
+import datetime
 import tempfile
 import pathlib
 import platform
 import shutil
+from unittest import mock
 # Unix-like Only Imports
 try:
     import pwd
@@ -13,7 +16,10 @@ try:
 except ImportError:
     pass
 
-from classyfd import Directory, InvalidDirectoryValueError, utils, config
+from classyfd import (
+    Directory, File, InvalidDirectoryValueError, utils, config
+)
+from classyfd.directory import globbing, query, tree, walker
 
 
 # Globals
@@ -264,6 +270,77 @@ class TestDirectory(unittest.TestCase):
         
         return
     
+    def test_remove_directory_tree_returns_count(self):
+        td = tempfile.TemporaryDirectory()
+        with TemporaryDirectoryHandler(td):
+            d = Directory(td.name)
+            self.assertEqual(d.remove(empty_only=True), 1)
+        
+        td = tempfile.TemporaryDirectory()
+        with TemporaryDirectoryHandler(td):
+            create_directory_tree(td.name)
+            # Enough sub-directories for the tree to be split up
+            for i in range(50):
+                os.makedirs(os.path.join(td.name, "many", str(i), "deeper"))
+            
+            expected_count = len(list_directory_tree(td.name)) + 1
+            d = Directory(td.name)
+            self.assertEqual(
+                d.remove(empty_only=False, max_workers=4), expected_count
+            )
+            self.assertFalse(os.path.exists(td.name))
+        
+        return
+    
+    @unittest.skipUnless(IS_OS_POSIX_COMPLIANT, "Unix-like only test")
+    def test_remove_deep_directory_tree(self):
+        with tempfile.TemporaryDirectory() as td:
+            # Deeper than the recursion limit (and than the default limit of
+            # open file descriptors)
+            depth = 1500
+            removed_directory = os.path.join(td, "removed")
+            os.mkdir(removed_directory)
+            # os.makedirs() would recurse once per level
+            directory_fd = os.open(removed_directory, os.O_RDONLY)
+            try:
+                for i in range(depth):
+                    os.mkdir("d", dir_fd=directory_fd)
+                    subdirectory_fd = os.open(
+                        "d", os.O_RDONLY, dir_fd=directory_fd
+                    )
+                    os.close(directory_fd)
+                    directory_fd = subdirectory_fd
+                os.close(os.open(
+                    "file.txt", os.O_WRONLY | os.O_CREAT, dir_fd=directory_fd
+                ))
+            finally:
+                os.close(directory_fd)
+
+            d = Directory(removed_directory)
+            self.assertEqual(d.remove(empty_only=False), depth + 2)
+            self.assertFalse(os.path.exists(removed_directory))
+
+        return
+
+    @unittest.skipUnless(IS_OS_POSIX_COMPLIANT, "Unix-like only test")
+    def test_remove_directory_tree_does_not_follow_symbolic_links(self):
+        with tempfile.TemporaryDirectory() as td:
+            kept_directory = os.path.join(td, "kept")
+            create_directory_tree(kept_directory)
+            removed_directory = os.path.join(td, "removed")
+            os.mkdir(removed_directory)
+            os.symlink(
+                kept_directory, os.path.join(removed_directory, "link")
+            )
+            
+            Directory(removed_directory).remove(empty_only=False)
+            self.assertFalse(os.path.exists(removed_directory))
+            self.assertTrue(
+                os.path.exists(os.path.join(kept_directory, "a", "b", "c.txt"))
+            )
+        
+        return
+    
     def test_raise_exception_for_removing_non_empty_directory(self):
         td = tempfile.TemporaryDirectory()
         file = os.path.join(td.name, "hello-world.txt")
@@ -383,6 +460,557 @@ class TestDirectory(unittest.TestCase):
         
         return
     
+    def test_copy_directory(self):
+        with tempfile.TemporaryDirectory() as td:
+            source = os.path.join(td, "source")
+            create_directory_tree(source)
+            
+            d = Directory(source)
+            copied_directory = d.copy(td, new_directory_name="copy")
+            
+            self.assertIsInstance(copied_directory, Directory)
+            self.assertEqual(copied_directory.path, os.path.join(td, "copy"))
+            self.assertEqual(
+                list_directory_tree(copied_directory.path), 
+                list_directory_tree(source)
+            )
+            with open(os.path.join(td, "copy", "a", "b", "c.txt")) as f:
+                self.assertEqual(f.read(), "a/b/c.txt")
+        
+        return
+    
+    def test_copy_directory_with_filters(self):
+        with tempfile.TemporaryDirectory() as td:
+            source = os.path.join(td, "source")
+            create_directory_tree(source)
+            
+            d = Directory(source)
+            copied_directory = d.copy(
+                td, new_directory_name="copy", include="*.txt", exclude="b"
+            )
+            
+            self.assertEqual(
+                list_directory_tree(copied_directory.path), 
+                ["a", "a/a.txt", "root.txt"]
+            )
+        
+        return
+    
+    def test_copy_directory_raises_the_original_error(self):
+        def copy_entries(*args):
+            copier = args[-1]
+            copier.submit(mock.Mock(side_effect=OSError("copy failed")))
+            raise ValueError("walk failed")
+        
+        with tempfile.TemporaryDirectory() as td:
+            source = os.path.join(td, "source")
+            create_directory_tree(source)
+            
+            # Neither masked by the copy's error, nor mistaken for a value 
+            # given to Directory.copy
+            d = Directory(source)
+            with mock.patch.object(tree, "_copy_entries", copy_entries):
+                with self.assertRaisesRegex(ValueError, "walk failed"):
+                    d.copy(td, new_directory_name="copy")
+            self.assertFalse(os.path.exists(os.path.join(td, "copy")))
+        
+        return
+    
+    def test_raise_exception_on_copy_to_existing_path(self):
+        with tempfile.TemporaryDirectory() as td:
+            source = os.path.join(td, "source")
+            create_directory_tree(source)
+            
+            d = Directory(source)
+            with self.assertRaisesRegex(IsADirectoryError, "Cannot copy"):
+                d.copy(td)
+
+        return
+
+    def test_raise_exception_on_copy_into_itself(self):
+        with tempfile.TemporaryDirectory() as td:
+            create_directory_tree(td)
+
+            d = Directory(td)
+            with self.assertRaises(InvalidDirectoryValueError):
+                d.copy(td, new_directory_name="backup")
+            with self.assertRaises(InvalidDirectoryValueError):
+                d.copy(os.path.join(td, "a"), new_directory_name="backup")
+
+            self.assertEqual(
+                list_directory_tree(td),
+                ["a", "a/a.txt", "a/b", "a/b/c.txt", "a/b/d.log", "root.log",
+                 "root.txt"]
+            )
+
+        return
+
+    def test_remove_partial_copy_on_failure(self):
+        with tempfile.TemporaryDirectory() as td:
+            source = os.path.join(td, "source")
+            create_directory_tree(source)
+
+            d = Directory(source)
+            with mock.patch.object(
+                    tree, "_copy_file", side_effect=OSError("Failed")):
+                with self.assertRaises(OSError):
+                    d.copy(td, new_directory_name="copy")
+
+            self.assertFalse(os.path.exists(os.path.join(td, "copy")))
+
+        return
+    
+    def test_iterdir(self):
+        with tempfile.TemporaryDirectory() as td:
+            create_directory_tree(td)
+            d = Directory(td)
+            
+            entries = {entry.name: entry for entry in d.iterdir()}
+            self.assertEqual(
+                sorted(entries), ["a", "root.log", "root.txt"]
+            )
+            self.assertIsInstance(entries["a"], Directory)
+            self.assertIsInstance(entries["root.txt"], File)
+            self.assertEqual(entries["a"].path, os.path.join(d.path, "a"))
+            self.assertTrue(entries["a"].is_dir)
+            self.assertTrue(entries["root.txt"].is_file)
+            self.assertEqual(entries["root.txt"].size, len("root.txt"))
+            
+            self.assertEqual(
+                sorted(f.name for f in d.files()), ["root.log", "root.txt"]
+            )
+            self.assertEqual([sd.name for sd in d.directories()], ["a"])
+        
+        return
+    
+    def test_iterdir_seeds_stat_snapshot(self):
+        """The entry's metadata should be used, rather than a new os.stat()"""
+        with tempfile.TemporaryDirectory() as td:
+            create_directory_tree(td)
+            d = Directory(td)
+            f = next(f for f in d.files() if f.name == "root.txt")
+            
+            # The entry's metadata is used for the first read
+            with mock.patch("os.stat", side_effect=os.stat) as stat_:
+                self.assertEqual(f.size, len("root.txt"))
+                self.assertFalse(stat_.called)
+            
+            # But it doesn't become a snapshot that never expires
+            with open(f.path, mode="a", encoding=config._ENCODING) as tf:
+                tf.write("!")
+            self.assertEqual(f.size, len("root.txt!"))
+            
+            # With a stat_ttl, it's a snapshot (that expires)
+            d = Directory(td, stat_ttl=60)
+            f = next(f for f in d.files() if f.name == "root.txt")
+            self.assertEqual(f.size, len("root.txt!"))
+            with open(f.path, mode="a", encoding=config._ENCODING) as tf:
+                tf.write("!")
+            self.assertEqual(f.size, len("root.txt!"))
+            f.refresh()
+            self.assertEqual(f.size, len("root.txt!!"))
+        
+        return
+    
+    def test_iterdir_objects_are_not_stale(self):
+        with tempfile.TemporaryDirectory() as td:
+            create_directory_tree(td)
+            entries = {entry.name: entry for entry in Directory(td).iterdir()}
+            
+            with open(os.path.join(td, "root.txt"), mode="a",
+                      encoding=config._ENCODING) as tf:
+                tf.write("!")
+            self.assertEqual(entries["root.txt"].size, len("root.txt!"))
+            
+            os.remove(os.path.join(td, "root.log"))
+            self.assertFalse(entries["root.log"].exists)
+            
+            self.assertTrue(entries["a"].is_dir)
+            shutil.rmtree(os.path.join(td, "a"))
+            self.assertFalse(entries["a"].is_dir)
+        
+        return
+    
+    def test_walk(self):
+        with tempfile.TemporaryDirectory() as td:
+            create_directory_tree(td)
+            d = Directory(td)
+            
+            walked_paths = []
+            for directory, sub_directories, files in d.walk(max_workers=4):
+                for obj in sub_directories + files:
+                    self.assertIsInstance(
+                        obj, Directory if obj.name in ("a", "b") else File
+                    )
+                    walked_paths.append(
+                        os.path.relpath(obj.path, td).replace(os.sep, "/")
+                    )
+            
+            self.assertEqual(sorted(walked_paths), list_directory_tree(td))
+        
+        return
+    
+    def test_walk_ordered_matches_os_walk(self):
+        with tempfile.TemporaryDirectory() as td:
+            create_directory_tree(td)
+            for i in range(20):
+                os.makedirs(os.path.join(td, "many", str(i)))
+            
+            expected_paths = []
+            for root, directories, files in os.walk(td):
+                directories.sort()
+                expected_paths.append(root)
+            
+            d = Directory(td)
+            walked_paths = [
+                directory.path for directory, _, _ in d.walk(ordered=True)
+            ]
+            self.assertEqual(walked_paths, expected_paths)
+        
+        return
+    
+    def test_walk_ordered_when_a_result_never_arrives(self):
+        # The result of "top/a" is missing, so the results of its
+        # sub-directories are yielded at the end, instead of raising
+        results = [
+            ("top", 0, None, [], None, ("top/a", "top/b")),
+            ("top/a/y", 2, None, [], None, ()),
+            ("top/b", 1, None, [], None, ()),
+            ("top/a/x", 2, None, [], None, ()),
+        ]
+        ordered_paths = [
+            result[0] for result in walker._order_results("top", results)
+        ]
+        self.assertEqual(
+            ordered_paths, ["top", "top/b", "top/a/x", "top/a/y"]
+        )
+        
+        return
+    
+    def test_walk_max_depth(self):
+        with tempfile.TemporaryDirectory() as td:
+            create_directory_tree(td)
+            d = Directory(td)
+            
+            walked_names = [
+                directory.name for directory, _, _ in d.walk(max_depth=1)
+            ]
+            self.assertEqual(sorted(walked_names), sorted([d.name, "a"]))
+        
+        return
+    
+    @unittest.skipUnless(IS_OS_POSIX_COMPLIANT, "Unix-like only test")
+    def test_walk_detects_symbolic_link_loops(self):
+        with tempfile.TemporaryDirectory() as td:
+            create_directory_tree(td)
+            os.symlink(td, os.path.join(td, "a", "loop"))
+            d = Directory(td)
+            
+            walked_directories = [
+                directory for directory, _, _ in d.walk(follow_symlinks=True)
+            ]
+            self.assertEqual(len(walked_directories), 3)
+        
+        return
+    
+    def test_get_size(self):
+        with tempfile.TemporaryDirectory() as td:
+            create_directory_tree(td)
+            d = Directory(td)
+            
+            expected_size = sum(
+                len(relative_path) for relative_path in list_directory_tree(td)
+                if os.path.isfile(os.path.join(td, relative_path))
+            )
+            self.assertEqual(d.size, expected_size)
+            self.assertEqual(d.get_size(), expected_size)
+            self.assertGreaterEqual(d.get_size(allocated=True), 0)
+        
+        return
+    
+    @unittest.skipUnless(IS_OS_POSIX_COMPLIANT, "Unix-like only test")
+    def test_get_size_counts_hard_links_once(self):
+        with tempfile.TemporaryDirectory() as td:
+            create_directory_tree(td)
+            d = Directory(td)
+            expected_size = d.size
+            
+            os.link(
+                os.path.join(td, "root.txt"), 
+                os.path.join(td, "a", "b", "hard-link.txt")
+            )
+            self.assertEqual(d.size, expected_size)
+        
+        return
+    
+    def test_get_size_with_cache(self):
+        with tempfile.TemporaryDirectory() as td:
+            create_directory_tree(td)
+            d = Directory(td)
+            cache = {}
+            expected_size = d.get_size(cache=cache)
+            self.assertEqual(len(cache), 3)
+            self.assertEqual(d.get_size(cache=cache), expected_size)
+            
+            # Adding a file changes its directory's modification time, so the
+            # directory is measured again.
+            with open(os.path.join(td, "a", "new.txt"), mode="w") as f:
+                f.write("new")
+            os.utime(os.path.join(td, "a"), ns=(0, 0))
+            self.assertEqual(d.get_size(cache=cache), expected_size + 3)
+        
+        return
+    
+    def test_hash_files(self):
+        with tempfile.TemporaryDirectory() as td:
+            create_directory_tree(td)
+            d = Directory(td)
+            
+            expected_digests = {
+                relative_path: hashlib.sha256(
+                    relative_path.encode()
+                ).hexdigest()
+                for relative_path in list_directory_tree(td)
+                if os.path.isfile(os.path.join(td, relative_path))
+            }
+            results = list(d.hash_files(cache=False))
+            for f, digest in results:
+                self.assertIsInstance(f, File)
+            
+            digests = {
+                os.path.relpath(f.path, td): digest for f, digest in results
+            }
+            self.assertEqual(digests, expected_digests)
+        
+        return
+    
+    def test_find_duplicates(self):
+        with tempfile.TemporaryDirectory() as td:
+            create_directory_tree(td)
+            
+            def write(relative_path, data):
+                with open(os.path.join(td, relative_path), "wb") as f:
+                    f.write(data)
+                return
+            
+            large_data = os.urandom(20000)
+            write("large-1.bin", large_data)
+            write(os.path.join("a", "large-2.bin"), large_data)
+            # Same size, start, and end, but a different middle
+            write(
+                "large-3.bin", 
+                large_data[:10000] + b"x" + large_data[10001:]
+            )
+            write("small-1.txt", b"small")
+            write(os.path.join("a", "b", "small-2.txt"), b"small")
+            write("empty-1.txt", b"")
+            write("empty-2.txt", b"")
+            if IS_OS_POSIX_COMPLIANT:
+                os.link(
+                    os.path.join(td, "large-1.bin"),
+                    os.path.join(td, "hard-link.bin")
+                )
+            
+            groups = Directory(td).find_duplicates()
+            relative_groups = [
+                [os.path.relpath(f.path, td) for f in files] 
+                for files in groups
+            ]
+            self.assertEqual(len(relative_groups), 2)
+            self.assertIsInstance(groups[0][0], File)
+            
+            # The group that wastes the most space comes first
+            self.assertEqual(len(relative_groups[0]), 2)
+            self.assertIn(
+                os.path.join("a", "large-2.bin"), relative_groups[0]
+            )
+            self.assertEqual(
+                relative_groups[1], 
+                [os.path.join("a", "b", "small-2.txt"), "small-1.txt"]
+            )
+        
+        return
+    
+    def test_find(self):
+        with tempfile.TemporaryDirectory() as td:
+            create_directory_tree(td)
+            d = Directory(td)
+            
+            def find(**kwargs):
+                return sorted(
+                    os.path.relpath(found.path, td).replace(os.sep, "/") 
+                    for found in d.find(**kwargs)
+                )
+            
+            self.assertEqual(
+                find(), 
+                ["a", "a/a.txt", "a/b", "a/b/c.txt", "a/b/d.log", "root.log",
+                 "root.txt"]
+            )
+            self.assertEqual(find(name="c.txt"), ["a/b/c.txt"])
+            self.assertEqual(
+                find(glob="*.txt"), ["a/a.txt", "a/b/c.txt", "root.txt"]
+            )
+            self.assertEqual(find(glob="a/b/*"), ["a/b/c.txt", "a/b/d.log"])
+            self.assertEqual(find(regex=r"\.log$"), ["a/b/d.log", "root.log"])
+            self.assertEqual(find(type="directory"), ["a", "a/b"])
+            self.assertEqual(find(max_depth=0), ["a", "root.log", "root.txt"])
+            self.assertEqual(
+                find(glob="*.txt", exclude="b"), ["a/a.txt", "root.txt"]
+            )
+            
+            # Stat Predicates (the contents are the relative paths)
+            self.assertEqual(find(min_size=9), ["a/b/c.txt", "a/b/d.log"])
+            self.assertEqual(
+                find(max_size=8), ["a/a.txt", "root.log", "root.txt"]
+            )
+            os.utime(os.path.join(td, "root.txt"), (0, 0))
+            self.assertEqual(find(older_than=1), ["root.txt"])
+            self.assertEqual(
+                find(type="file", newer_than=datetime.datetime(1971, 1, 1)),
+                ["a/a.txt", "a/b/c.txt", "a/b/d.log", "root.log"]
+            )
+            
+            # Only the entries that pass the cheap predicates are stat'ed
+            matches = query.compile_predicates(name="x.txt", min_size=1)
+            entry = mock.Mock()
+            entry.name = "y.txt"
+            self.assertFalse(matches(entry, "y.txt"))
+            self.assertFalse(entry.stat.called)
+            
+            self.assertIsInstance(list(d.find(type="file"))[0], File)
+            # Raised by the call itself (without iterating)
+            self.assertRaises(InvalidDirectoryValueError, d.find, type="bogus")
+            self.assertRaises(InvalidDirectoryValueError, d.find, regex="(")
+        
+        return
+    
+    def test_glob(self):
+        with tempfile.TemporaryDirectory() as td:
+            create_directory_tree(td)
+            d = Directory(td)
+            
+            def glob(pattern, recursive=False):
+                matches = d.rglob(pattern) if recursive else d.glob(pattern)
+                return sorted(
+                    os.path.relpath(match.path, td).replace(os.sep, "/")
+                    for match in matches
+                )
+            
+            self.assertEqual(glob("*.txt"), ["root.txt"])
+            self.assertEqual(glob("root.*"), ["root.log", "root.txt"])
+            self.assertEqual(glob("a/*"), ["a/a.txt", "a/b"])
+            self.assertEqual(glob("*/*/c.txt"), ["a/b/c.txt"])
+            self.assertEqual(glob("a/?/[cd].*"), ["a/b/c.txt", "a/b/d.log"])
+            self.assertEqual(glob("a/b/[!c]*"), ["a/b/d.log"])
+            self.assertEqual(
+                glob("**/*.txt"), ["a/a.txt", "a/b/c.txt", "root.txt"]
+            )
+            self.assertEqual(glob("a/**"), ["a/a.txt", "a/b", "a/b/c.txt", 
+                                            "a/b/d.log"])
+            self.assertEqual(glob("a/**/b"), ["a/b"])
+            self.assertEqual(
+                glob("{root,a/b/*}.{log,txt}"), 
+                ["a/b/c.txt", "a/b/d.log", "root.log", "root.txt"]
+            )
+            self.assertEqual(glob("*.txt", recursive=True), 
+                             ["a/a.txt", "a/b/c.txt", "root.txt"])
+            
+            # Literal Paths
+            self.assertEqual(glob("a/b"), ["a/b"])
+            self.assertIsInstance(next(d.glob("a/b")), Directory)
+            self.assertIsInstance(next(d.glob("a/*.txt")), File)
+            self.assertEqual(glob("missing/*.txt"), [])
+            self.assertEqual(glob("missing"), [])
+            
+            self.assertRaises(InvalidDirectoryValueError, d.glob, "")
+            self.assertRaises(InvalidDirectoryValueError, d.glob, "/a/*")
+            # Nothing outside of the directory should be matched
+            for pattern in ("../*", "a/../../*", "{a,..}/*", ".."):
+                with self.subTest(pattern=pattern):
+                    self.assertRaises(
+                        InvalidDirectoryValueError, d.glob, pattern
+                    )
+            self.assertRaises(InvalidDirectoryValueError, d.rglob, "../*")
+            # An invalid character range
+            self.assertRaises(InvalidDirectoryValueError, d.glob, "[z-a]*")
+        
+        return
+    
+    def test_glob_prunes_directories(self):
+        groups = globbing.compile_pattern("a/*/c/*.txt")
+        self.assertEqual(len(groups), 1)
+        prefix, matcher = groups[0]
+        self.assertEqual(prefix, ("a",))
+        self.assertEqual(matcher.max_depth, 2)
+        self.assertTrue(matcher.can_contain_matches("b", 1))
+        self.assertTrue(matcher.can_contain_matches("b/c", 2))
+        self.assertFalse(matcher.can_contain_matches("b/d", 2))
+        
+        return
+    
+    def test_top_k(self):
+        with tempfile.TemporaryDirectory() as td:
+            create_directory_tree(td)
+            d = Directory(td)
+            
+            def relative_paths(files):
+                return [
+                    os.path.relpath(f.path, td).replace(os.sep, "/") 
+                    for f in files
+                ]
+            
+            # The contents are the relative paths (ties are ranked by path)
+            self.assertEqual(
+                relative_paths(d.largest(3)), 
+                ["a/b/d.log", "a/b/c.txt", "root.txt"]
+            )
+            self.assertIsInstance(d.largest(1)[0], File)
+            self.assertEqual(len(d.largest(100)), 5)
+            self.assertEqual(d.largest(0), [])
+            
+            os.utime(os.path.join(td, "a", "a.txt"), ns=(0, 0))
+            os.utime(os.path.join(td, "root.log"), ns=(0, 10))
+            self.assertEqual(
+                relative_paths(d.oldest(2)), ["a/a.txt", "root.log"]
+            )
+            
+            smallest = d.top_k(2, key=lambda stat_result: -stat_result.st_size)
+            self.assertEqual(relative_paths(smallest), ["a/a.txt", "root.txt"])
+        
+        return
+    
+    def test_raise_exception_for_size_of_nonexistent_directory(self):
+        d = Directory(self.fake_path)
+        with self.assertRaises(FileNotFoundError):
+            d.size
+        
+        return
+    
+    def test_stat_returns_snapshot(self):
+        with tempfile.TemporaryDirectory() as td:
+            d = Directory(td)
+            stat_result = d.stat()
+            self.assertEqual(stat_result.st_ino, os.stat(td).st_ino)
+            self.assertIs(d.stat(), stat_result)
+            
+            d.refresh()
+            self.assertIsNot(d.stat(), stat_result)
+        
+        return
+    
+    def test_stat_snapshot_invalidated_after_remove(self):
+        td = tempfile.TemporaryDirectory()
+        with TemporaryDirectoryHandler(td):
+            d = Directory(td.name)
+            d.refresh()
+            self.assertTrue(d.is_dir)
+            d.remove()
+            self.assertFalse(d.exists)
+            self.assertFalse(d.is_dir)
+        
+        return
+    
     
 
 @unittest.skipUnless(IS_OS_POSIX_COMPLIANT, "Unix-like only test")
@@ -577,6 +1205,36 @@ class TestDirectoryWindows(unittest.TestCase):
         return     
     
     
+# Helper Functions (non-tests)
+def create_directory_tree(path):
+    """
+    Create a small directory tree to test with. Each file contains its path
+    relative to the root of the tree.
+    
+    """
+    relative_file_paths = (
+        "root.txt", "root.log", "a/a.txt", "a/b/c.txt", "a/b/d.log"
+    )
+    for relative_file_path in relative_file_paths:
+        file_path = os.path.join(path, relative_file_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, mode="w", encoding=config._ENCODING) as f:
+            f.write(relative_file_path)
+    
+    return
+
+
+def list_directory_tree(path):
+    """Get the sorted, relative paths of everything in a directory tree"""
+    relative_paths = []
+    for root, directories, files in os.walk(path):
+        for name in directories + files:
+            relative_path = os.path.relpath(os.path.join(root, name), path)
+            relative_paths.append(relative_path.replace(os.sep, "/"))
+    
+    return sorted(relative_paths)
+
+
 # Custom Classes (non-tests)  
 class TemporaryDirectoryHandler:
     """This class should only be used (as a context manager) by tests that 
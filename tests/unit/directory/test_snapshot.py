@@ -0,0 +1,149 @@
+"""Contains the unit tests for the inner snapshot module"""
+
+import unittest
+import tempfile
+import os
+from unittest import mock
+
+from classyfd import Directory, InvalidDirectoryValueError, config
+from classyfd.directory import Snapshot, walker
+
+
+# Tests
+class TestSnapshot(unittest.TestCase):
+    """Contains the cross-platform tests"""
+    def setUp(self):
+        self._temporary_directory = tempfile.TemporaryDirectory()
+        self.index_path = os.path.join(
+            self._temporary_directory.name, "index.sqlite3"
+        )
+        self.root = os.path.join(self._temporary_directory.name, "tree")
+        for relative_path in ("a.txt", "b/c.txt", "b/d/e.txt", "f/g.txt"):
+            self._write(relative_path, relative_path)
+        
+        self.directory = Directory(self.root)
+        return
+    
+    def tearDown(self):
+        self._temporary_directory.cleanup()
+        return
+    
+    def _write(self, relative_path, data):
+        path = os.path.join(self.root, *relative_path.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, mode="w", encoding=config._ENCODING) as f:
+            f.write(data)
+        
+        return
+    
+    def _path(self, relative_path):
+        return os.path.join(self.root, *relative_path.split("/"))
+    
+    def _touch_directory(self, relative_path):
+        """Make sure the directory's modification time changes"""
+        os.utime(self._path(relative_path), ns=(0, 0))
+        return
+    
+    def test_create_snapshot(self):
+        with self.directory.snapshot(self.index_path) as snapshot:
+            self.assertIsInstance(snapshot, Snapshot)
+            self.assertEqual(snapshot.root, self.directory.path)
+            # The root, 4 files, and 3 directories
+            self.assertEqual(len(snapshot), 8)
+            
+            record = snapshot.get("b/d/e.txt")
+            self.assertEqual(record["size"], len("b/d/e.txt"))
+            self.assertFalse(record["is_dir"])
+            self.assertEqual(
+                sorted(snapshot.get_children("b")), ["c.txt", "d"]
+            )
+        
+        # It can be opened again later
+        with Snapshot(self.index_path) as snapshot:
+            self.assertEqual(len(snapshot), 8)
+        
+        return
+    
+    def test_raise_exception_for_existing_index(self):
+        self.directory.snapshot(self.index_path).close()
+        self.assertRaises(
+            FileExistsError, self.directory.snapshot, self.index_path
+        )
+        return
+    
+    def test_failed_snapshot_leaves_no_index(self):
+        with mock.patch.object(
+                walker, "scan_tree", side_effect=OSError("scan failed")):
+            self.assertRaises(
+                OSError, self.directory.snapshot, self.index_path
+            )
+        
+        # Neither the index, nor its temporary file, is left behind
+        self.assertEqual(
+            os.listdir(self._temporary_directory.name), ["tree"]
+        )
+        
+        # So it can just be tried again
+        self.directory.snapshot(self.index_path).close()
+        return
+    
+    def test_rescan_unchanged_tree(self):
+        with self.directory.snapshot(self.index_path) as snapshot:
+            changes = self.directory.rescan(snapshot)
+        
+        self.assertEqual(
+            changes, {"added": [], "removed": [], "modified": []}
+        )
+        return
+    
+    def test_rescan_finds_changes(self):
+        with self.directory.snapshot(self.index_path) as snapshot:
+            self._write("b/d/new.txt", "new")
+            self._touch_directory("b/d")
+            os.remove(self._path("f/g.txt"))
+            os.rmdir(self._path("f"))
+            self._touch_directory("")
+            os.makedirs(self._path("h/i"))
+            self._write("h/i/j.txt", "j")
+            self._write("b/c.txt", "modified")
+            self._touch_directory("b")
+            
+            changes = self.directory.rescan(snapshot, update=True)
+            added_paths = ("b/d/new.txt", "h", "h/i", "h/i/j.txt")
+            self.assertEqual(
+                changes["added"], [self._path(p) for p in added_paths]
+            )
+            self.assertEqual(
+                changes["removed"], [self._path(p) for p in ("f", "f/g.txt")]
+            )
+            self.assertIn(self._path("b/c.txt"), changes["modified"])
+            
+            # The snapshot was updated, so there's nothing new to find
+            changes = self.directory.rescan(snapshot)
+            self.assertEqual(
+                changes, {"added": [], "removed": [], "modified": []}
+            )
+        
+        return
+    
+    def test_rescan_thorough_finds_files_modified_in_place(self):
+        with self.directory.snapshot(self.index_path) as snapshot:
+            self._write("b/d/e.txt", "modified in place")
+            
+            changes = self.directory.rescan(snapshot, thorough=True)
+            self.assertEqual(changes["modified"], [self._path("b/d/e.txt")])
+        
+        return
+    
+    def test_raise_exception_for_rescan_of_another_directory(self):
+        with self.directory.snapshot(self.index_path) as snapshot:
+            other_directory = Directory(self._path("b"))
+            self.assertRaises(
+                InvalidDirectoryValueError, other_directory.rescan, snapshot
+            )
+        
+        return
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,6 +7,14 @@ import pathlib
 import shutil
 import platform
 import io
+import mmap
+import time
+import errno
+import hashlib
+import operator
+import random
+import threading
+from unittest import mock
 # Unix-like Only Imports
 try:
     import pwd
@@ -15,6 +23,10 @@ except ImportError:
     pass
 
 from classyfd import File, FileError, InvalidFileValueError, utils, config
+from classyfd.file import (
+    Appender, DigestCache, appending, comparing, hash_files, hashing, lines,
+    sorting
+)
 
 
 # Globals
@@ -490,6 +502,31 @@ class TestFile(unittest.TestCase):
                 
         return
     
+    def test_move_file_across_file_systems(self):
+        """
+        When the directory is on another file system, the file should be 
+        copied over and the original removed.
+        
+        """
+        td = tempfile.TemporaryDirectory()
+        tf = tempfile.NamedTemporaryFile(delete=False)
+        tf.write(b"Hello, world!")
+        tf.close()
+        
+        cross_device_error = OSError(errno.EXDEV, "Invalid cross-device link")
+        with TemporaryDirectoryHandler(td):
+            with TemporaryFileHandler(tf):
+                f = File(tf.name)
+                with mock.patch("os.rename", side_effect=cross_device_error):
+                    f.move(td.name)
+                
+                self.assertFalse(os.path.exists(tf.name))
+                self.assertEqual(f.path, os.path.join(td.name, f.name))
+                with f.open(mode="rb") as moved_file:
+                    self.assertEqual(moved_file.read(), b"Hello, world!")
+        
+        return
+    
     def test_move_file_updates_path(self):
         """When a file is moved, its path should be updated."""
         td1 = tempfile.TemporaryDirectory()
@@ -596,6 +633,69 @@ class TestFile(unittest.TestCase):
         
         return
     
+    def test_copy_file(self):
+        td = tempfile.TemporaryDirectory()
+        tf = tempfile.NamedTemporaryFile(delete=False)
+        tf.write(b"Hello, world!")
+        tf.close()
+        
+        with TemporaryDirectoryHandler(td):
+            with TemporaryFileHandler(tf):
+                os.chmod(tf.name, 0o640)
+                f = File(tf.name)
+                copied_file = f.copy(td.name)
+                
+                expected_path = os.path.join(td.name, f.name)
+                self.assertIsInstance(copied_file, File)
+                self.assertEqual(copied_file.path, expected_path)
+                with open(expected_path, mode="rb") as copy:
+                    self.assertEqual(copy.read(), b"Hello, world!")
+                
+                # The original should be left alone
+                self.assertTrue(os.path.exists(tf.name))
+                
+                if IS_OS_POSIX_COMPLIANT:
+                    self.assertEqual(
+                        os.stat(expected_path).st_mode & 0o777, 0o640
+                    )
+                
+                # With a New File Name
+                copied_file = f.copy(td.name, new_file_name="hello-world.txt")
+                self.assertEqual(
+                    copied_file.path, os.path.join(td.name, "hello-world.txt")
+                )
+                self.assertEqual(copied_file.size, 13)
+        
+        return
+    
+    def test_raise_exception_on_copy_to_existing_path(self):
+        td = tempfile.TemporaryDirectory()
+        tf = tempfile.NamedTemporaryFile(delete=False)
+        tf.write(b"Hello, world!")
+        tf.close()
+        
+        with TemporaryDirectoryHandler(td):
+            with TemporaryFileHandler(tf):
+                f = File(tf.name)
+                existing_file_path = os.path.join(td.name, f.name)
+                with open(existing_file_path, mode="wb") as existing_file:
+                    existing_file.write(b"Goodbye!")
+                
+                self.assertRaises(FileExistsError, f.copy, td.name)
+                
+                # Replacing the existing file should work, however
+                f.copy(td.name, replace_existing_file=True)
+                with open(existing_file_path, mode="rb") as copy:
+                    self.assertEqual(copy.read(), b"Hello, world!")
+                
+                # A file can't be copied onto itself
+                self.assertRaises(
+                    InvalidFileValueError, f.copy, f.parent, 
+                    replace_existing_file=True
+                )
+        
+        return
+    
     def test_is_file(self):
         # Fake Path
         f = File(self.fake_path)
@@ -699,6 +799,688 @@ class TestFile(unittest.TestCase):
         self.assertRaises(ValueError, my_file.open, self.fake_path)
         return
     
+    def test_iter_chunks(self):
+        data = os.urandom(10 * 1024 + 5)
+        with tempfile.NamedTemporaryFile() as tf:
+            tf.write(data)
+            tf.flush()
+            
+            f = File(tf.name)
+            chunks = [bytes(chunk) for chunk in f.iter_chunks(chunk_size=1024)]
+            self.assertEqual(len(chunks), 11)
+            self.assertEqual(b"".join(chunks), data)
+            self.assertEqual(len(chunks[-1]), 5)
+            
+            self.assertRaises(ValueError, list, f.iter_chunks(chunk_size=0))
+        
+        return
+    
+    def test_readinto_chunks(self):
+        data = os.urandom(4096)
+        with tempfile.NamedTemporaryFile() as tf:
+            tf.write(data)
+            tf.flush()
+            
+            f = File(tf.name)
+            buffer = bytearray(1000)
+            chunks = []
+            for chunk in f.readinto_chunks(buffer):
+                self.assertIs(chunk.obj, buffer)
+                chunks.append(bytes(chunk))
+            
+            self.assertEqual(b"".join(chunks), data)
+            self.assertEqual([len(c) for c in chunks], [1000] * 4 + [96])
+        
+        # An Empty File
+        with tempfile.NamedTemporaryFile() as tf:
+            f = File(tf.name)
+            self.assertEqual(list(f.readinto_chunks(bytearray(10))), [])
+        
+        return
+    
+    def test_read_ranges(self):
+        data = os.urandom(100000)
+        with tempfile.NamedTemporaryFile() as tf:
+            tf.write(data)
+            tf.flush()
+            f = File(tf.name)
+            
+            ranges = [
+                (50000, 10), (0, 100), (50, 100), (99990, 100), (100, 0),
+                (200000, 5), (60000, 3)
+            ]
+            views = f.read_ranges(ranges)
+            self.assertEqual(
+                [view.tobytes() for view in views],
+                [data[offset:offset + length] for offset, length in ranges]
+            )
+            
+            # Without merging
+            views = f.read_ranges(ranges, max_gap=0)
+            self.assertEqual(
+                [view.tobytes() for view in views],
+                [data[offset:offset + length] for offset, length in ranges]
+            )
+            
+            self.assertEqual(f.read_ranges([]), [])
+            self.assertRaises(ValueError, f.read_ranges, [(-1, 10)])
+        
+        return
+    
+    def test_count_lines(self):
+        with tempfile.TemporaryDirectory() as td:
+            file_path = os.path.join(td, "file.txt")
+            f = File(file_path)
+            for data, expected_count in ((b"", 0), (b"a", 1), (b"a\n", 1), 
+                                         (b"a\n\nb", 3)):
+                with open(file_path, "wb") as written_file:
+                    written_file.write(data)
+                self.assertEqual(f.count_lines(), expected_count)
+            
+            # Split into several chunks
+            with mock.patch.object(lines, "_COUNT_CHUNK_SIZE", 7):
+                with open(file_path, "wb") as written_file:
+                    written_file.write(b"line\n" * 100)
+                self.assertEqual(f.count_lines(max_workers=4), 100)
+                
+                # No more threads (each holding a chunk) than pooled buffers
+                with mock.patch.object(
+                        lines, "ThreadPoolExecutor",
+                        wraps=lines.ThreadPoolExecutor) as executor_class:
+                    self.assertEqual(f.count_lines(max_workers=32), 100)
+                self.assertEqual(
+                    executor_class.call_args[1]["max_workers"],
+                    lines.reading._buffer_pool.max_buffers_per_size
+                )
+            
+            for max_workers in (0, -1):
+                self.assertRaises(
+                    InvalidFileValueError, f.count_lines, 
+                    max_workers=max_workers
+                )
+        
+        return
+    
+    def test_read_line_with_line_index(self):
+        with tempfile.TemporaryDirectory() as td:
+            file_path = os.path.join(td, "file.txt")
+            with open(file_path, "wb") as written_file:
+                for i in range(1000):
+                    written_file.write("line {i}\n".format(i=i).encode())
+                written_file.write(b"no newline")
+            f = File(file_path)
+            
+            # Without an Index
+            self.assertEqual(f.read_line(10), b"line 10\n")
+            
+            self.assertEqual(f.build_line_index(interval=64), 1001)
+            index_path = file_path + ".lineindex"
+            self.assertIsNotNone(lines._load_line_index(file_path, index_path))
+            self.assertEqual(f.read_line(0), b"line 0\n")
+            self.assertEqual(f.read_line(64), b"line 64\n")
+            self.assertEqual(f.read_line(999), b"line 999\n")
+            self.assertEqual(f.read_line(1000), b"no newline")
+            self.assertRaises(IndexError, f.read_line, 1001)
+            self.assertRaises(IndexError, f.read_line, -1)
+            
+            # An out of date index isn't used
+            with open(file_path, "ab") as written_file:
+                written_file.write(b"\nlast")
+            self.assertIsNone(lines._load_line_index(file_path, index_path))
+            self.assertEqual(f.read_line(1001), b"last")
+            
+            index_path = os.path.join(td, "index")
+            f.build_line_index(index_path=index_path, interval=1)
+            self.assertEqual(
+                f.read_line(500, index_path=index_path), b"line 500\n"
+            )
+        
+        return
+    
+    def test_map_lines(self):
+        with tempfile.TemporaryDirectory() as td:
+            file_path = os.path.join(td, "file.txt")
+            with open(file_path, "wb") as written_file:
+                for i in range(500):
+                    written_file.write("{i}\n".format(i=i).encode())
+                written_file.write(b"500")
+            f = File(file_path)
+            
+            results = list(f.map_lines(int, max_workers=2, range_size=100))
+            self.assertEqual(results, list(range(501)))
+            
+            results = f.map_lines(
+                int, max_workers=2, ordered=False, range_size=100
+            )
+            self.assertEqual(sorted(results), list(range(501)))
+            
+            self.assertEqual(
+                f.map_lines(
+                    len, max_workers=2, reduce=operator.add, range_size=100
+                ),
+                os.path.getsize(file_path)
+            )
+            
+            # An Empty File
+            with open(file_path, "wb"):
+                pass
+            self.assertEqual(list(f.map_lines(int)), [])
+            self.assertIsNone(f.map_lines(int, reduce=operator.add))
+        
+        return
+    
+    def test_sort(self):
+        with tempfile.TemporaryDirectory() as td:
+            file_path = os.path.join(td, "file.txt")
+            numbers = list(range(1000))
+            random.shuffle(numbers)
+            with open(file_path, "wb") as written_file:
+                written_file.write(
+                    b"\n".join(str(n).encode() for n in numbers)
+                )
+            f = File(file_path)
+            expected_lines = [
+                "{n}\n".format(n=n).encode() for n in sorted(numbers)
+            ]
+            
+            # In Memory
+            output = f.sort(os.path.join(td, "sorted.txt"), key=int)
+            self.assertIsInstance(output, File)
+            with output.open(mode="rb") as sorted_file:
+                self.assertEqual(sorted_file.readlines(), expected_lines)
+            
+            # Runs (Merged in Several Passes), in Worker Processes
+            with mock.patch.object(sorting, "_MAX_MERGE_WIDTH", 4):
+                output = f.sort(
+                    output, key=int, memory_limit=500, max_workers=2
+                )
+            with output.open(mode="rb") as sorted_file:
+                self.assertEqual(sorted_file.readlines(), expected_lines)
+            
+            # In Place, Descending
+            f.sort(f, reverse=True, memory_limit=500)
+            with f.open(mode="rb") as sorted_file:
+                self.assertEqual(
+                    sorted_file.readlines(), 
+                    sorted(expected_lines, reverse=True)
+                )
+            
+            # Only the files themselves are left behind
+            self.assertEqual(
+                sorted(os.listdir(td)), ["file.txt", "sorted.txt"]
+            )
+        
+        return
+    
+    def test_sort_only_splits_lines_on_newlines(self):
+        with tempfile.TemporaryDirectory() as td:
+            file_path = os.path.join(td, "file.txt")
+            lines_ = [
+                b"c\rb\n", b"b\x0ba\n", b"a\x85\x1cz\n", b"d\x0c\r\n"
+            ]
+            with open(file_path, "wb") as written_file:
+                written_file.write(b"".join(lines_))
+            f = File(file_path)
+            
+            for memory_limit in (sorting.DEFAULT_MEMORY_LIMIT, 10):
+                with self.subTest(memory_limit=memory_limit):
+                    output = f.sort(
+                        os.path.join(td, "sorted.txt"),
+                        memory_limit=memory_limit
+                    )
+                    with output.open(mode="rb") as sorted_file:
+                        self.assertEqual(sorted_file.read(), b"".join(
+                            sorted(lines_)
+                        ))
+        
+        return
+    
+    def test_equals(self):
+        with tempfile.TemporaryDirectory() as td:
+            def write(name, data):
+                file_path = os.path.join(td, name)
+                with open(file_path, "wb") as f:
+                    f.write(data)
+                return File(file_path)
+            
+            data = os.urandom(3 * 1024 * 1024)
+            f = write("file.bin", data)
+            copy = write("copy.bin", data)
+            self.assertTrue(f.equals(f))
+            self.assertTrue(f.equals(copy, cache=False))
+            self.assertTrue(f.equals(copy.path, cache=False))
+            
+            # Different Sizes
+            self.assertFalse(f.equals(write("shorter.bin", data[:-1])))
+            # A Difference in a Sampled Block
+            self.assertFalse(f.equals(write("head.bin", b"x" + data[1:])))
+            # A Difference Between the Sampled Blocks
+            different_middle = bytearray(data)
+            different_middle[1024 * 1024] ^= 0xff
+            different = write("middle.bin", bytes(different_middle))
+            self.assertFalse(f.equals(different, cache=False))
+            
+            # Shallow
+            os.utime(different.path, ns=(0, 0))
+            os.utime(f.path, ns=(0, 0))
+            self.assertTrue(f.equals(different, shallow=True))
+            
+            # Cached Digests
+            with DigestCache() as cache:
+                f.hash(cache=cache)
+                different.hash(cache=cache)
+                with mock.patch.object(
+                    comparing, "_stream_equal"
+                ) as stream_equal:
+                    self.assertFalse(f.equals(different, cache=cache))
+                    self.assertFalse(stream_equal.called)
+            
+            # Small Files
+            self.assertTrue(write("a.txt", b"a").equals(write("b.txt", b"a")))
+            self.assertTrue(write("c.txt", b"").equals(write("d.txt", b"")))
+        
+        return
+    
+    def test_mmap(self):
+        data = os.urandom(3 * mmap.ALLOCATIONGRANULARITY)
+        with tempfile.NamedTemporaryFile() as tf:
+            tf.write(data)
+            tf.flush()
+            f = File(tf.name)
+            
+            with f.mmap(advice="random") as (mapping, view):
+                self.assertEqual(len(mapping), len(data))
+                self.assertEqual(view[100:200], data[100:200])
+            
+            # An unaligned offset
+            offset = mmap.ALLOCATIONGRANULARITY + 7
+            with f.mmap(offset=offset, length=10) as (mapping, view):
+                self.assertEqual(view.tobytes(), data[offset:offset + 10])
+            
+            # Changes are written through to the file
+            with f.mmap(access="write", offset=1, length=1) as (mapping, view):
+                view[0] = 0
+            with f.open(mode="rb") as written_file:
+                self.assertEqual(written_file.read(2)[1], 0)
+            
+            self.assertRaises(
+                ValueError, f.mmap(offset=len(data), length=1).__enter__
+            )
+            self.assertRaises(ValueError, f.mmap(access="x").__enter__)
+        
+        # An Empty File
+        with tempfile.NamedTemporaryFile() as tf:
+            with File(tf.name).mmap() as (mapping, view):
+                self.assertIsNone(mapping)
+                self.assertEqual(len(view), 0)
+        
+        return
+    
+    def test_hash(self):
+        with tempfile.TemporaryDirectory() as td:
+            file_path = os.path.join(td, "file.bin")
+            with open(file_path, "wb") as f:
+                f.write(b"abc")
+            f = File(file_path)
+            cache = DigestCache(os.path.join(td, "digests.db"))
+            
+            expected_digest = hashlib.sha256(b"abc").hexdigest()
+            self.assertEqual(f.hash(cache=cache), expected_digest)
+            self.assertEqual(len(cache), 1)
+            self.assertEqual(
+                f.hash("md5", cache=False), hashlib.md5(b"abc").hexdigest()
+            )
+            
+            # Unchanged files aren't hashed again
+            with mock.patch.object(
+                hashing.reading, "iter_chunks"
+            ) as iter_chunks:
+                self.assertEqual(f.hash(cache=cache), expected_digest)
+                self.assertFalse(iter_chunks.called)
+            
+            # Changed files are
+            with open(file_path, "wb") as changed_file:
+                changed_file.write(b"abcd")
+            os.utime(file_path, ns=(0, 0))
+            self.assertEqual(
+                f.hash(cache=cache), hashlib.sha256(b"abcd").hexdigest()
+            )
+            self.assertEqual(len(cache), 1)
+            
+            cache.close()
+            self.assertRaises(ValueError, f.hash, "no-such-algorithm")
+
+        return
+
+    def test_digest_cache_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as td:
+            files = []
+            for name in ("a", "b", "c"):
+                file_path = os.path.join(td, name)
+                with open(file_path, "wb") as f:
+                    f.write(name.encode())
+                files.append(File(file_path))
+
+            with DigestCache(max_entries=2) as cache:
+                files[0].hash(cache=cache)
+                files[1].hash(cache=cache)
+                # Using "a" makes "b" the least recently used
+                files[0].hash(cache=cache)
+                files[2].hash(cache=cache)
+
+                self.assertEqual(len(cache), 2)
+                for f, is_cached in zip(files, (True, False, True)):
+                    digest = cache.get(os.stat(f.path), "sha256")
+                    self.assertEqual(digest is not None, is_cached)
+
+            self.assertIsNotNone(hashing._get_default_cache().max_entries)
+            self.assertRaises(ValueError, DigestCache, max_entries=0)
+
+        return
+    
+    def test_hash_files(self):
+        with tempfile.TemporaryDirectory() as td:
+            contents = {}
+            for i, size in enumerate((0, 10, hashing._SMALL_FILE_SIZE + 1)):
+                file_path = os.path.join(td, "{i}.bin".format(i=i))
+                contents[file_path] = os.urandom(size)
+                with open(file_path, "wb") as f:
+                    f.write(contents[file_path])
+            
+            expected_digests = {
+                file_path: hashlib.sha256(data).hexdigest()
+                for file_path, data in contents.items()
+            }
+            files = [File(file_path) for file_path in contents]
+            
+            # Threads, Given File Objects
+            results = dict(hash_files(files, cache=False))
+            self.assertEqual(set(results), set(files))
+            self.assertEqual(
+                {f.path: digest for f, digest in results.items()}, 
+                expected_digests
+            )
+            
+            # Processes, Given Paths
+            with DigestCache() as cache:
+                results = dict(
+                    hash_files(
+                        contents, cache=cache, max_workers=2, 
+                        use_processes=True
+                    )
+                )
+                self.assertEqual(results, expected_digests)
+                self.assertEqual(len(cache), len(contents))
+            
+            # Errors
+            missing_path = os.path.join(td, "missing.bin")
+            self.assertRaises(
+                FileNotFoundError, list, hash_files([missing_path])
+            )
+            errors = []
+            results = dict(
+                hash_files(
+                    [missing_path] + list(contents), cache=False, 
+                    on_error=errors.append
+                )
+            )
+            self.assertEqual(results, expected_digests)
+            self.assertEqual(len(errors), 1)
+        
+        return
+    
+    def test_hash_files_batches_largest_first(self):
+        stat_results = [
+            os.stat_result((0,) * 6 + (size,) + (0,) * 3)
+            for size in (1, hashing._SMALL_FILE_SIZE, 2, 
+                         hashing._SMALL_FILE_SIZE * 2)
+        ]
+        items = [(None, None, stat_result) for stat_result in stat_results]
+        batches = hashing._make_batches(items)
+        
+        sizes = [[item[2].st_size for item in batch] for batch in batches]
+        self.assertEqual(
+            sizes, 
+            [[hashing._SMALL_FILE_SIZE * 2], [hashing._SMALL_FILE_SIZE], 
+             [2, 1]]
+        )
+        
+        return
+    
+    def test_write_atomic(self):
+        with tempfile.TemporaryDirectory() as td:
+            file_path = os.path.join(td, "file.txt")
+            f = File(file_path)
+            
+            f.write_atomic(b"bytes")
+            with open(file_path, "rb") as written_file:
+                self.assertEqual(written_file.read(), b"bytes")
+            
+            os.chmod(file_path, 0o600)
+            f.write_atomic(("line {i}\n".format(i=i) for i in range(3)))
+            with open(file_path) as written_file:
+                self.assertEqual(
+                    written_file.read(), "line 0\nline 1\nline 2\n"
+                )
+            if IS_OS_POSIX_COMPLIANT:
+                self.assertEqual(os.stat(file_path).st_mode & 0o777, 0o600)
+            
+            # Text is encoded with the package's encoding (not the locale's)
+            with mock.patch(
+                    "classyfd.file.writing.open", create=True,
+                    side_effect=open) as open_:
+                f.write_atomic("caf\u00e9")
+            self.assertEqual(
+                open_.call_args[1]["encoding"], config._ENCODING
+            )
+            with open(file_path, "rb") as written_file:
+                self.assertEqual(
+                    written_file.read(), "caf\u00e9".encode(config._ENCODING)
+                )
+            
+            # Only the file itself is left behind
+            self.assertEqual(os.listdir(td), ["file.txt"])
+        
+        return
+    
+    def test_atomic_writer_leaves_file_alone_on_error(self):
+        with tempfile.TemporaryDirectory() as td:
+            file_path = os.path.join(td, "file.txt")
+            with open(file_path, "w") as f:
+                f.write("old")
+            f = File(file_path)
+            
+            with self.assertRaises(RuntimeError):
+                with f.atomic_writer(mode="w") as writer:
+                    writer.write("new")
+                    raise RuntimeError()
+            
+            with open(file_path) as written_file:
+                self.assertEqual(written_file.read(), "old")
+            self.assertEqual(os.listdir(td), ["file.txt"])
+            
+            with f.atomic_writer() as writer:
+                writer.write(b"new")
+            self.assertEqual(f.size, 3)
+            self.assertRaises(ValueError, f.atomic_writer(mode="a").__enter__)
+        
+        return
+    
+    def test_appender(self):
+        with tempfile.TemporaryDirectory() as td:
+            file_path = os.path.join(td, "log.txt")
+            f = File(file_path)
+            
+            fsync_calls = []
+            def slow_fsync(fd):
+                fsync_calls.append(fd)
+                time.sleep(0.005)
+                return
+            
+            def produce(producer_id):
+                for i in range(20):
+                    line = "{producer_id} {i}\n".format(
+                        producer_id=producer_id, i=i
+                    )
+                    appender.append(line.encode(), wait=True)
+                return
+            
+            with mock.patch.object(appending.os, "fsync", slow_fsync):
+                with f.appender(flush_interval=10) as appender:
+                    threads = [
+                        threading.Thread(target=produce, args=(producer_id,))
+                        for producer_id in range(8)
+                    ]
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+                    
+                    appender.append(b"last\n")
+                    self.assertIsInstance(appender, Appender)
+                
+                self.assertTrue(appender.closed)
+            
+            with open(file_path) as written_file:
+                lines = written_file.read().splitlines()
+            self.assertEqual(len(lines), 8 * 20 + 1)
+            self.assertEqual(lines[-1], "last")
+            self.assertEqual(
+                set(lines[:-1]), 
+                {
+                    "{p} {i}".format(p=p, i=i) 
+                    for p in range(8) for i in range(20)
+                }
+            )
+            # The waiting producers shared fsyncs
+            self.assertLess(len(fsync_calls), 8 * 20)
+            
+            self.assertRaises(ValueError, appender.append, b"closed")
+
+        return
+
+    def test_appender_closes_file_once(self):
+        with tempfile.TemporaryDirectory() as td:
+            appender = File(os.path.join(td, "log.txt")).appender()
+            appender.append(b"data\n")
+
+            # Concurrent calls shouldn't close the file descriptor twice
+            with mock.patch.object(
+                    appending.os, "close", wraps=os.close) as close:
+                threads = [
+                    threading.Thread(target=appender.close) for i in range(8)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                appender.close()
+
+            self.assertEqual(close.call_count, 1)
+            self.assertTrue(appender.closed)
+
+        return
+
+    def test_appender_close_waits_for_flush_in_every_caller(self):
+        with tempfile.TemporaryDirectory() as td:
+            def failing_fsync(fd):
+                time.sleep(0.05)
+                raise OSError(errno.EIO, "Injected fsync failure")
+
+            errors = []
+            def close():
+                try:
+                    appender.close()
+                except OSError as e:
+                    errors.append(e)
+                return
+
+            with mock.patch.object(appending.os, "fsync", failing_fsync):
+                appender = File(os.path.join(td, "log.txt")).appender()
+                appender.append(b"data\n")
+                threads = [threading.Thread(target=close) for i in range(2)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+            # Both callers should have seen the failed flush
+            self.assertEqual(len(errors), 2)
+            self.assertEqual(errors[0].errno, errno.EIO)
+
+        return
+    
+    def test_stat_returns_snapshot(self):
+        with tempfile.NamedTemporaryFile() as tf:
+            tf.write(b"Hello, world!")
+            tf.flush()
+            
+            f = File(tf.name)
+            stat_result = f.stat()
+            self.assertEqual(stat_result.st_size, os.stat(tf.name).st_size)
+            
+            # The properties should be read from the snapshot, even though the
+            # file has since changed.
+            tf.write(b" Goodbye!")
+            tf.flush()
+            self.assertIs(f.stat(), stat_result)
+            self.assertEqual(f.size, 13)
+            
+            # Refreshing picks up the change
+            f.refresh()
+            self.assertEqual(f.size, 22)
+        
+        return
+    
+    def test_stat_snapshot_expires(self):
+        with tempfile.NamedTemporaryFile() as tf:
+            f = File(tf.name, stat_ttl=0)
+            f.stat()
+            tf.write(b"Hello, world!")
+            tf.flush()
+            time.sleep(0.01)
+            self.assertEqual(f.size, 13)
+        
+        return
+    
+    def test_raise_exception_for_negative_stat_ttl(self):
+        self.assertRaises(
+            InvalidFileValueError, File, self.fake_path, stat_ttl=-1
+        )
+        return
+    
+    def test_raise_exception_for_stat_on_nonexistent_file(self):
+        f = File(self.fake_path)
+        self.assertRaises(FileNotFoundError, f.stat)
+        self.assertFalse(f.exists)
+        return
+    
+    def test_stat_snapshot_invalidated_after_remove(self):
+        tf = tempfile.NamedTemporaryFile(delete=False)
+        tf.close()
+        with TemporaryFileHandler(tf):
+            f = File(tf.name)
+            f.refresh()
+            self.assertTrue(f.exists)
+            f.remove()
+            self.assertFalse(f.exists)
+            self.assertFalse(f.is_file)
+        
+        return
+    
+    def test_stat_snapshot_invalidated_after_rename(self):
+        tf = tempfile.NamedTemporaryFile(delete=False)
+        tf.close()
+        with TemporaryFileHandler(tf):
+            BASE_DIRECTORY = str(pathlib.Path(tf.name).parent)
+            f = File(tf.name)
+            old_stat_result = f.stat()
+            f.rename(utils.get_random_file_name(BASE_DIRECTORY))
+            self.assertIsNot(f.stat(), old_stat_result)
+            f.remove()
+        
+        return
+    
 
 @unittest.skipUnless(IS_OS_POSIX_COMPLIANT, "Unix-like only test")
 class TestFileUnixLike(unittest.TestCase):
@@ -0,0 +1,138 @@
+"""Contains the unit tests for the inner transfer module"""
+
+import unittest
+import tempfile
+import os
+from unittest import mock
+
+from classyfd.file import transfer
+
+
+# Tests
+class TestTransfer(unittest.TestCase):
+    """Contains the cross-platform tests"""
+    def setUp(self):
+        self._temporary_directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self._temporary_directory.name, "source")
+        self.destination = os.path.join(
+            self._temporary_directory.name, "destination"
+        )
+        self.data = os.urandom(3 * 1024 * 1024 + 123)
+        with open(self.source, mode="wb") as f:
+            f.write(self.data)
+        
+        return
+    
+    def tearDown(self):
+        self._temporary_directory.cleanup()
+        return
+    
+    def _read_destination(self):
+        with open(self.destination, mode="rb") as f:
+            return f.read()
+    
+    def test_copy_file(self):
+        method = transfer.copy_file(self.source, self.destination)
+        self.assertIn(
+            method, ("reflink", "copy_file_range", "sendfile", "buffered")
+        )
+        self.assertEqual(self._read_destination(), self.data)
+        return
+    
+    def test_copy_empty_file(self):
+        with open(self.source, mode="wb"):
+            pass
+        
+        transfer.copy_file(self.source, self.destination)
+        self.assertEqual(self._read_destination(), b"")
+        return
+    
+    def test_fall_back_to_buffered_copy(self):
+        """Every primitive that isn't supported should fall back to the next"""
+        with mock.patch.object(transfer, "_reflink", return_value=False):
+            with mock.patch.object(
+                    transfer, "_copy_range_with_copy_file_range",
+                    return_value=None):
+                with mock.patch.object(
+                        transfer, "_copy_range_with_sendfile",
+                        return_value=None):
+                    method = transfer.copy_file(self.source, self.destination)
+        
+        self.assertEqual(method, "buffered")
+        self.assertEqual(self._read_destination(), self.data)
+        return
+    
+    @unittest.skipUnless(hasattr(os, "sendfile"), "sendfile() is required")
+    def test_copy_with_sendfile(self):
+        with mock.patch.object(transfer, "_reflink", return_value=False):
+            with mock.patch.object(
+                    transfer, "_copy_range_with_copy_file_range",
+                    return_value=None):
+                method = transfer.copy_file(self.source, self.destination)
+        
+        self.assertEqual(method, "sendfile")
+        self.assertEqual(self._read_destination(), self.data)
+        return
+    
+    @unittest.skipUnless(
+        hasattr(os, "SEEK_DATA"), "SEEK_DATA and SEEK_HOLE are required"
+    )
+    def test_copy_preserves_holes(self):
+        hole_size = 64 * 1024 * 1024
+        with open(self.source, mode="wb") as f:
+            f.write(b"head")
+            f.seek(hole_size)
+            f.write(b"tail")
+            f.seek(2 * hole_size)
+            f.truncate()
+        
+        with mock.patch.object(transfer, "_reflink", return_value=False):
+            transfer.copy_file(self.source, self.destination)
+        
+        source_stat = os.stat(self.source)
+        destination_stat = os.stat(self.destination)
+        self.assertEqual(destination_stat.st_size, source_stat.st_size)
+        # The destination shouldn't take up more space than the source (if
+        # the file system supports holes, neither will take up much at all).
+        self.assertLessEqual(
+            destination_stat.st_blocks, source_stat.st_blocks + 16
+        )
+        with open(self.destination, mode="rb") as f:
+            self.assertEqual(f.read(4), b"head")
+            f.seek(hole_size)
+            self.assertEqual(f.read(4), b"tail")
+        
+        return
+
+    
+    def test_move_file_across_file_systems(self):
+        os.utime(self.source, ns=(1000000000, 2000000000))
+        os.chmod(self.source, 0o600)
+        
+        transfer.move_file_across_file_systems(self.source, self.destination)
+        
+        self.assertFalse(os.path.exists(self.source))
+        self.assertEqual(self._read_destination(), self.data)
+        destination_stat = os.stat(self.destination)
+        self.assertEqual(destination_stat.st_mtime_ns, 2000000000)
+        self.assertEqual(destination_stat.st_mode & 0o777, 0o600)
+        # No temporary files should be left behind
+        self.assertEqual(
+            os.listdir(self._temporary_directory.name), ["destination"]
+        )
+        return
+    
+    def test_failed_move_keeps_source(self):
+        with mock.patch.object(
+                transfer, "copy_file", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                transfer.move_file_across_file_systems(
+                    self.source, self.destination
+                )
+        
+        self.assertTrue(os.path.exists(self.source))
+        self.assertFalse(os.path.exists(self.destination))
+        return
+
+if __name__ == "__main__":
+    unittest.main()
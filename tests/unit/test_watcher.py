@@ -0,0 +1,158 @@
+"""Contains the unit tests for the inner watcher module"""
+
+import unittest
+import os
+import platform
+import tempfile
+
+from classyfd import File, Directory, config
+
+
+# Globals
+OPERATING_SYSTEM = platform.system().lower()
+
+
+# Tests
+@unittest.skipUnless(OPERATING_SYSTEM == "linux", "Linux-only test")
+class TestWatcherLinux(unittest.TestCase):
+    """Contains the tests specifically for Linux"""
+    def setUp(self):
+        self._temporary_directory = tempfile.TemporaryDirectory()
+        self.path = self._temporary_directory.name
+        return
+    
+    def tearDown(self):
+        self._temporary_directory.cleanup()
+        return
+    
+    def _write(self, relative_path, data="Hello, world!"):
+        path = os.path.join(self.path, relative_path)
+        with open(path, mode="w", encoding=config._ENCODING) as f:
+            f.write(data)
+        
+        return path
+    
+    def test_watch_directory_coalesces_events(self):
+        with Directory(self.path).watch(debounce=0.05) as watcher:
+            created_path = self._write("created.txt")
+            # Several writes should only be reported as the file's creation
+            with open(created_path, mode="a") as f:
+                for i in range(10):
+                    f.write("more")
+                    f.flush()
+            
+            # Creating and removing a file within the window cancels out
+            os.remove(self._write("temporary.txt"))
+            
+            events = watcher.read(timeout=5)
+        
+        self.assertEqual(
+            events, 
+            [{"type": "created", "path": created_path, "is_dir": False}]
+        )
+        return
+    
+    def test_watch_directory_reports_moves_and_deletes(self):
+        source = self._write("source.txt")
+        removed = self._write("removed.txt")
+        with Directory(self.path).watch() as watcher:
+            destination = os.path.join(self.path, "destination.txt")
+            os.rename(source, destination)
+            os.remove(removed)
+            
+            events = watcher.read(timeout=5)
+        
+        self.assertEqual(
+            events, 
+            [
+                {
+                    "type": "moved", "path": source, 
+                    "destination": destination, "is_dir": False
+                },
+                {"type": "deleted", "path": removed, "is_dir": False}
+            ]
+        )
+        return
+    
+    def test_watch_directory_keeps_move_followed_by_write(self):
+        source = self._write("source.txt")
+        with Directory(self.path).watch(debounce=0.05) as watcher:
+            destination = os.path.join(self.path, "destination.txt")
+            os.rename(source, destination)
+            # Writing to the moved file shouldn't hide where it came from
+            with open(destination, mode="a") as f:
+                f.write("more")
+            
+            events = watcher.read(timeout=5)
+        
+        self.assertEqual(
+            events, 
+            [
+                {
+                    "type": "moved", "path": source, 
+                    "destination": destination, "is_dir": False
+                }
+            ]
+        )
+        return
+    
+    def test_watch_directory_recursively(self):
+        with Directory(self.path).watch(recursive=True) as watcher:
+            os.makedirs(os.path.join(self.path, "a", "b"))
+            events = watcher.read(timeout=5)
+            # The new sub-directories should be watched now, too
+            path = self._write(os.path.join("a", "b", "c.txt"))
+            events += watcher.read(timeout=5)
+        
+        self.assertIn(
+            {"type": "created", "path": path, "is_dir": False}, events
+        )
+        return
+    
+    def test_watch_directory_recursively_reports_moved_directory_once(self):
+        os.makedirs(os.path.join(self.path, "a", "sub"))
+        self._write(os.path.join("a", "sub", "f1"))
+        with Directory(self.path).watch(recursive=True) as watcher:
+            source = os.path.join(self.path, "a")
+            destination = os.path.join(self.path, "b")
+            os.rename(source, destination)
+            events = watcher.read(timeout=5)
+            # The moved directory's watches should follow it
+            path = self._write(os.path.join("b", "sub", "f2"))
+            events += watcher.read(timeout=5)
+
+        self.assertEqual(
+            events,
+            [
+                {
+                    "type": "moved", "path": source,
+                    "destination": destination, "is_dir": True
+                },
+                {"type": "created", "path": path, "is_dir": False}
+            ]
+        )
+        return
+
+    def test_watch_file(self):
+        other_path = self._write("other.txt")
+        f = File(os.path.join(self.path, "watched.txt"))
+        with f.watch() as watcher:
+            self._write("other.txt", "changed")
+            self._write("watched.txt")
+            events = watcher.read(timeout=5)
+        
+        self.assertEqual(
+            events, [{"type": "created", "path": f.path, "is_dir": False}]
+        )
+        self.assertNotIn(other_path, [event["path"] for event in events])
+        return
+    
+    def test_read_timeout(self):
+        with Directory(self.path).watch() as watcher:
+            self.assertEqual(watcher.read(timeout=0.01), [])
+        
+        return
+
+
+if __name__ == "__main__":
+    unittest.main()